@@ -0,0 +1,49 @@
+"""
+KeyAura Configuration
+Loads config.json and fills in defaults for settings that are missing.
+"""
+
+import json
+import os
+
+CONFIG_FILE = "config.json"
+
+DEFAULT_AUDIO_SETTINGS = {
+    "sample_rate": 44100,
+    "channels": 2,
+    "buffer_size": 512,
+    "supported_formats": ["mp3", "wav", "ogg"],
+    "profile": "custom",
+    "engine": "pygame",
+    "polyphony": 16,
+    "max_voices_per_key": 3,
+    "steal_policy": "oldest",
+    "software_voices": 64,
+    "limiter_threshold": 0.98,
+    "cache_max_mb": 64,
+    "trim_leading_silence": True,
+    "onset_threshold_db": -30.0,
+    "normalize_loudness": True,
+    "key_repeat": "ignore",
+    "key_repeat_interval_ms": 100,
+    "key_repeat_gain": 0.5,
+}
+
+
+def load_config(path=CONFIG_FILE):
+    """Load the application config. Returns an empty dict if it can't be read."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Error loading config {path}: {e}")
+        return {}
+
+
+def audio_settings(config):
+    """Return the config's audio_settings merged over the defaults."""
+    settings = dict(DEFAULT_AUDIO_SETTINGS)
+    settings.update(config.get("audio_settings", {}))
+    return settings
@@ -0,0 +1,150 @@
+"""
+KeyAura Async Engine
+An asyncio facade over KeyAuraEngine for embedding KeyAura in event-loop
+based tools. Key presses stay non-blocking calls; template loads, imports
+and decoding run in a thread pool so they never stall the loop or key
+playback, and several can be in flight at once.
+
+    engine = await AsyncKeyAuraEngine.open()
+    await engine.load_template("Mechanical")
+    engine.press("A")
+    async for event in engine.events():
+        print(event)
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from engine import KeyAuraEngine
+
+DEFAULT_EVENT_QUEUE = 1024
+
+
+class AsyncKeyAuraEngine:
+    """Runs the blocking parts of a KeyAuraEngine in an executor.
+
+    Calls that change the current key sounds (starting a template load,
+    assigning sounds) are serialized with an asyncio.Lock; waiting for a
+    template's sounds, imports and decodes of individual files run
+    concurrently.
+    """
+
+    def __init__(self, engine, executor=None):
+        self.engine = engine
+        self._own_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=min(8, os.cpu_count() or 1), thread_name_prefix="KeyAuraDecode")
+        self._state_lock = asyncio.Lock()
+
+    @classmethod
+    async def open(cls, *args, executor=None, **kwargs):
+        """Create a KeyAuraEngine off the loop (mixer setup can take a while)."""
+        loop = asyncio.get_running_loop()
+        engine = await loop.run_in_executor(executor, partial(KeyAuraEngine, *args, **kwargs))
+        return cls(engine, executor)
+
+    async def _run(self, function, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(function, *args))
+
+    def press(self, key):
+        """Queue a key sound. Never blocks; returns True if the key has a sound."""
+        return self.engine.press(key)
+
+    def set_volume(self, value):
+        self.engine.set_volume(value)
+
+    @property
+    def templates(self):
+        return self.engine.templates
+
+    @property
+    def key_sounds(self):
+        return self.engine.key_sounds
+
+    async def load_template(self, name):
+        """Make a template current. Returns its data, or None if unknown.
+
+        The lock is held only while the switch starts, so a later call
+        cancels this load instead of queueing behind it.
+        """
+        async with self._state_lock:
+            load = await self._run(self.engine.load_template, name)
+        if load is None:
+            return None
+        # Waited for on the loop's default executor, so it never takes a
+        # worker a later load needs to start
+        await asyncio.get_running_loop().run_in_executor(None, load.wait)
+        return load.template_data
+
+    async def save_template(self, name, layout="100%"):
+        """Save the current key sounds as a template."""
+        async with self._state_lock:
+            return await self._run(self.engine.save_template, name, layout)
+
+    async def assign_sound(self, keys, sound_path):
+        """Map keys to sound_path, analyzing and decoding it in the executor."""
+        async with self._state_lock:
+            await self._run(self.engine.assign_sound, list(keys), sound_path)
+
+    async def import_sounds(self, paths):
+        """Transcode paths concurrently. Returns {path: PCM cache file} of those that worked."""
+        paths = [path for path in dict.fromkeys(paths) if path]
+        results = await asyncio.gather(
+            *(self._run(self.engine.transcoder.transcode, path) for path in paths),
+            return_exceptions=True)
+        imported = {}
+        for path, result in zip(paths, results):
+            if isinstance(result, Exception):
+                print(f"Error importing sound {path}: {result}")
+            else:
+                imported[path] = result
+        return imported
+
+    async def preload(self, paths):
+        """Decode paths into the sound cache concurrently."""
+        paths = [path for path in dict.fromkeys(paths) if path]
+        results = await asyncio.gather(
+            *(self._run(self.engine.sound_cache.load, path) for path in paths),
+            return_exceptions=True)
+        for path, result in zip(paths, results):
+            if isinstance(result, Exception):
+                print(f"Error preloading sound {path}: {result}")
+
+    async def preview(self, sound_path):
+        """Play a sound file once."""
+        await self._run(self.engine.preview_sound, sound_path)
+
+    async def events(self, max_pending=DEFAULT_EVENT_QUEUE):
+        """Yield engine events (dicts with a "type") as they happen.
+
+        Each iterator gets its own bounded queue; if the consumer falls
+        behind, the oldest events are discarded rather than blocking the
+        audio thread.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(max_pending)
+
+        def enqueue(event):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+        def listener(event):
+            # Called on engine threads; hand the event to the loop
+            loop.call_soon_threadsafe(enqueue, event)
+
+        self.engine.listeners.append(listener)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self.engine.listeners.remove(listener)
+
+    async def close(self):
+        """Stop the engine and, if it was created here, the executor."""
+        await self._run(self.engine.close)
+        if self._own_executor:
+            self.executor.shutdown(wait=False)
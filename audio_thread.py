@@ -0,0 +1,116 @@
+"""
+KeyAura Audio Thread
+Runs key sound playback on a dedicated thread so the Tk mainloop only has to
+enqueue key events.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+DEFAULT_MAX_PENDING = 256
+REALTIME_PRIORITY = 10
+NICE_PRIORITY = -10
+
+
+def raise_thread_priority():
+    """Try to give the calling thread elevated scheduling priority.
+
+    Only implemented for Linux. Tries SCHED_RR first (needs CAP_SYS_NICE),
+    then a negative nice value for the thread. Returns a short description
+    of what was applied, or None if the thread kept the default priority.
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+
+    try:
+        # pid 0 targets the calling thread on Linux
+        os.sched_setscheduler(0, os.SCHED_RR, os.sched_param(REALTIME_PRIORITY))
+        return "SCHED_RR"
+    except (AttributeError, OSError):
+        pass
+
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), NICE_PRIORITY)
+        return f"nice {NICE_PRIORITY}"
+    except (AttributeError, OSError):
+        return None
+
+
+class AudioDispatcher(threading.Thread):
+    """Background thread that plays queued key events.
+
+    The queue is a bounded deque: append() and popleft() are atomic, so the
+    UI thread never waits on a lock. When the queue is full the oldest event
+    is discarded and counted as dropped, since a stale click is worth less
+    than a fresh one.
+    """
+
+    def __init__(self, handler, max_pending=DEFAULT_MAX_PENDING, realtime=False):
+        super().__init__(name="KeyAuraAudio", daemon=True)
+        self.handler = handler
+        self.realtime = realtime
+        self.priority = None
+        self._pending = deque(maxlen=max_pending)
+        self._wakeup = threading.Event()
+        self._running = True
+
+        # Held while an event plays; take it to swap the mixer out safely
+        self.lock = threading.Lock()
+
+        self.submitted = 0
+        self.dispatched = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def submit(self, key, gain=1.0, queued_at=None):
+        """Queue a key event for playback. Never blocks.
+
+        queued_at (a perf_counter() time) defaults to now; pass the time the
+        input event arrived to measure latency from there.
+        """
+        if len(self._pending) == self._pending.maxlen:
+            self.dropped += 1
+        self._pending.append((key, gain, time.perf_counter() if queued_at is None else queued_at))
+        self.submitted += 1
+        self._wakeup.set()
+
+    def run(self):
+        if self.realtime:
+            self.priority = raise_thread_priority()
+
+        while self._running:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            while self._running:
+                try:
+                    key, gain, queued_at = self._pending.popleft()
+                except IndexError:
+                    break
+                try:
+                    with self.lock:
+                        self.handler(key, queued_at, gain)
+                    self.dispatched += 1
+                except Exception as e:
+                    self.errors += 1
+                    print(f"Error dispatching sound for key {key}: {e}")
+
+    def stop(self, timeout=1.0):
+        """Stop the thread after the event currently being played."""
+        self._running = False
+        self._wakeup.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    def stats(self):
+        """Return queue counters as a dict."""
+        return {
+            "pending": len(self._pending),
+            "submitted": self.submitted,
+            "dispatched": self.dispatched,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "priority": self.priority,
+        }
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+KeyAura Latency Benchmark
+Measures click-to-mixer latency of the playback path headlessly and prints
+the results as JSON so runs can be compared between releases. Latency ends
+when the sound starts: when its SDL channel is started (pygame engine) or
+when the software mixer admits the voice into the next block (numpy engine).
+
+The "alloc" scenario presses keys under tracemalloc and checks that the
+press path (engine.press through the audio thread's dispatch) makes no net
+allocations per press. It then clicks keys through the GUI's click handler,
+key selection and highlight animation against a stub Tk root, so the GUI
+half is checked without a window. The "errors" scenario reports two errors
+back to back and checks that the rate-limited error channel still delivers
+the second once its interval is up. The exit status is 1 if a check fails.
+
+Usage:
+    python bench_latency.py [--engine pygame|numpy] [--profile NAME] [--events 200] [--rate 30]
+                            [--presses 10000] [--scenario NAME] [--output FILE]
+"""
+
+import argparse
+import collections
+import contextlib
+import gc
+import json
+import math
+import os
+import platform
+import struct
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import wave
+
+# Must be set before the mixer is initialized
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+from app_config import load_config
+from engine import KeyAuraEngine
+from error_reporting import ErrorReporter
+from highlight_animator import HighlightAnimator
+from key_model import KeySet
+from mixer_config import profile_names
+
+KEYS = "QWERTYUIOPASDFGHJKLZXCVBNM"
+SCENARIOS = ("cold", "warm", "burst", "alloc", "errors")
+SYNTHETIC_SOUNDS = 6
+ALLOC_PRESSES = 10000
+ALLOC_WARMUP = 1000
+ALLOC_BATCH = 100
+ALLOC_SETTLE_TIMEOUT = 2.0
+ERROR_INTERVAL = 0.05
+# Net blocks allowed per audio engine. The press path keeps nothing; only the
+# software mixer's in-flight output blocks and the deque free lists behind
+# them may hold a few blocks across snapshots
+ALLOC_MAX_NET_BLOCKS = {"pygame": 0, "numpy": 16}
+
+# Modules on the press path; allocations made anywhere else are not counted
+PRESS_PATH_MODULES = ("engine.py", "audio_thread.py", "key_model.py", "voice_pool.py",
+                      "mixer_engine.py", "sound_cache.py", "variations.py")
+# The GUI's click handler and highlight animation on top of the press path
+CLICK_PATH_MODULES = PRESS_PATH_MODULES + ("main.py", "highlight_animator.py")
+
+
+def write_click_wav(path, frequency, duration=0.08, sample_rate=44100):
+    """Write a short decaying sine 'click' as a 16-bit mono WAV file."""
+    frames = int(sample_rate * duration)
+    data = bytearray()
+    for i in range(frames):
+        envelope = 1.0 - i / frames
+        value = int(12000 * envelope * math.sin(2 * math.pi * frequency * i / sample_rate))
+        data += struct.pack('<h', value)
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(bytes(data))
+
+
+def create_synthetic_template(directory, keys=KEYS):
+    """Create synthetic sounds and map every key in keys to one of them."""
+    paths = []
+    for i in range(SYNTHETIC_SOUNDS):
+        path = os.path.join(directory, f"click_{i}.wav")
+        write_click_wav(path, 300 + 150 * i)
+        paths.append(path)
+    return {key: paths[i % len(paths)] for i, key in enumerate(keys)}
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(math.ceil(fraction * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies):
+    """Reduce a list of latencies in seconds to a millisecond summary."""
+    values = sorted(latencies)
+    count = len(values)
+    return {
+        "count": count,
+        "mean_ms": (sum(values) / count * 1000) if count else 0.0,
+        "p50_ms": percentile(values, 0.50) * 1000,
+        "p95_ms": percentile(values, 0.95) * 1000,
+        "p99_ms": percentile(values, 0.99) * 1000,
+        "max_ms": (values[-1] * 1000) if count else 0.0,
+    }
+
+
+class LatencyProbe:
+    """Drives a KeyAuraEngine and timestamps each key as its sound starts."""
+
+    def __init__(self, config, key_sounds, directory):
+        # Engine log lines go to stderr so stdout stays valid JSON
+        with contextlib.redirect_stdout(sys.stderr):
+            self.engine = KeyAuraEngine(config, template_dir=os.path.join(directory, "templates"),
+                                        sounds_dir=directory)
+        self.engine.key_sounds.update(key_sounds)
+        self.engine.set_volume(0.0)
+        self.latencies = []
+        self._done = threading.Semaphore(0)
+        # Time the engine's own handler on its audio thread
+        self.engine.audio_dispatcher.handler = self.dispatch_key_sound
+        # The software mixer starts a voice a block later, on its own thread;
+        # voices are admitted in the order they were dispatched
+        self._admitting = None
+        if hasattr(self.engine.voices, "on_admit"):
+            self._admitting = collections.deque()
+            self.engine.voices.on_admit = self.voice_admitted
+
+    @property
+    def measured_to(self):
+        """Where a measured latency ends."""
+        return "channel play" if self._admitting is None else "mixer admission"
+
+    def dispatch_key_sound(self, key, queued_at, gain=1.0):
+        """Run KeyAuraEngine.dispatch_key_sound and record when its sound starts."""
+        if self._admitting is not None:
+            self._admitting.append(queued_at)
+            self.engine.dispatch_key_sound(key, queued_at, gain)
+            return
+        self.engine.dispatch_key_sound(key, queued_at, gain)
+        self.latencies.append(time.perf_counter() - queued_at)
+        self._done.release()
+
+    def voice_admitted(self, key):
+        """Record a voice the software mixer started. Runs on the mixer thread."""
+        if not self._admitting:
+            # Dispatched by the engine's own handler, e.g. in the alloc scenario
+            return
+        self.latencies.append(time.perf_counter() - self._admitting.popleft())
+        self._done.release()
+
+    def press(self, key):
+        """Press a key the way the GUIs do, without the widget feedback.
+
+        Returns True if the key has a sound and was queued.
+        """
+        return self.engine.press(key)
+
+    def wait(self, count, timeout=10.0):
+        """Wait until count events have been dispatched."""
+        deadline = time.perf_counter() + timeout
+        for _ in range(count):
+            if not self._done.acquire(timeout=max(0.0, deadline - time.perf_counter())):
+                raise RuntimeError("Timed out waiting for the audio thread")
+
+    def close(self):
+        self.engine.close()
+
+
+class StubRoot:
+    """Stands in for the Tk root: after() callbacks run from run_pending() once due."""
+
+    def __init__(self):
+        self._pending = {}
+        self._next_id = 0
+
+    def after(self, ms, callback):
+        self._next_id += 1
+        self._pending[self._next_id] = (time.perf_counter() + ms / 1000.0, callback)
+        return self._next_id
+
+    def after_idle(self, callback):
+        return self.after(0, callback)
+
+    def after_cancel(self, after_id):
+        self._pending.pop(after_id, None)
+
+    def run_pending(self):
+        """Run every callback that is due, as Tk's event loop would."""
+        now = time.perf_counter()
+        for after_id in [i for i, (due, _) in self._pending.items() if due <= now]:
+            _, callback = self._pending.pop(after_id)
+            callback()
+
+
+class StubWidget:
+    """Accepts the calls the click path makes on the keyboard and labels."""
+
+    def set_key_colors(self, key, fill, outline):
+        pass
+
+    def configure(self, **options):
+        pass
+
+
+def stub_click_app(engine):
+    """Return a KeyAura window's click path wired to engine and stub widgets."""
+    from main import KeyAura
+
+    app = KeyAura.__new__(KeyAura)
+    app.root = StubRoot()
+    app.engine = engine
+    app.highlights = HighlightAnimator(app.root, StubWidget())
+    app.selected_keys = KeySet()
+    app.selected_keys_label = StubWidget()
+    app.ctrl_pressed = False
+    app._selected_keys_display_pending = False
+    app._selected_keys_text = ""
+    return app
+
+
+def run_sequential(probe, events, cold):
+    """Press keys one at a time, waiting for each to reach the mixer."""
+    probe.latencies = []
+    for i in range(events):
+        if cold:
+            probe.engine.sound_cache.clear()
+        probe.press(KEYS[i % len(KEYS)])
+        probe.wait(1)
+        time.sleep(0.005)
+    return summarize(probe.latencies)
+
+
+def run_burst(probe, events, rate):
+    """Press keys on a fixed schedule of `rate` keys per second."""
+    probe.latencies = []
+    interval = 1.0 / rate
+    start = time.perf_counter()
+    for i in range(events):
+        delay = start + i * interval - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        probe.press(KEYS[i % len(KEYS)])
+    probe.wait(events)
+    result = summarize(probe.latencies)
+    result["rate"] = rate
+    return result
+
+
+def run_allocations(probe, presses=ALLOC_PRESSES, gui=False):
+    """Press keys under tracemalloc and report net allocations of the press path.
+
+    With gui, keys are clicked through a stub window's click handler instead,
+    alternating single and Ctrl multi-selection, and the highlight animation
+    is measured too. The engine's own dispatch handler replaces the probe's
+    timing hook, and a warm-up pass runs first so caches filled on first use
+    are not counted.
+    """
+    engine = probe.engine
+    dispatcher = engine.audio_dispatcher
+    dispatcher.handler = engine.dispatch_key_sound
+    app = stub_click_app(engine) if gui else None
+
+    def press(i):
+        if app is None:
+            engine.press(KEYS[i % len(KEYS)])
+            return
+        app.ctrl_pressed = i % 4 != 0
+        app.on_key_click(KEYS[i % len(KEYS)])
+        app.root.run_pending()
+
+    def press_keys(count):
+        for i in range(count):
+            press(i)
+            if i % ALLOC_BATCH == ALLOC_BATCH - 1 or i == count - 1:
+                # Let the audio thread drain the batch so nothing is dropped
+                while dispatcher.dispatched + dispatcher.errors + dispatcher.dropped < dispatcher.submitted:
+                    time.sleep(0.0005)
+        # Snapshots are compared with every voice and flash finished, so
+        # sounds still playing are not counted as allocations
+        deadline = time.perf_counter() + ALLOC_SETTLE_TIMEOUT
+        while time.perf_counter() < deadline:
+            if app is not None:
+                app.root.run_pending()
+            if not engine.voices.active_voices() and (app is None or app.highlights._after_id is None):
+                break
+            time.sleep(0.005)
+
+    max_blocks = ALLOC_MAX_NET_BLOCKS.get(engine.audio_settings["engine"], 0)
+    modules = CLICK_PATH_MODULES if gui else PRESS_PATH_MODULES
+    filters = [tracemalloc.Filter(True, os.path.join("*", name)) for name in modules]
+    tracemalloc.start()
+    try:
+        press_keys(ALLOC_WARMUP)
+        gc.collect()
+        before = tracemalloc.take_snapshot().filter_traces(filters)
+        press_keys(presses)
+        gc.collect()
+        after = tracemalloc.take_snapshot().filter_traces(filters)
+    finally:
+        tracemalloc.stop()
+        dispatcher.handler = probe.dispatch_key_sound
+
+    differences = [d for d in after.compare_to(before, "lineno") if d.count_diff or d.size_diff]
+    net_blocks = sum(d.count_diff for d in differences)
+    net_bytes = sum(d.size_diff for d in differences)
+    return {
+        "presses": presses,
+        "net_blocks": net_blocks,
+        "net_bytes": net_bytes,
+        "bytes_per_press": net_bytes / presses if presses else 0.0,
+        "top": [str(d) for d in differences[:5]],
+        "max_net_blocks": max_blocks,
+        "passed": net_blocks <= max_blocks,
+    }
+
+
+def run_error_delivery(interval=ERROR_INTERVAL):
+    """Report two errors within one interval and check that both reach the sink."""
+    delivered = []
+    reporter = ErrorReporter(lambda message, key, held: delivered.append((message, held)), interval)
+    with contextlib.redirect_stdout(sys.stderr):
+        reporter.report("first error")
+        reporter.report("second error")
+    deadline = time.perf_counter() + interval * 20
+    while len(delivered) < 2 and time.perf_counter() < deadline:
+        time.sleep(interval / 10)
+    reporter.close()
+    return {
+        "delivered": [message for message, _ in delivered],
+        "passed": delivered == [("first error", 0), ("second error", 0)],
+    }
+
+
+def run_benchmark(engine=None, events=200, rate=30.0, scenarios=SCENARIOS, profile=None,
+                  presses=ALLOC_PRESSES):
+    """Run the selected scenarios and return the report as a dict."""
+    config = load_config()
+    overrides = dict(config.get("audio_settings", {}))
+    if profile:
+        overrides["profile"] = profile
+    if engine:
+        overrides["engine"] = engine
+    config = dict(config, audio_settings=overrides)
+
+    with tempfile.TemporaryDirectory() as directory:
+        key_sounds = create_synthetic_template(directory)
+        probe = LatencyProbe(config, key_sounds, directory)
+        settings = probe.engine.audio_settings
+        report = {
+            "environment": {
+                "python": platform.python_version(),
+                "pygame": pygame.version.ver,
+                "platform": platform.platform(),
+                "audio_driver": os.environ.get("SDL_AUDIODRIVER"),
+                "mixer": list(pygame.mixer.get_init()),
+                "engine": settings["engine"],
+                "profile": settings["profile"],
+                "buffer_size": settings["buffer_size"],
+                "measured_to": probe.measured_to,
+            },
+            "scenarios": {},
+        }
+        if probe.engine.probe_results is not None:
+            report["environment"]["probe"] = [{"buffer_size": b, "underruns": u}
+                                              for b, u in probe.engine.probe_results]
+
+        try:
+            for scenario in scenarios:
+                if scenario == "cold":
+                    report["scenarios"]["cold"] = run_sequential(probe, events, cold=True)
+                elif scenario == "warm":
+                    probe.engine.sound_cache.warm(key_sounds.values())
+                    report["scenarios"]["warm"] = run_sequential(probe, events, cold=False)
+                elif scenario == "burst":
+                    probe.engine.sound_cache.warm(key_sounds.values())
+                    report["scenarios"]["burst"] = run_burst(probe, events, rate)
+                elif scenario == "alloc":
+                    probe.engine.sound_cache.warm(key_sounds.values())
+                    report["scenarios"]["alloc"] = run_allocations(probe, presses)
+                    report["scenarios"]["alloc_gui"] = run_allocations(probe, presses, gui=True)
+                elif scenario == "errors":
+                    report["scenarios"]["errors"] = run_error_delivery()
+            report.update(probe.engine.stats())
+        finally:
+            probe.close()
+            pygame.mixer.quit()
+
+    return report
+
+
+def main():
+    """Parse arguments, run the benchmark and emit JSON."""
+    parser = argparse.ArgumentParser(description="Measure KeyAura click-to-mixer latency.")
+    parser.add_argument("--engine", choices=["pygame", "numpy"], help="override audio_settings.engine")
+    parser.add_argument("--profile", choices=profile_names(), help="override audio_settings.profile")
+    parser.add_argument("--events", type=int, default=200, help="key events per scenario")
+    parser.add_argument("--rate", type=float, default=30.0, help="keys per second for the burst scenario")
+    parser.add_argument("--presses", type=int, default=ALLOC_PRESSES,
+                        help="key presses for the alloc scenario")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS,
+                        help="scenario to run (repeatable, default: all)")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.engine, args.events, args.rate, args.scenario or SCENARIOS, args.profile,
+                           args.presses)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    checks = [report["scenarios"].get(name) for name in ("alloc", "alloc_gui", "errors")]
+    return 1 if any(check is not None and not check["passed"] for check in checks) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
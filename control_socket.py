@@ -0,0 +1,349 @@
+"""
+KeyAura Control Socket
+A Unix domain socket that lets scripts and hotkey daemons switch templates,
+change volume, mute or read stats of a running KeyAuraEngine, in the daemon
+or in a KeyAura window.
+
+Every message is one frame: a 4 byte header followed by the payload.
+
+    request:  opcode (u8), reserved (u8), payload length (u16, big endian)
+    response: status (u8), opcode (u8),   payload length (u16, big endian)
+
+Payloads are UTF-8 text for names and keys, a big endian float32 for the
+volume, one byte for mute (0 off, 1 on, 2 toggle) and JSON for stats.
+The server runs on its own thread with non-blocking sockets, so a slow or
+stuck client can never hold up the audio thread. Requests that change state
+go through a controls object: EngineControls applies them on the server
+thread, WindowControls hands them to a Tk window's own thread.
+"""
+
+import json
+import math
+import os
+import selectors
+import socket
+import stat
+import struct
+import tempfile
+import threading
+
+HEADER = struct.Struct("!BBH")
+VOLUME = struct.Struct("!f")
+MAX_PAYLOAD = 0xFFFF
+
+OP_PING = 0
+OP_USE_TEMPLATE = 1
+OP_SET_VOLUME = 2
+OP_MUTE = 3
+OP_STATS = 4
+OP_PRESS = 5
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+STATUS_UNKNOWN = 2
+
+MUTE_OFF, MUTE_ON, MUTE_TOGGLE = 0, 1, 2
+
+POLL_INTERVAL = 0.2
+RECV_SIZE = 4096
+
+# Windows builds of Python have no Unix domain sockets
+UNIX_SOCKETS = hasattr(socket, "AF_UNIX")
+
+
+def default_socket_path():
+    """Return the per-user control socket path."""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "keyaura.sock")
+    getuid = getattr(os, "getuid", None)
+    name = f"keyaura-{getuid()}.sock" if getuid is not None else "keyaura.sock"
+    return os.path.join(tempfile.gettempdir(), name)
+
+
+def check_supported():
+    """Raise RuntimeError if this platform has no Unix domain sockets."""
+    if not UNIX_SOCKETS:
+        raise RuntimeError("control sockets need Unix domain sockets, which this platform lacks")
+
+
+def encode_request(opcode, payload=b""):
+    """Return a request frame."""
+    if len(payload) > MAX_PAYLOAD:
+        raise ValueError(f"Payload too large: {len(payload)} bytes")
+    return HEADER.pack(opcode, 0, len(payload)) + payload
+
+
+def encode_response(status, opcode, payload=b""):
+    """Return a response frame, truncating payloads that do not fit."""
+    payload = payload[:MAX_PAYLOAD]
+    return HEADER.pack(status, opcode, len(payload)) + payload
+
+
+class EngineControls:
+    """Applies template, volume and mute requests to an engine directly."""
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def use_template(self, name):
+        if self.engine.load_template(name) is None:
+            raise ValueError(f"Cannot load template: {name}")
+
+    def set_volume(self, volume):
+        self.engine.set_volume(volume)
+
+    def set_muted(self, muted):
+        self.engine.sound_enabled = not muted
+
+
+class WindowControls:
+    """Applies template, volume and mute requests on a Tk window's thread.
+
+    window needs root, use_template(name), apply_volume(volume) and
+    set_sound_enabled(enabled), so its widgets follow the change. Requests
+    are queued with root.after and answered without waiting for Tk.
+    """
+
+    def __init__(self, window):
+        self.window = window
+
+    def use_template(self, name):
+        self.window.root.after(0, self.window.use_template, name)
+
+    def set_volume(self, volume):
+        self.window.root.after(0, self.window.apply_volume, volume)
+
+    def set_muted(self, muted):
+        self.window.root.after(0, self.window.set_sound_enabled, not muted)
+
+
+class ControlServer(threading.Thread):
+    """Serves control requests for an engine on a Unix domain socket.
+
+    controls applies the requests that change state (default:
+    EngineControls). Raises RuntimeError where Unix domain sockets are not
+    available.
+    """
+
+    def __init__(self, engine, path=None, controls=None):
+        check_supported()
+        super().__init__(name="KeyAuraControl", daemon=True)
+        self.engine = engine
+        self.controls = controls or EngineControls(engine)
+        self.path = path or default_socket_path()
+        self._selector = selectors.DefaultSelector()
+        self._buffers = {}
+        self._running = False
+        self.requests = 0
+        self.errors = 0
+
+        self._handlers = {
+            OP_PING: self._ping,
+            OP_USE_TEMPLATE: self._use_template,
+            OP_SET_VOLUME: self._set_volume,
+            OP_MUTE: self._mute,
+            OP_STATS: self._stats,
+            OP_PRESS: self._press,
+        }
+
+    def start(self):
+        """Bind the socket and start serving.
+
+        Raises RuntimeError if another server is listening on the path or
+        the path is not a socket.
+        """
+        self._remove_stale_socket()
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._listener.bind(self.path)
+        os.chmod(self.path, 0o600)
+        self._listener.listen()
+        self._listener.setblocking(False)
+        self._selector.register(self._listener, selectors.EVENT_READ)
+        self._running = True
+        super().start()
+
+    def _remove_stale_socket(self):
+        # A socket file left by a crashed run would make bind() fail; a live
+        # server's socket or any other file is left alone
+        try:
+            mode = os.lstat(self.path).st_mode
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(mode):
+            raise RuntimeError(f"{self.path} exists and is not a socket")
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.path)
+        except ConnectionRefusedError:
+            os.remove(self.path)
+            return
+        finally:
+            probe.close()
+        raise RuntimeError(f"KeyAura is already running on {self.path}")
+
+    def run(self):
+        try:
+            while self._running:
+                for key, _ in self._selector.select(POLL_INTERVAL):
+                    if key.fileobj is self._listener:
+                        self._accept()
+                    else:
+                        self._read(key.fileobj)
+        finally:
+            for connection in list(self._buffers):
+                self._close(connection)
+            self._selector.unregister(self._listener)
+            self._listener.close()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def _accept(self):
+        try:
+            connection, _ = self._listener.accept()
+        except BlockingIOError:
+            return
+        connection.setblocking(False)
+        self._buffers[connection] = bytearray()
+        self._selector.register(connection, selectors.EVENT_READ)
+
+    def _close(self, connection):
+        self._selector.unregister(connection)
+        self._buffers.pop(connection, None)
+        connection.close()
+
+    def _read(self, connection):
+        try:
+            data = connection.recv(RECV_SIZE)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._close(connection)
+            return
+
+        buffer = self._buffers[connection]
+        buffer += data
+        while len(buffer) >= HEADER.size:
+            opcode, _, length = HEADER.unpack_from(buffer)
+            if len(buffer) < HEADER.size + length:
+                break
+            payload = bytes(buffer[HEADER.size:HEADER.size + length])
+            del buffer[:HEADER.size + length]
+            try:
+                connection.sendall(self.handle(opcode, payload))
+            except (BlockingIOError, OSError):
+                # A client that does not read its replies is dropped
+                self._close(connection)
+                return
+
+    def handle(self, opcode, payload):
+        """Run one request and return the response frame."""
+        self.requests += 1
+        handler = self._handlers.get(opcode)
+        if handler is None:
+            self.errors += 1
+            return encode_response(STATUS_UNKNOWN, opcode, f"Unknown opcode {opcode}".encode("utf-8"))
+        try:
+            return encode_response(STATUS_OK, opcode, handler(payload))
+        except Exception as e:
+            self.errors += 1
+            return encode_response(STATUS_ERROR, opcode, str(e).encode("utf-8"))
+
+    def _ping(self, payload):
+        return payload
+
+    def _use_template(self, payload):
+        # The reply goes out once the switch has started; waiting for the
+        # sounds would hold up every other client on this thread
+        name = payload.decode("utf-8")
+        if name not in self.engine.templates:
+            raise ValueError(f"Unknown template: {name}")
+        self.controls.use_template(name)
+        return b""
+
+    def _set_volume(self, payload):
+        (volume,) = VOLUME.unpack(payload)
+        if not math.isfinite(volume):
+            raise ValueError(f"Invalid volume: {volume}")
+        self.controls.set_volume(min(max(volume, 0.0), 1.0))
+        return b""
+
+    def _mute(self, payload):
+        mode = payload[0] if payload else MUTE_TOGGLE
+        if mode not in (MUTE_OFF, MUTE_ON, MUTE_TOGGLE):
+            raise ValueError(f"Invalid mute mode: {mode}")
+        muted = self.engine.sound_enabled if mode == MUTE_TOGGLE else mode == MUTE_ON
+        self.controls.set_muted(muted)
+        return bytes([MUTE_ON if muted else MUTE_OFF])
+
+    def _stats(self, payload):
+        stats = self.engine.stats()
+        stats["state"] = {
+            "template": self.engine.current_template,
+            "volume": self.engine.volume,
+            "muted": not self.engine.sound_enabled,
+        }
+        stats["control"] = {"requests": self.requests, "errors": self.errors}
+        return json.dumps(stats).encode("utf-8")
+
+    def _press(self, payload):
+        return b"\x01" if self.engine.press(payload.decode("utf-8")) else b"\x00"
+
+    def stop(self, timeout=1.0):
+        """Stop serving and remove the socket file."""
+        self._running = False
+        if self.is_alive():
+            self.join(timeout)
+
+
+class ControlClient:
+    """Blocking client for a ControlServer."""
+
+    def __init__(self, path=None, timeout=5.0):
+        check_supported()
+        self.path = path or default_socket_path()
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        self._socket.connect(self.path)
+
+    def _recv_exactly(self, size):
+        data = bytearray()
+        while len(data) < size:
+            chunk = self._socket.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("KeyAura closed the control connection")
+            data += chunk
+        return bytes(data)
+
+    def request(self, opcode, payload=b""):
+        """Send one request. Returns the response payload, raising RuntimeError on failure."""
+        self._socket.sendall(encode_request(opcode, payload))
+        status, _, length = HEADER.unpack(self._recv_exactly(HEADER.size))
+        body = self._recv_exactly(length) if length else b""
+        if status != STATUS_OK:
+            raise RuntimeError(body.decode("utf-8", "replace"))
+        return body
+
+    def ping(self, payload=b""):
+        return self.request(OP_PING, payload)
+
+    def use_template(self, name):
+        self.request(OP_USE_TEMPLATE, name.encode("utf-8"))
+
+    def set_volume(self, volume):
+        self.request(OP_SET_VOLUME, VOLUME.pack(volume))
+
+    def mute(self, mode=MUTE_TOGGLE):
+        """Set or toggle mute. Returns True if sound is now muted."""
+        return self.request(OP_MUTE, bytes([mode]))[0] == MUTE_ON
+
+    def stats(self):
+        return json.loads(self.request(OP_STATS).decode("utf-8"))
+
+    def press(self, key):
+        return self.request(OP_PRESS, key.encode("utf-8")) == b"\x01"
+
+    def close(self):
+        self._socket.close()
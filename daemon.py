@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+KeyAura Daemon
+Plays template sounds for real typing in any application, with no KeyAura
+window open. Key events come from an input backend (see input_backends.py)
+and go straight to the engine's audio thread. A control socket (see
+control_socket.py and keyaura_ctl.py) switches templates, volume and mute
+while it runs.
+
+Usage:
+    python daemon.py [--backend evdev|tk|replay] [--template NAME] [--device PATH] [--replay FILE] [--speed 1.0]
+                     [--socket PATH | --no-socket]
+"""
+
+import argparse
+import signal
+import sys
+import time
+
+from control_socket import UNIX_SOCKETS, ControlServer
+from engine import KeyAuraEngine
+from input_backends import BACKEND_EVDEV, BACKEND_REPLAY, backend_names, create_backend
+
+DRAIN_TIMEOUT = 2.0
+
+
+class KeyAuraDaemon:
+    """Connects an input backend to a KeyAuraEngine."""
+
+    def __init__(self, engine, backend):
+        self.engine = engine
+        self.backend = backend
+        self.events = 0
+        self.played = 0
+
+    def on_event(self, event):
+        """Play key-down events. Called on the backend's thread."""
+        self.events += 1
+        if event.down and self.engine.press(event.key):
+            self.played += 1
+
+    def run(self):
+        """Feed events to the engine until the backend stops."""
+        try:
+            self.backend.run(self.on_event)
+        finally:
+            self.drain()
+
+    def drain(self, timeout=DRAIN_TIMEOUT):
+        """Wait for queued key sounds to reach the mixer."""
+        deadline = time.perf_counter() + timeout
+        while self.engine.audio_dispatcher.stats()["pending"] and time.perf_counter() < deadline:
+            time.sleep(0.01)
+
+    def stop(self, *args):
+        self.backend.stop()
+
+
+def main(argv=None):
+    """Parse arguments, load a template and run until interrupted."""
+    parser = argparse.ArgumentParser(description="Play KeyAura sounds for system-wide typing.")
+    parser.add_argument("--backend", choices=backend_names(), default=BACKEND_EVDEV,
+                        help="where key events come from (default: evdev)")
+    parser.add_argument("--template", help="template to play (default: the first one by name)")
+    parser.add_argument("--device", action="append",
+                        help="evdev device to read (repeatable, default: all keyboards)")
+    parser.add_argument("--replay", help="event file for the replay backend")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="replay speed factor, 0 for as fast as possible")
+    parser.add_argument("--socket", help="control socket path (default: per-user runtime dir)")
+    parser.add_argument("--no-socket", action="store_true", help="do not open a control socket")
+    args = parser.parse_args(argv)
+
+    if args.backend == BACKEND_REPLAY and not args.replay:
+        parser.error("--backend replay needs --replay FILE")
+
+    engine = KeyAuraEngine()
+    control = None
+    try:
+        template_name = args.template or next(iter(sorted(engine.templates)), None)
+        if template_name is None:
+            print("No templates found; create one in the KeyAura window first.")
+            return 1
+        if engine.use_template(template_name) is None:
+            print(f"Unknown template: {template_name}")
+            return 1
+        print(f"Playing template '{template_name}' with the {args.backend} backend")
+
+        daemon = KeyAuraDaemon(engine, create_backend(args.backend, args.device, args.replay, args.speed))
+        signal.signal(signal.SIGINT, daemon.stop)
+        signal.signal(signal.SIGTERM, daemon.stop)
+        if not args.no_socket and not UNIX_SOCKETS:
+            print("No control socket: this platform has no Unix domain sockets")
+        elif not args.no_socket:
+            try:
+                server = ControlServer(engine, args.socket)
+                server.start()
+            except (OSError, RuntimeError) as e:
+                print(f"Cannot open control socket: {e}")
+                return 1
+            control = server
+            print(f"Control socket: {control.path}")
+        try:
+            daemon.run()
+        except (OSError, RuntimeError) as e:
+            print(f"Error reading key events: {e}")
+            return 1
+        print(f"Stopped after {daemon.events} key events ({daemon.played} sounds played)")
+    finally:
+        if control is not None:
+            control.stop()
+        engine.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
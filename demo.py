@@ -1,7 +1,9 @@
 import json
 import os
 import time
-from main import KeyAura
+from engine import KeyAuraEngine
+
+DEMO_KEYS = "QWERTYUIOPASDFGHJKLZXCVBNM"
 
 def create_demo_template():
     """Create a demo template with sample data."""
@@ -29,7 +31,7 @@ def create_demo_template():
     
     print("✅ Demo template created successfully!")
 
-def demo_keyboard_interaction(app):
+def demo_keyboard_interaction(engine):
     """Demonstrate keyboard interaction."""
     print("\n🎹 Demo: Keyboard Interaction")
     print("=" * 40)
@@ -38,10 +40,10 @@ def demo_keyboard_interaction(app):
     demo_keys = ["A", "S", "D", "F", "G"]
     for key in demo_keys:
         print(f"Playing sound for key: {key}")
-        app.play_key_sound(key)
+        engine.press(key)
         time.sleep(0.5)  # Wait between key presses
 
-def demo_template_management(app):
+def demo_template_management(engine):
     """Demonstrate template management."""
     print("\n📁 Demo: Template Management")
     print("=" * 40)
@@ -50,26 +52,26 @@ def demo_template_management(app):
     create_demo_template()
     
     # Load templates
-    app.load_templates()
-    print(f"Loaded {len(app.templates)} templates")
+    engine.load_templates()
+    print(f"Loaded {len(engine.templates)} templates")
     
     # List available templates
-    for template_name in app.templates.keys():
+    for template_name in engine.templates.keys():
         print(f"  - {template_name}")
 
-def demo_sound_customization(app):
+def demo_sound_customization(engine):
     """Demonstrate sound customization."""
     print("\n🔊 Demo: Sound Customization")
     print("=" * 40)
     
     # Set a demo sound for key 'A'
     demo_sound_path = "sounds/demo_sound.mp3"
-    app.key_sounds["A"] = demo_sound_path
+    engine.key_sounds["A"] = demo_sound_path
     print(f"Set sound for key 'A': {demo_sound_path}")
     
     # Apply sound to all keys
-    for key in app.key_buttons.keys():
-        app.key_sounds[key] = demo_sound_path
+    for key in DEMO_KEYS:
+        engine.key_sounds[key] = demo_sound_path
     print("Applied demo sound to all keys")
 
 def main():
@@ -77,14 +79,17 @@ def main():
     print("🎹 KeyAura Demo")
     print("=" * 50)
     
-    # Create and configure the application
-    print("Initializing KeyAura...")
-    app = KeyAura()
+    # The engine runs without the GUI, so the demo needs no window
+    print("Initializing KeyAura engine...")
+    engine = KeyAuraEngine()
     
     # Demo different features
-    demo_sound_customization(app)
-    demo_template_management(app)
-    demo_keyboard_interaction(app)
+    try:
+        demo_sound_customization(engine)
+        demo_template_management(engine)
+        demo_keyboard_interaction(engine)
+    finally:
+        engine.close()
     
     print("\n✅ Demo completed!")
     print("\nTo run the full application:")
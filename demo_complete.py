@@ -7,9 +7,13 @@ This script demonstrates all features including the new additional keys and impr
 import json
 import os
 import time
-from main import KeyAura
+from engine import KeyAuraEngine
+from key_model import KeySet
+from keyboard_layouts import DEFAULT_LAYOUT, layout_keys
 
-def demo_complete_keyboard(app):
+KEYBOARD_KEYS = [spec.key for spec in layout_keys(DEFAULT_LAYOUT)]
+
+def demo_complete_keyboard():
     """Demonstrate the complete keyboard with all keys."""
     print("\n⌨️ Demo: Complete Virtual Keyboard")
     print("=" * 50)
@@ -31,11 +35,10 @@ def demo_complete_keyboard(app):
     print("   - Visual feedback: Green highlighting")
     
     # Show all available keys
-    all_keys = list(app.key_buttons.keys())
-    print(f"\n📝 Total keys available: {len(all_keys)}")
-    print(f"   Keys: {', '.join(all_keys)}")
+    print(f"\n📝 Total keys available: {len(KEYBOARD_KEYS)}")
+    print(f"   Keys: {', '.join(KEYBOARD_KEYS)}")
 
-def demo_enhanced_layout(app):
+def demo_enhanced_layout():
     """Demonstrate the enhanced responsive layout."""
     print("\n📐 Demo: Enhanced Responsive Layout")
     print("=" * 50)
@@ -55,7 +58,7 @@ def demo_enhanced_layout(app):
     print("   - Consistent button sizing")
     print("   - Professional visual hierarchy")
 
-def demo_multi_key_selection_enhanced(app):
+def demo_multi_key_selection_enhanced(selected_keys):
     """Demonstrate enhanced multi-key selection with new keys."""
     print("\n🎯 Demo: Enhanced Multi-Key Selection")
     print("=" * 50)
@@ -75,21 +78,16 @@ def demo_multi_key_selection_enhanced(app):
     print("   - Clear sounds from selected group")
     
     # Demo with mixed key types
-    demo_keys = ["A", "Space", "Enter", "Shift"]
+    demo_keys = ["A", "Space", "Enter", "LShift"]
     print(f"\n📝 Demo: Selecting mixed key types {', '.join(demo_keys)}")
     
     for key in demo_keys:
-        if key in app.key_buttons:
-            app.selected_keys.add(key)
-            app.key_buttons[key].configure(
-                fg_color="#00ff88",
-                border_color="#00ff88"
-            )
-    
-    app.update_selected_keys_display()
-    print(f"✅ Selected keys: {', '.join(sorted(app.selected_keys))}")
+        if key in KEYBOARD_KEYS:
+            selected_keys.add(key)
+    
+    print(f"✅ Selected keys: {', '.join(selected_keys)}")
 
-def demo_sound_customization_complete(app):
+def demo_sound_customization_complete(engine):
     """Demonstrate complete sound customization features."""
     print("\n🔊 Demo: Complete Sound Customization")
     print("=" * 50)
@@ -114,15 +112,15 @@ def demo_sound_customization_complete(app):
         "A": "sounds/mechanical_click.mp3",
         "Space": "sounds/space_bar.mp3",
         "Enter": "sounds/enter_key.mp3",
-        "Shift": "sounds/shift_key.mp3"
+        "LShift": "sounds/shift_key.mp3"
     }
     
     for key, sound_path in demo_sounds.items():
-        if key in app.key_buttons:
-            app.key_sounds[key] = sound_path
+        if key in KEYBOARD_KEYS:
+            engine.key_sounds[key] = sound_path
             print(f"   - Key '{key}': {sound_path}")
 
-def demo_template_management_complete(app):
+def demo_template_management_complete(engine):
     """Demonstrate complete template management."""
     print("\n📁 Demo: Complete Template Management")
     print("=" * 50)
@@ -132,7 +130,7 @@ def demo_template_management_complete(app):
         {
             "name": "Complete Mechanical",
             "description": "All keys with mechanical sounds",
-            "key_sounds": {key: "sounds/mechanical_click.mp3" for key in app.key_buttons.keys()}
+            "key_sounds": {key: "sounds/mechanical_click.mp3" for key in KEYBOARD_KEYS}
         },
         {
             "name": "Mixed Sound Zones",
@@ -141,13 +139,13 @@ def demo_template_management_complete(app):
                 **{key: "sounds/mechanical_click.mp3" for key in "QWERTYUIOPASDFGHJKLZXCVBNM"},
                 **{key: "sounds/space_bar.mp3" for key in ["Space"]},
                 **{key: "sounds/enter_key.mp3" for key in ["Enter"]},
-                **{key: "sounds/shift_key.mp3" for key in ["Shift", "Ctrl"]}
+                **{key: "sounds/shift_key.mp3" for key in ["LShift", "RShift", "LCtrl", "RCtrl"]}
             }
         },
         {
             "name": "Electronic Vibes",
             "description": "Electronic sounds for all keys",
-            "key_sounds": {key: "sounds/electronic_beep.mp3" for key in app.key_buttons.keys()}
+            "key_sounds": {key: "sounds/electronic_beep.mp3" for key in KEYBOARD_KEYS}
         }
     ]
     
@@ -159,14 +157,17 @@ def demo_template_management_complete(app):
             "created": time.strftime("%Y-%m-%d %H:%M:%S")
         }
         
-        template_file = os.path.join(app.template_dir, f"{template['name']}.json")
+        template_file = os.path.join(engine.template_dir, f"{template['name']}.json")
         with open(template_file, 'w') as f:
             json.dump(template_data, f, indent=2)
         
         print(f"✅ Created template: {template['name']}")
         print(f"   Description: {template['description']}")
+    
+    engine.load_templates()
+    print(f"📋 {len(engine.templates)} templates available")
 
-def demo_workflow_complete(app):
+def demo_workflow_complete(engine, selected_keys):
     """Demonstrate a complete workflow with all features."""
     print("\n🎹 Demo: Complete Workflow")
     print("=" * 50)
@@ -181,30 +182,25 @@ def demo_workflow_complete(app):
     print("7. Load different templates to switch sounds")
     
     # Simulate the complete workflow
-    workflow_keys = ["A", "Space", "Enter", "Shift"]
+    workflow_keys = ["A", "Space", "Enter", "LShift"]
     print(f"\n📝 Simulating complete workflow with keys: {', '.join(workflow_keys)}")
     
     # Select the keys
+    selected_keys.clear()
     for key in workflow_keys:
-        if key in app.key_buttons:
-            app.selected_keys.add(key)
-            app.key_buttons[key].configure(
-                fg_color="#00ff88",
-                border_color="#00ff88"
-            )
+        if key in KEYBOARD_KEYS:
+            selected_keys.add(key)
     
-    app.update_selected_keys_display()
-    print(f"✅ Selected keys: {', '.join(sorted(app.selected_keys))}")
+    print(f"✅ Selected keys: {', '.join(selected_keys)}")
     
     # Apply a demo sound
     demo_sound = "sounds/complete_workflow.mp3"
-    for key in workflow_keys:
-        if key in app.key_buttons:
-            app.key_sounds[key] = demo_sound
+    for key in selected_keys:
+        engine.key_sounds[key] = demo_sound
     
     print(f"✅ Applied sound '{demo_sound}' to selected keys")
 
-def demo_ui_enhancements(app):
+def demo_ui_enhancements():
     """Demonstrate UI enhancements and improvements."""
     print("\n✨ Demo: UI Enhancements")
     print("=" * 50)
@@ -236,18 +232,22 @@ def main():
     print("• Professional template management")
     print("=" * 70)
     
-    # Create and configure the application
-    print("\n🚀 Initializing KeyAura with complete features...")
-    app = KeyAura()
+    # The engine runs without the GUI, so the demo needs no window
+    print("\n🚀 Initializing KeyAura engine...")
+    engine = KeyAuraEngine()
+    selected_keys = KeySet()
     
     # Demo all enhanced features
-    demo_complete_keyboard(app)
-    demo_enhanced_layout(app)
-    demo_multi_key_selection_enhanced(app)
-    demo_sound_customization_complete(app)
-    demo_template_management_complete(app)
-    demo_workflow_complete(app)
-    demo_ui_enhancements(app)
+    try:
+        demo_complete_keyboard()
+        demo_enhanced_layout()
+        demo_multi_key_selection_enhanced(selected_keys)
+        demo_sound_customization_complete(engine)
+        demo_template_management_complete(engine)
+        demo_workflow_complete(engine, selected_keys)
+        demo_ui_enhancements()
+    finally:
+        engine.close()
     
     print("\n" + "=" * 70)
     print("✅ Complete Demo finished!")
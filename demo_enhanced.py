@@ -7,9 +7,13 @@ This script demonstrates the new Ctrl+Click multi-key selection and advanced fea
 import json
 import os
 import time
-from main import KeyAura
+from engine import KeyAuraEngine
+from key_model import KeySet
+from keyboard_layouts import DEFAULT_LAYOUT, layout_keys
 
-def demo_multi_key_selection(app):
+KEYBOARD_KEYS = [spec.key for spec in layout_keys(DEFAULT_LAYOUT)]
+
+def demo_multi_key_selection(selected_keys):
     """Demonstrate the new Ctrl+Click multi-key selection feature."""
     print("\n🎯 Demo: Multi-Key Selection (Ctrl+Click)")
     print("=" * 50)
@@ -33,17 +37,11 @@ def demo_multi_key_selection(app):
     print(f"\n📝 Demo: Selecting keys {', '.join(demo_keys)}")
     
     for key in demo_keys:
-        app.selected_keys.add(key)
-        if key in app.key_buttons:
-            app.key_buttons[key].configure(
-                fg_color="#00ff88",
-                border_color="#00ff88"
-            )
-    
-    app.update_selected_keys_display()
-    print(f"✅ Selected keys: {', '.join(sorted(app.selected_keys))}")
+        selected_keys.add(key)
+    
+    print(f"✅ Selected keys: {', '.join(selected_keys)}")
 
-def demo_enhanced_sound_customization(app):
+def demo_enhanced_sound_customization(engine):
     """Demonstrate enhanced sound customization features."""
     print("\n🔊 Demo: Enhanced Sound Customization")
     print("=" * 50)
@@ -69,10 +67,10 @@ def demo_enhanced_sound_customization(app):
     }
     
     for key, sound_path in demo_sounds.items():
-        app.key_sounds[key] = sound_path
+        engine.key_sounds[key] = sound_path
         print(f"   - Key '{key}': {sound_path}")
 
-def demo_visual_feedback(app):
+def demo_visual_feedback():
     """Demonstrate visual feedback and animations."""
     print("\n✨ Demo: Visual Feedback & Animations")
     print("=" * 50)
@@ -92,7 +90,7 @@ def demo_visual_feedback(app):
     print("   - Sound toggle button changes icon")
     print("   - Volume slider provides immediate feedback")
 
-def demo_template_management_enhanced(app):
+def demo_template_management_enhanced(engine):
     """Demonstrate enhanced template management."""
     print("\n📁 Demo: Enhanced Template Management")
     print("=" * 50)
@@ -102,17 +100,17 @@ def demo_template_management_enhanced(app):
         {
             "name": "Mechanical Vibes",
             "description": "Classic mechanical keyboard sounds",
-            "key_sounds": {key: "sounds/mechanical_click.mp3" for key in app.key_buttons.keys()}
+            "key_sounds": {key: "sounds/mechanical_click.mp3" for key in KEYBOARD_KEYS}
         },
         {
             "name": "Electronic Beeps",
             "description": "Digital electronic sound effects",
-            "key_sounds": {key: "sounds/electronic_beep.mp3" for key in app.key_buttons.keys()}
+            "key_sounds": {key: "sounds/electronic_beep.mp3" for key in KEYBOARD_KEYS}
         },
         {
             "name": "Nature Sounds",
             "description": "Relaxing nature-inspired sounds",
-            "key_sounds": {key: "sounds/nature_drop.mp3" for key in app.key_buttons.keys()}
+            "key_sounds": {key: "sounds/nature_drop.mp3" for key in KEYBOARD_KEYS}
         }
     ]
     
@@ -124,14 +122,17 @@ def demo_template_management_enhanced(app):
             "created": time.strftime("%Y-%m-%d %H:%M:%S")
         }
         
-        template_file = os.path.join(app.template_dir, f"{template['name']}.json")
+        template_file = os.path.join(engine.template_dir, f"{template['name']}.json")
         with open(template_file, 'w') as f:
             json.dump(template_data, f, indent=2)
         
         print(f"✅ Created template: {template['name']}")
         print(f"   Description: {template['description']}")
+    
+    engine.load_templates()
+    print(f"📋 {len(engine.templates)} templates available")
 
-def demo_workflow_example(app):
+def demo_workflow_example(engine, selected_keys):
     """Demonstrate a complete workflow example."""
     print("\n🎹 Demo: Complete Workflow Example")
     print("=" * 50)
@@ -150,21 +151,16 @@ def demo_workflow_example(app):
     print(f"\n📝 Simulating workflow with keys: {', '.join(workflow_keys)}")
     
     # Select the keys
+    selected_keys.clear()
     for key in workflow_keys:
-        app.selected_keys.add(key)
-        if key in app.key_buttons:
-            app.key_buttons[key].configure(
-                fg_color="#00ff88",
-                border_color="#00ff88"
-            )
+        selected_keys.add(key)
     
-    app.update_selected_keys_display()
-    print(f"✅ Selected keys: {', '.join(sorted(app.selected_keys))}")
+    print(f"✅ Selected keys: {', '.join(selected_keys)}")
     
     # Apply a demo sound
     demo_sound = "sounds/workflow_demo.mp3"
-    for key in workflow_keys:
-        app.key_sounds[key] = demo_sound
+    for key in selected_keys:
+        engine.key_sounds[key] = demo_sound
     
     print(f"✅ Applied sound '{demo_sound}' to selected keys")
 
@@ -176,16 +172,20 @@ def main():
     print("and enhanced sound customization features.")
     print("=" * 60)
     
-    # Create and configure the application
-    print("\n🚀 Initializing KeyAura with enhanced features...")
-    app = KeyAura()
+    # The engine runs without the GUI, so the demo needs no window
+    print("\n🚀 Initializing KeyAura engine...")
+    engine = KeyAuraEngine()
+    selected_keys = KeySet()
     
     # Demo different enhanced features
-    demo_multi_key_selection(app)
-    demo_enhanced_sound_customization(app)
-    demo_visual_feedback(app)
-    demo_template_management_enhanced(app)
-    demo_workflow_example(app)
+    try:
+        demo_multi_key_selection(selected_keys)
+        demo_enhanced_sound_customization(engine)
+        demo_visual_feedback()
+        demo_template_management_enhanced(engine)
+        demo_workflow_example(engine, selected_keys)
+    finally:
+        engine.close()
     
     print("\n" + "=" * 60)
     print("✅ Enhanced Demo completed!")
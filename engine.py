@@ -0,0 +1,538 @@
+"""
+KeyAura Engine
+The UI-free core of KeyAura: mixer setup, key to sound mapping, templates and
+playback. Both GUIs, the demos, the benchmark and the launcher drive this
+class, so importing it never pulls in a GUI toolkit.
+"""
+
+import json
+import os
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from app_config import audio_settings, load_config
+from audio_thread import AudioDispatcher
+from error_reporting import ErrorReporter
+from key_model import KEY_ID_COUNT, KeySoundTable, key_id, key_name
+from loudness import LoudnessAnalyzer, normalization_gains
+from mixer_config import PROFILE_AUTO, PROFILE_CUSTOM, apply_profile, init_mixer, probe_buffer_size
+from mixer_engine import create_voice_engine
+from onset import analyze_onsets
+from sound_bank import bank_path_for
+from sound_cache import SoundCache
+from template_catalog import TemplateCatalog
+from template_loader import TemplateLoad, sound_priorities
+from transcode import PcmTranscoder
+from variations import SoundVariations
+
+DEFAULT_VOLUME = 0.7
+
+
+class KeyAuraEngine:
+    """Owns the mixer, the key sounds and the templates of one KeyAura session.
+
+    Front ends hook in through two optional callbacks: on_error(message) is
+    called from the audio or loader thread when sounds cannot be played,
+    at most once every few seconds (see ErrorReporter), and
+    confirm(title, message) is asked before optional work that costs a lot
+    of memory. Without them errors are printed and the work goes ahead, so
+    the engine runs unattended.
+
+    Callables in self.listeners receive every engine event as a dict with a
+    "type" of "played", "error" or "template". They run on the thread that
+    caused the event, often the audio thread, so they must return quickly.
+    Templates load in the background (see load_template), so confirm may
+    also be called from a loader thread.
+    """
+
+    def __init__(self, config=None, template_dir="templates", sounds_dir="sounds",
+                 on_error=None, confirm=None):
+        self.config = load_config() if config is None else config
+        settings = audio_settings(self.config)
+        self.audio_settings = apply_profile(settings, settings.get("profile", PROFILE_CUSTOM))
+        self.on_error = on_error
+        self.confirm = confirm
+        self.listeners = []
+        self.errors = ErrorReporter(self._deliver_error)
+
+        # Initialize pygame mixer and the playback engine from config.json
+        self.probe_results = None
+        self.init_audio()
+
+        # Playback runs on its own thread; callers only enqueue keys
+        self.audio_dispatcher = AudioDispatcher(self.dispatch_key_sound, realtime=True)
+        self.audio_dispatcher.start()
+
+        # Session state
+        self.sound_enabled = True
+        self.current_template = None
+        self.template_data = None
+        self.key_sounds = KeySoundTable()
+        self.template_dir = template_dir
+        self.sounds_dir = sounds_dir
+        self.volume = DEFAULT_VOLUME
+        self.voices.set_volume(self.volume)
+        self.press_counts = array('L', [0]) * KEY_ID_COUNT
+
+        # Create directories if they don't exist
+        os.makedirs(self.template_dir, exist_ok=True)
+        os.makedirs(self.sounds_dir, exist_ok=True)
+
+        # Imported sounds are transcoded once to mixer-native PCM, and decoded
+        # sounds are cached so key presses never reload files from disk
+        self.transcoder = PcmTranscoder(os.path.join(self.sounds_dir, ".cache"))
+        self.sound_cache = SoundCache(int(self.audio_settings["cache_max_mb"] * 1024 * 1024),
+                                      loader=self.transcoder.load_sound)
+
+        # Template sounds decode on this pool; keys whose sound is still
+        # loading stay silent rather than decoding on the audio thread
+        self.decode_pool = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1),
+                                              thread_name_prefix="KeyAuraDecode")
+        self.template_load = None
+        self.loading_sounds = set()
+        # Held while the current template's state is switched or, by a
+        # finishing load, updated, so a load never writes into another template
+        self._template_lock = threading.Lock()
+
+        # Optional per-template pitch/gain variations, rendered ahead of time
+        self.variation_settings = None
+        self.sound_variants = {}
+
+        # Leading silence skipped and loudness gain per sound path (ms / dB)
+        self.sound_trims = {}
+        self.sound_gains = {}
+        try:
+            self.loudness = LoudnessAnalyzer(self.transcoder)
+        except RuntimeError as e:
+            print(f"Loudness normalization disabled: {e}")
+            self.loudness = None
+
+        # Template names, layouts and dates come from an index of the
+        # templates directory; key sounds are read when a template is used
+        self.catalog = TemplateCatalog(self.template_dir)
+        self.templates = self.catalog.entries
+        self.load_templates()
+
+    def init_audio(self):
+        """Initialize pygame.mixer and the playback engine from self.audio_settings."""
+        if self.audio_settings["profile"] == PROFILE_AUTO:
+            buffer_size, self.probe_results = probe_buffer_size(self.audio_settings)
+            self.audio_settings["buffer_size"] = buffer_size
+            for size, underruns in self.probe_results:
+                print(f"Mixer probe: buffer {size} -> {underruns} underruns")
+        else:
+            init_mixer(self.audio_settings)
+        self.voices = create_voice_engine(self.audio_settings)
+
+    def set_mixer_profile(self, profile):
+        """Re-initialize the mixer with a latency profile without restarting.
+
+        If the profile cannot be applied the mixer falls back to the custom
+        settings from config.json and the original error is raised.
+        """
+        error = None
+
+        # Hold the audio thread while the mixer and its sounds are replaced
+        with self.audio_dispatcher.lock:
+            self.voices.close()
+            self.sound_cache.clear()
+            self.audio_settings = apply_profile(audio_settings(self.config), profile)
+            try:
+                self.init_audio()
+            except Exception as e:
+                error = e
+                self.audio_settings = apply_profile(audio_settings(self.config), PROFILE_CUSTOM)
+                self.init_audio()
+            self.voices.set_volume(self.volume)
+            self.sound_cache.warm(self.key_sounds.values())
+            self.load_sound_variations(self.variation_settings, confirm=False)
+
+        if error is not None:
+            print(f"Error applying mixer profile {profile}: {error}")
+            raise error
+        print(f"Mixer profile {profile}: buffer {self.audio_settings['buffer_size']} frames")
+
+    def set_volume(self, value):
+        self.volume = float(value)
+        self.voices.set_volume(self.volume)
+
+    def press(self, key, gain=1.0, queued_at=None):
+        """Queue the sound of key (a name or key ID) for playback. Returns True if one was queued.
+
+        gain scales this press only (e.g. a quieter auto-repeat). queued_at is
+        the perf_counter() time the input arrived, if earlier than now.
+        """
+        key = key_id(key)
+        if key is None or not self.sound_enabled or not self.key_sounds.handles[key]:
+            return False
+        self.press_counts[key] += 1
+        self.audio_dispatcher.submit(key, gain, queued_at)
+        return True
+
+    def dispatch_key_sound(self, key, queued_at, gain=1.0):
+        """Play the sound of a queued key ID. Runs on the audio thread."""
+        sound_path = self.key_sounds.sound_at(key)
+        if not sound_path or sound_path in self.loading_sounds:
+            return
+        # Sounds that failed to load stay silent until their file changes
+        if self.sound_cache.failed(sound_path):
+            return
+        try:
+            # Overlapping presses mix on separate voices
+            variants = self.sound_variants.get(sound_path)
+            sound = variants.next() if variants else self.sound_cache.get(sound_path)
+            self.voices.play(key, sound, gain=self.key_sounds.gains[key] * gain)
+        except Exception as e:
+            self.errors.report(f"Could not play sound for key {key_name(key)}: {e}", key_name(key))
+            return
+        if self.listeners:
+            self.emit("played", key=key_name(key), latency_ms=(time.perf_counter() - queued_at) * 1000)
+
+    def _deliver_error(self, message, key, held):
+        """Pass an error from the rate-limited channel to the front end and listeners."""
+        if held:
+            message = f"{message} (and {held} more errors)"
+        if self.on_error is not None:
+            self.on_error(message)
+        self.emit("error", key=key, message=message, held=held)
+
+    def unplayable_sounds(self, paths=None, key_sounds=None):
+        """Return {path: (error, key names)} for assigned sounds that failed to load.
+
+        paths limits the check to those sound paths; key_sounds defaults to
+        the current key sounds.
+        """
+        broken = {}
+        for key, path in (self.key_sounds if key_sounds is None else key_sounds).items():
+            if paths is not None and path not in paths:
+                continue
+            error = self.sound_cache.failure(path)
+            if error is not None:
+                broken.setdefault(path, (error, []))[1].append(key)
+        return broken
+
+    def report_unplayable_sounds(self, source, paths=None, key_sounds=None):
+        """Report every assigned sound that failed to load as a single error."""
+        broken = self.unplayable_sounds(paths, key_sounds)
+        if not broken:
+            return broken
+        keys = [key for _, keys in broken.values() for key in keys]
+        details = "; ".join(f"{os.path.basename(path)}: {error}" for path, (error, _) in list(broken.items())[:3])
+        if len(broken) > 3:
+            details += f"; {len(broken) - 3} more"
+        self.errors.report(f"{len(broken)} sound(s) in {source} could not be loaded, so "
+                           f"{len(keys)} key(s) stay silent ({details})")
+        return broken
+
+    def emit(self, event_type, **details):
+        """Send an event to every listener."""
+        if not self.listeners:
+            return
+        event = dict(details, type=event_type)
+        for listener in list(self.listeners):
+            try:
+                listener(event)
+            except Exception as e:
+                print(f"Error in engine listener: {e}")
+
+    def preview_sound(self, sound_path):
+        """Play a sound file once, outside any key's voice limit."""
+        sound = self.sound_cache.load(sound_path)
+        self.voices.play(None, sound)
+
+    def assign_sound(self, keys, sound_path):
+        """Map every key in keys to sound_path and prepare it for playback."""
+        for key in keys:
+            self.key_sounds[key] = sound_path
+        self.trim_leading_silence([sound_path])
+        self.normalize_loudness()
+        self.sound_cache.warm(self.key_sounds.values())
+        self.report_unplayable_sounds("the assigned sounds", {sound_path})
+
+    def set_key_gain(self, keys, gain):
+        """Set the linear playback gain of every key in keys."""
+        for key in keys:
+            self.key_sounds.set_gain(key, gain)
+
+    def clear_sounds(self, keys):
+        """Remove the sounds of keys. Returns how many keys had one."""
+        cleared = 0
+        for key in keys:
+            if key in self.key_sounds:
+                del self.key_sounds[key]
+                cleared += 1
+        return cleared
+
+    def analyze_leading_silence(self, paths, sound_trims):
+        """Return {path: ms} of leading silence for the paths not in sound_trims yet.
+
+        Only analyzes; nothing is applied, so it is safe on a loader thread.
+        """
+        if not self.audio_settings.get("trim_leading_silence"):
+            return {}
+        unanalyzed = [path for path in dict.fromkeys(paths) if path and path not in sound_trims]
+        return analyze_onsets(self.transcoder, unanalyzed, self.audio_settings["onset_threshold_db"])
+
+    def _apply_trims(self, paths, analyzed, key_sounds):
+        for path in dict.fromkeys(paths):
+            if path and self.transcoder.set_trim(path, self.sound_trims.get(path)):
+                self.sound_cache.invalidate(path)
+
+        for key, path in sorted(key_sounds.items()):
+            if path in analyzed and analyzed[path]:
+                print(f"Trimmed {analyzed[path]:.1f} ms of leading silence from key {key}")
+
+    def trim_leading_silence(self, paths):
+        """Detect and apply leading-silence trims. Returns the newly analyzed {path: ms}."""
+        if not self.audio_settings.get("trim_leading_silence"):
+            return {}
+
+        analyzed = self.analyze_leading_silence(paths, self.sound_trims)
+        self.sound_trims.update(analyzed)
+        self._apply_trims(paths, analyzed, self.key_sounds)
+        return analyzed
+
+    def analyze_loudness(self, paths):
+        """Return normalization {path: gain_db} for paths, or None if normalization is off.
+
+        Only analyzes; nothing is applied, so it is safe on a loader thread.
+        """
+        if not self.audio_settings.get("normalize_loudness") or self.loudness is None:
+            return None
+        return normalization_gains(self.loudness.analyze(paths))
+
+    def _apply_gains(self, paths):
+        for path in dict.fromkeys(paths):
+            if path and self.transcoder.set_gain(path, self.sound_gains.get(path)):
+                self.sound_cache.invalidate(path)
+
+    def normalize_loudness(self):
+        """Derive per-sound gains for the current key sounds.
+
+        Returns the {path: gain_db} in use, or None if normalization is off.
+        """
+        gains = self.analyze_loudness(self.key_sounds.values())
+        if gains is None:
+            return None
+        self.sound_gains = gains
+        self._apply_gains(self.key_sounds.values())
+        return self.sound_gains
+
+    def render_sound_variations(self, settings, paths, confirm=True):
+        """Render pitch/gain variations of paths. Returns {path: VariantPicker}, empty if none."""
+        if not settings or not settings.get("count"):
+            return {}
+
+        try:
+            variations = SoundVariations(self.transcoder, settings)
+        except RuntimeError as e:
+            print(f"Sound variations disabled: {e}")
+            return {}
+
+        paths = [path for path in dict.fromkeys(paths) if path]
+        if confirm and self.confirm is not None:
+            estimate_mb = variations.estimate_bytes(paths) / (1024 * 1024)
+            if not self.confirm(
+                "Sound Variations",
+                f"Generate {variations.settings['count']} variations for {len(paths)} sounds?\n"
+                f"Estimated memory: {estimate_mb:.1f} MB"
+            ):
+                return {}
+
+        return variations.load_all(paths)
+
+    def load_sound_variations(self, settings, confirm=True):
+        """Render and load pitch/gain variations for the current key sounds."""
+        self.variation_settings = settings
+        self.sound_variants = {}
+        self.sound_variants = self.render_sound_variations(settings, self.key_sounds.values(), confirm)
+
+    def trimmed_keys_ms(self):
+        """Return the leading silence removed from each trimmed key, in ms."""
+        return [self.sound_trims[path] for path in self.key_sounds.values() if self.sound_trims.get(path)]
+
+    def template_path(self, template_name):
+        """Return the JSON file of a template."""
+        return self.catalog.file_path(template_name) or os.path.join(self.template_dir, f"{template_name}.json")
+
+    def load_templates(self):
+        """Re-index the templates directory, parsing only new or changed files."""
+        self.catalog.refresh()
+
+    def save_template(self, template_name, layout="100%"):
+        """Save the current key sounds as a template and return its data."""
+        template_data = {
+            "name": template_name,
+            "key_sounds": self.key_sounds.copy(),
+            "layout": layout,
+            "created": time.strftime("%Y-%m-%d %H:%M:%S")
+        }
+        key_gains = self.key_sounds.key_gains()
+        if key_gains:
+            template_data["key_gains"] = key_gains
+        if self.variation_settings:
+            template_data["variations"] = self.variation_settings
+        template_data["sound_trims"] = self.template_sound_trims()
+        template_data["sound_gains"] = dict(self.sound_gains)
+
+        self.save_template_file(template_data)
+        return template_data
+
+    def save_template_file(self, template_data):
+        """Write a template's JSON file and index it."""
+        template_file = self.template_path(template_data['name'])
+        with open(template_file, 'w') as f:
+            json.dump(template_data, f, indent=2)
+        self.catalog.add(template_data, template_file)
+
+    def use_template(self, template_name):
+        """Make a template current and wait for its sounds. Returns its data, or None if unknown."""
+        load = self.load_template(template_name)
+        if load is None:
+            return None
+        load.wait()
+        return load.template_data
+
+    def load_template(self, template_name, on_progress=None, on_done=None):
+        """Start making a template current. Returns its TemplateLoad, or None if unknown.
+
+        The key sounds switch at once and the sounds load in the background,
+        most-used first; on_progress(loaded, total) and on_done(template_data)
+        are called from the loader thread. A load still running for another
+        template is cancelled.
+        """
+        try:
+            template_data = self.catalog.load(template_name)
+        except (OSError, ValueError) as e:
+            print(f"Error loading template {template_name}: {e}")
+            return None
+        if template_data is None:
+            return None
+
+        # Templates store key names; legacy "Shift"/"Ctrl" map to both sides
+        key_sounds = KeySoundTable(template_data['key_sounds'], template_data.get('key_gains'))
+        sound_trims = dict(template_data.get('sound_trims', {}))
+        with self._template_lock:
+            if self.template_load is not None:
+                self.template_load.cancel()
+            self.key_sounds = key_sounds
+            self.sound_variants = {}
+            self.current_template = template_name
+            self.template_data = template_data
+
+            # Trims and gains remembered in the template apply before decoding
+            self.sound_trims = sound_trims
+            trim = self.audio_settings.get("trim_leading_silence")
+            normalize = self.audio_settings.get("normalize_loudness") and self.loudness is not None
+            if normalize:
+                self.sound_gains = dict(template_data.get('sound_gains', {}))
+            for path in dict.fromkeys(key_sounds.values()):
+                if not path:
+                    continue
+                changed = trim and self.transcoder.set_trim(path, sound_trims.get(path))
+                changed = (normalize and self.transcoder.set_gain(path, self.sound_gains.get(path))) or changed
+                if changed:
+                    self.sound_cache.invalidate(path)
+
+            # The load finishes against its own key sounds and trims, not
+            # whatever template is current by then
+            load = TemplateLoad(self.template_path(template_name),
+                                sound_priorities(key_sounds, self.press_counts),
+                                self.transcoder, self.sound_cache, self.decode_pool, on_progress,
+                                partial(self._finish_template_load, template_data, key_sounds,
+                                        sound_trims, on_done),
+                                template_data)
+            self.loading_sounds = load.pending
+            self.template_load = load
+        load.start()
+        return load
+
+    def _is_current_load(self, load):
+        return load is self.template_load and not load.cancelled
+
+    def _finish_template_load(self, template_data, key_sounds, sound_trims, on_done, load):
+        """Analyze new sounds and load variations once a template's sounds are in.
+
+        Runs on the loader thread. Analysis works on this load's own key
+        sounds and trims; results are applied and saved only if the load is
+        still the current one.
+        """
+        if load.cancelled:
+            return
+
+        # Onsets and loudness are analyzed once and remembered in the template
+        paths = list(key_sounds.values())
+        analyzed = self.analyze_leading_silence(paths, sound_trims)
+        gains = self.analyze_loudness(paths)
+        with self._template_lock:
+            if not self._is_current_load(load):
+                return
+            self.sound_trims.update(analyzed)
+            self._apply_trims(paths, analyzed, key_sounds)
+            if gains is not None:
+                self.sound_gains = gains
+                self._apply_gains(paths)
+            gains_changed = gains is not None and gains != template_data.get('sound_gains', {})
+            if analyzed or gains_changed:
+                template_data['sound_trims'] = self.template_sound_trims()
+                if gains is not None:
+                    template_data['sound_gains'] = dict(gains)
+                self.save_template_file(template_data)
+
+        # Sounds whose trim or gain just changed were invalidated above.
+        # Every sound has now been tried once, so broken ones are reported
+        # together here instead of one key press at a time
+        self.sound_cache.warm(paths)
+        if not self._is_current_load(load):
+            return
+        self.report_unplayable_sounds(f"template '{template_data['name']}'", key_sounds=key_sounds)
+        variants = self.render_sound_variations(template_data.get('variations'), paths)
+        with self._template_lock:
+            if not self._is_current_load(load):
+                return
+            self.variation_settings = template_data.get('variations')
+            self.sound_variants = variants
+        self.emit("template", name=template_data['name'])
+        if on_done is not None:
+            on_done(template_data)
+
+    def template_sound_trims(self):
+        """Return the trims of the sounds currently assigned to keys."""
+        return {path: self.sound_trims[path] for path in self.key_sounds.values() if path in self.sound_trims}
+
+    def delete_template(self, template_name):
+        """Remove a template's JSON file and sound bank."""
+        template_file = self.template_path(template_name)
+        if os.path.exists(template_file):
+            os.remove(template_file)
+        bank_file = bank_path_for(template_file)
+        if os.path.exists(bank_file):
+            os.remove(bank_file)
+        self.catalog.remove(template_name)
+        if self.current_template == template_name:
+            self.current_template = None
+            self.template_data = None
+
+    def stats(self):
+        """Return the counters of every audio component as a dict."""
+        return {
+            "cache": self.sound_cache.stats(),
+            "catalog": self.catalog.stats(),
+            "transcoder": self.transcoder.stats(),
+            "voices": self.voices.stats(),
+            "dispatcher": self.audio_dispatcher.stats(),
+            "errors": self.errors.stats(),
+        }
+
+    def close(self):
+        """Stop loading, stop the audio thread and release the voices."""
+        if self.template_load is not None:
+            self.template_load.cancel()
+        self.decode_pool.shutdown(wait=False, cancel_futures=True)
+        self.audio_dispatcher.stop()
+        self.errors.close()
+        self.voices.close()
+        self.catalog.close()
@@ -1,12 +1,17 @@
 import customtkinter as ctk
-import pygame
-import json
 import os
-import shutil
 from tkinter import filedialog, messagebox
-from PIL import Image, ImageTk
 import threading
-import time
+
+from control_socket import UNIX_SOCKETS, ControlServer, WindowControls
+from engine import KeyAuraEngine
+from highlight_animator import HighlightAnimator
+from keyboard_canvas import KeyboardCanvas
+from keyboard_layouts import layout_names
+from mixer_config import PROFILE_CUSTOM, profile_names
+from status_bar import StatusBar
+from template_list import TemplateList
+from typing_input import TypingInput
 
 # Configure CustomTkinter appearance
 ctk.set_appearance_mode("dark")
@@ -19,28 +24,16 @@ class KeyAura:
         self.root.geometry("1400x900")
         self.root.minsize(1200, 800)
         
-        # Initialize pygame mixer
-        pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
-        
-        # Application state
-        self.sound_enabled = True
-        self.current_template = None
-        self.templates = {}
-        self.key_sounds = {}
-        self.template_dir = "templates"
-        self.sounds_dir = "sounds"
-        self.volume = 0.7
-        
-        # Create directories if they don't exist
-        os.makedirs(self.template_dir, exist_ok=True)
-        os.makedirs(self.sounds_dir, exist_ok=True)
-        
-        # Load existing templates
-        self.load_templates()
+        # Audio, key sounds and templates live in the UI-free engine
+        self.engine = KeyAuraEngine(on_error=self.show_audio_error, confirm=self.confirm)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
         # Create UI
         self.create_ui()
         
+        # Scripts can switch template, volume and mute over the control socket
+        self.control = self.start_control_socket()
+        
     def create_ui(self):
         # Configure grid weights
         self.root.grid_columnconfigure(0, weight=1)
@@ -55,6 +48,10 @@ class KeyAura:
         # Top Bar
         self.create_top_bar(main_frame)
         
+        # Status Bar - non-modal messages and errors
+        self.status_bar = StatusBar(main_frame)
+        self.status_bar.grid(row=2, column=0, sticky="ew", pady=(15, 0))
+        
         # Content Area
         content_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
         content_frame.grid(row=1, column=0, sticky="nsew", pady=(20, 0))
@@ -108,6 +105,21 @@ class KeyAura:
         controls_frame = ctk.CTkFrame(top_frame, fg_color="transparent")
         controls_frame.grid(row=0, column=2, padx=20, pady=15)
         
+        # Mixer latency profile
+        self.profile_var = ctk.StringVar(value=self.engine.audio_settings["profile"])
+        profile_menu = ctk.CTkOptionMenu(
+            controls_frame,
+            values=profile_names(),
+            variable=self.profile_var,
+            command=self.set_mixer_profile,
+            fg_color="#2d2d2d",
+            button_color="#4a90e2",
+            button_hover_color="#357abd",
+            width=150,
+            height=32
+        )
+        profile_menu.pack(side="left", padx=(0, 15))
+        
         # Volume control
         volume_frame = ctk.CTkFrame(controls_frame, fg_color="transparent")
         volume_frame.pack(side="left", padx=(0, 15))
@@ -123,7 +135,7 @@ class KeyAura:
             command=self.set_volume,
             width=100
         )
-        self.volume_slider.set(self.volume)
+        self.volume_slider.set(self.engine.volume)
         self.volume_slider.pack(side="left")
         
         # Sound Toggle Button
@@ -188,7 +200,7 @@ class KeyAura:
         self.layout_var = ctk.StringVar(value="100%")
         layout_menu = ctk.CTkOptionMenu(
             layout_frame,
-            values=["67%", "75%", "100%"],
+            values=layout_names(),
             variable=self.layout_var,
             command=self.change_layout,
             fg_color="#2d2d2d",
@@ -202,46 +214,16 @@ class KeyAura:
         self.create_keyboard_keys(keyboard_frame)
         
     def create_keyboard_keys(self, parent):
-        # Define key rows with proper spacing
-        key_rows = [
-            ["Q", "W", "E", "R", "T", "Y", "U", "I", "O", "P"],
-            ["A", "S", "D", "F", "G", "H", "J", "K", "L"],
-            ["Z", "X", "C", "V", "B", "N", "M"]
-        ]
-        
-        keys_frame = ctk.CTkFrame(parent, fg_color="transparent")
-        keys_frame.pack(pady=(0, 25))
+        # Every key of the layout is drawn on one canvas
+        self.keyboard = KeyboardCanvas(parent, layout=self.layout_var.get(), on_click=self.play_key_sound,
+                                       unit=28)
+        self.keyboard.pack(pady=(0, 25))
         
-        self.key_buttons = {}
+        # Press flashes are drawn by one frame tick, not a timer per press
+        self.highlights = HighlightAnimator(self.root, self.keyboard)
         
-        for row_idx, row in enumerate(key_rows):
-            row_frame = ctk.CTkFrame(keys_frame, fg_color="transparent")
-            row_frame.pack(pady=8)
-            
-            # Add offset for second and third rows
-            if row_idx == 1:
-                offset_frame = ctk.CTkFrame(row_frame, fg_color="transparent", width=25)
-                offset_frame.pack(side="left")
-            elif row_idx == 2:
-                offset_frame = ctk.CTkFrame(row_frame, fg_color="transparent", width=50)
-                offset_frame.pack(side="left")
-            
-            for key in row:
-                key_btn = ctk.CTkButton(
-                    row_frame,
-                    text=key,
-                    width=55,
-                    height=55,
-                    command=lambda k=key: self.play_key_sound(k),
-                    fg_color="#2d2d2d",
-                    hover_color="#4a90e2",
-                    corner_radius=12,
-                    font=ctk.CTkFont(size=18, weight="bold"),
-                    border_width=2,
-                    border_color="#3d3d3d"
-                )
-                key_btn.pack(side="left", padx=4)
-                self.key_buttons[key] = key_btn
+        # Keys typed on the physical keyboard play and flash too
+        self.typing = TypingInput(self.root, self.engine, on_key=self.highlights.flash)
                 
     def create_sound_customization(self, parent):
         sound_frame = ctk.CTkFrame(parent, fg_color="#1a1a1a", corner_radius=15)
@@ -265,9 +247,9 @@ class KeyAura:
         key_label.pack(side="left", padx=(0, 10))
         
         self.key_var = ctk.StringVar(value="A")
-        key_menu = ctk.CTkOptionMenu(
+        self.key_menu = ctk.CTkOptionMenu(
             controls_frame,
-            values=list(self.key_buttons.keys()),
+            values=self.keyboard.keys(),
             variable=self.key_var,
             command=self.on_key_selected,
             fg_color="#2d2d2d",
@@ -275,7 +257,7 @@ class KeyAura:
             button_hover_color="#357abd",
             width=80
         )
-        key_menu.pack(side="left", padx=(0, 20))
+        self.key_menu.pack(side="left", padx=(0, 20))
         
         # Sound File Selection
         self.sound_path_var = ctk.StringVar()
@@ -322,7 +304,7 @@ class KeyAura:
         self.apply_all_var = ctk.BooleanVar()
         apply_all_check = ctk.CTkCheckBox(
             apply_frame,
-            text="Apply to all keys (A-Z)",
+            text="Apply to all keys",
             variable=self.apply_all_var,
             fg_color="#4a90e2",
             hover_color="#357abd",
@@ -372,54 +354,97 @@ class KeyAura:
         )
         template_title.grid(row=0, column=0, pady=(20, 15))
         
-        # Templates List
-        self.templates_list_frame = ctk.CTkScrollableFrame(
+        # Templates List (only the visible cards exist)
+        self.templates_list = TemplateList(
             template_frame,
-            fg_color="transparent",
+            on_use=self.use_template,
+            on_edit=self.edit_template,
+            on_delete=self.delete_template,
             height=400
         )
-        self.templates_list_frame.grid(row=1, column=0, sticky="nsew", padx=15, pady=(0, 20))
+        self.templates_list.grid(row=1, column=0, sticky="nsew", padx=15, pady=(0, 10))
+        
+        # Template loading progress
+        self.template_progress_label = ctk.CTkLabel(
+            template_frame,
+            text="",
+            font=ctk.CTkFont(size=12),
+            text_color="#888888"
+        )
+        self.template_progress_label.grid(row=2, column=0, sticky="w", padx=20)
+        
+        self.template_progress = ctk.CTkProgressBar(template_frame, progress_color="#00ff88")
+        self.template_progress.set(0)
+        self.template_progress.grid(row=3, column=0, sticky="ew", padx=20, pady=(5, 20))
         
         self.refresh_templates_list()
         
     def set_volume(self, value):
-        self.volume = float(value)
-        pygame.mixer.music.set_volume(self.volume)
+        self.engine.set_volume(value)
+        
+    def apply_volume(self, volume):
+        """Set the volume from outside the slider, e.g. the control socket."""
+        self.volume_slider.set(volume)
+        self.set_volume(volume)
+        
+    def set_mixer_profile(self, profile):
+        """Re-initialize the mixer with a latency profile without restarting."""
+        try:
+            self.engine.set_mixer_profile(profile)
+        except Exception as e:
+            self.profile_var.set(PROFILE_CUSTOM)
+            messagebox.showerror("Error", f"Could not apply mixer profile '{profile}': {e}")
         
     def toggle_sound(self):
-        self.sound_enabled = not self.sound_enabled
-        if self.sound_enabled:
+        self.set_sound_enabled(not self.engine.sound_enabled)
+        
+    def set_sound_enabled(self, enabled):
+        self.engine.sound_enabled = enabled
+        if enabled:
             self.sound_button.configure(text="🔊")
         else:
             self.sound_button.configure(text="🔇")
             
     def change_layout(self, layout_type):
-        # This would implement different keyboard layouts
-        print(f"Layout changed to: {layout_type}")
+        self.keyboard.set_layout(layout_type)
+        self.key_menu.configure(values=self.keyboard.keys())
         
     def play_key_sound(self, key):
-        if not self.sound_enabled:
-            return
-            
-        if key in self.key_sounds and self.key_sounds[key]:
-            try:
-                # Stop any currently playing sound
-                pygame.mixer.music.stop()
-                pygame.mixer.music.load(self.key_sounds[key])
-                pygame.mixer.music.set_volume(self.volume)
-                pygame.mixer.music.play()
-                
-                # Visual feedback
-                self.key_buttons[key].configure(fg_color="#4a90e2")
-                self.root.after(100, lambda: self.key_buttons[key].configure(fg_color="#2d2d2d"))
+        if self.engine.press(key):
+            # Visual feedback
+            self.highlights.flash(key)
                 
-            except Exception as e:
-                print(f"Error playing sound for key {key}: {e}")
-                messagebox.showerror("Error", f"Could not play sound for key {key}: {e}")
+    def show_audio_error(self, message):
+        """Show an engine error in the status bar. Called from the audio or loader thread.
+
+        The engine already limits how often this is called; nothing here
+        waits for the user.
+        """
+        self.root.after(0, self.show_error_status, message)
+        
+    def show_error_status(self, message):
+        self.status_bar.show_error(message, self.engine.errors.reported)
+        
+    def confirm(self, title, message):
+        """Ask a yes/no question for the engine, from any thread."""
+        if threading.current_thread() is threading.main_thread():
+            return messagebox.askyesno(title, message)
+            
+        # Template loads ask from their loader thread; Tk must ask on its own
+        answer = []
+        answered = threading.Event()
+        
+        def ask():
+            answer.append(messagebox.askyesno(title, message))
+            answered.set()
+            
+        self.root.after(0, ask)
+        answered.wait()
+        return answer[0]
                 
     def on_key_selected(self, key):
-        if key in self.key_sounds:
-            self.sound_path_var.set(self.key_sounds[key])
+        if key in self.engine.key_sounds:
+            self.sound_path_var.set(self.engine.key_sounds[key])
         else:
             self.sound_path_var.set("")
             
@@ -435,10 +460,7 @@ class KeyAura:
         sound_path = self.sound_path_var.get()
         if sound_path and os.path.exists(sound_path):
             try:
-                pygame.mixer.music.stop()
-                pygame.mixer.music.load(sound_path)
-                pygame.mixer.music.set_volume(self.volume)
-                pygame.mixer.music.play()
+                self.engine.preview_sound(sound_path)
             except Exception as e:
                 messagebox.showerror("Error", f"Could not play sound: {e}")
         else:
@@ -453,12 +475,11 @@ class KeyAura:
             return
             
         if self.apply_all_var.get():
-            # Apply to all A-Z keys
-            for key in self.key_buttons.keys():
-                self.key_sounds[key] = sound_path
+            # Apply to every key of the layout
+            self.engine.assign_sound(self.keyboard.keys(), sound_path)
         else:
             # Apply to selected key only
-            self.key_sounds[selected_key] = sound_path
+            self.engine.assign_sound([selected_key], sound_path)
             
         messagebox.showinfo("Success", "Sound applied successfully!")
         
@@ -466,14 +487,11 @@ class KeyAura:
         selected_key = self.key_var.get()
         
         if self.apply_all_var.get():
-            # Clear all A-Z keys
-            for key in self.key_buttons.keys():
-                if key in self.key_sounds:
-                    del self.key_sounds[key]
+            # Clear every key of the layout
+            self.engine.clear_sounds(self.keyboard.keys())
         else:
             # Clear selected key only
-            if selected_key in self.key_sounds:
-                del self.key_sounds[selected_key]
+            self.engine.clear_sounds([selected_key])
                 
         self.sound_path_var.set("")
         messagebox.showinfo("Success", "Sound cleared successfully!")
@@ -486,18 +504,7 @@ class KeyAura:
         
         if template_name:
             # Save current key sounds as template
-            template_data = {
-                "name": template_name,
-                "key_sounds": self.key_sounds.copy(),
-                "layout": self.layout_var.get(),
-                "created": time.strftime("%Y-%m-%d %H:%M:%S")
-            }
-            
-            template_file = os.path.join(self.template_dir, f"{template_name}.json")
-            with open(template_file, 'w') as f:
-                json.dump(template_data, f, indent=2)
-                
-            self.templates[template_name] = template_data
+            self.engine.save_template(template_name, self.layout_var.get())
             self.refresh_templates_list()
             messagebox.showinfo("Success", f"Template '{template_name}' saved successfully!")
             
@@ -505,112 +512,41 @@ class KeyAura:
         # This would show a detailed template view
         pass
         
-    def load_templates(self):
-        if os.path.exists(self.template_dir):
-            for filename in os.listdir(self.template_dir):
-                if filename.endswith('.json'):
-                    template_path = os.path.join(self.template_dir, filename)
-                    try:
-                        with open(template_path, 'r') as f:
-                            template_data = json.load(f)
-                            self.templates[template_data['name']] = template_data
-                    except Exception as e:
-                        print(f"Error loading template {filename}: {e}")
-                        
     def refresh_templates_list(self):
-        # Clear existing widgets
-        for widget in self.templates_list_frame.winfo_children():
-            widget.destroy()
-            
-        # Add template cards
-        for template_name, template_data in self.templates.items():
-            self.create_template_card(template_name, template_data)
+        self.templates_list.sync(self.engine.templates)
             
-    def create_template_card(self, template_name, template_data):
-        card_frame = ctk.CTkFrame(
-            self.templates_list_frame,
-            fg_color="#2d2d2d",
-            corner_radius=12,
-            border_width=2,
-            border_color="#3d3d3d"
-        )
-        card_frame.pack(fill="x", pady=8, padx=10)
-        
-        # Template info
-        info_frame = ctk.CTkFrame(card_frame, fg_color="transparent")
-        info_frame.pack(side="left", fill="both", expand=True, padx=15, pady=12)
-        
-        name_label = ctk.CTkLabel(
-            info_frame,
-            text=template_name,
-            font=ctk.CTkFont(size=16, weight="bold"),
-            text_color="#ffffff"
-        )
-        name_label.pack(anchor="w")
-        
-        created_label = ctk.CTkLabel(
-            info_frame,
-            text=f"Created: {template_data.get('created', 'Unknown')}",
-            font=ctk.CTkFont(size=12),
-            text_color="#cccccc"
-        )
-        created_label.pack(anchor="w")
-        
-        layout_label = ctk.CTkLabel(
-            info_frame,
-            text=f"Layout: {template_data.get('layout', '100%')}",
-            font=ctk.CTkFont(size=12),
-            text_color="#888888"
-        )
-        layout_label.pack(anchor="w")
-        
-        # Action buttons
-        buttons_frame = ctk.CTkFrame(card_frame, fg_color="transparent")
-        buttons_frame.pack(side="right", padx=15, pady=12)
-        
-        use_btn = ctk.CTkButton(
-            buttons_frame,
-            text="Use",
-            width=60,
-            command=lambda: self.use_template(template_name),
-            fg_color="#27ae60",
-            hover_color="#229954",
-            corner_radius=8,
-            height=30
-        )
-        use_btn.pack(side="left", padx=2)
-        
-        edit_btn = ctk.CTkButton(
-            buttons_frame,
-            text="Edit",
-            width=60,
-            command=lambda: self.edit_template(template_name),
-            fg_color="#f39c12",
-            hover_color="#e67e22",
-            corner_radius=8,
-            height=30
-        )
-        edit_btn.pack(side="left", padx=2)
-        
-        delete_btn = ctk.CTkButton(
-            buttons_frame,
-            text="Delete",
-            width=60,
-            command=lambda: self.delete_template(template_name),
-            fg_color="#e74c3c",
-            hover_color="#c0392b",
-            corner_radius=8,
-            height=30
+    def use_template(self, template_name):
+        # Sounds load in the background; the loader reports back through after()
+        load = self.engine.load_template(
+            template_name,
+            on_progress=lambda loaded, total: self.root.after(
+                0, self.show_template_progress, template_name, loaded, total),
+            on_done=lambda template_data: self.root.after(
+                0, self.template_loaded, template_name, template_data)
         )
-        delete_btn.pack(side="left", padx=2)
+        if load is not None:
+            self.layout_var.set(self.engine.templates[template_name].get('layout', '100%'))
+            self.change_layout(self.layout_var.get())
+            
+    def show_template_progress(self, template_name, loaded, total):
+        """Show how many sounds of the loading template are playable."""
+        if template_name != self.engine.current_template:
+            return
+        self.template_progress.set(loaded / total if total else 1.0)
+        self.template_progress_label.configure(text=f"Loading '{template_name}': {loaded}/{total} sounds")
         
-    def use_template(self, template_name):
-        if template_name in self.templates:
-            template_data = self.templates[template_name]
-            self.key_sounds = template_data['key_sounds'].copy()
-            self.layout_var.set(template_data.get('layout', '100%'))
-            self.current_template = template_name
-            messagebox.showinfo("Success", f"Template '{template_name}' loaded successfully!")
+    def template_loaded(self, template_name, template_data):
+        """Report a template whose sounds have all loaded."""
+        if template_name != self.engine.current_template:
+            return
+        self.template_progress.set(1.0)
+        self.template_progress_label.configure(text=f"Template '{template_name}' ready")
+        
+        trimmed = self.engine.trimmed_keys_ms()
+        message = f"Template '{template_name}' loaded successfully!"
+        if trimmed:
+            message += f"\nRemoved {sum(trimmed) / len(trimmed):.1f} ms of leading silence on average from {len(trimmed)} keys."
+        messagebox.showinfo("Success", message)
             
     def edit_template(self, template_name):
         # This would open an edit dialog
@@ -618,14 +554,31 @@ class KeyAura:
         
     def delete_template(self, template_name):
         if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete template '{template_name}'?"):
-            template_file = os.path.join(self.template_dir, f"{template_name}.json")
-            if os.path.exists(template_file):
-                os.remove(template_file)
-            if template_name in self.templates:
-                del self.templates[template_name]
+            self.engine.delete_template(template_name)
             self.refresh_templates_list()
             messagebox.showinfo("Success", f"Template '{template_name}' deleted successfully!")
             
+    def start_control_socket(self):
+        """Serve the control socket for this window. Returns the server, or None."""
+        if not UNIX_SOCKETS:
+            return None
+        try:
+            server = ControlServer(self.engine, controls=WindowControls(self))
+            server.start()
+        except (OSError, RuntimeError) as e:
+            self.status_bar.show(f"No control socket: {e}")
+            return None
+        return server
+        
+    def on_close(self):
+        """Stop the control socket and the audio engine and close the window."""
+        if self.control is not None:
+            self.control.stop()
+        self.highlights.stop()
+        self.typing.close()
+        self.engine.close()
+        self.root.destroy()
+        
     def run(self):
         self.root.mainloop()
 
@@ -0,0 +1,118 @@
+"""
+KeyAura Error Reporting
+A non-blocking, rate-limited channel for errors raised on the audio and
+loader threads. Front ends show what comes out of it in a status bar
+instead of a modal dialog, so a broken sound can never freeze the window
+or hold up other keys.
+"""
+
+import threading
+import time
+from collections import deque
+
+DEFAULT_INTERVAL = 2.0
+DEFAULT_HISTORY = 50
+
+
+class ErrorReporter:
+    """Collects errors from any thread and passes them on at a limited rate.
+
+    report() never blocks on the front end: it logs the error, keeps it in
+    a short history and calls sink(message, key, held) at most once every
+    interval seconds. Errors reported in between are only counted; once the
+    interval is up the latest of them is delivered from a timer thread, so
+    the last error of a burst is never lost. held is the number of other
+    errors folded into a delivered message.
+    """
+
+    def __init__(self, sink=None, interval=DEFAULT_INTERVAL, history=DEFAULT_HISTORY):
+        self.sink = sink
+        self.interval = interval
+        self.history = deque(maxlen=history)  # (time, key, message)
+        self._lock = threading.Lock()
+        self._next_delivery = 0.0
+        self._held = 0
+        self._held_error = None  # (message, key) of the latest held error
+        self._flush_timer = None
+
+        self.reported = 0
+        self.delivered = 0
+        self.suppressed = 0
+
+    def report(self, message, key=None):
+        """Record an error. Returns True if it was passed to the sink now."""
+        print(message)
+        now = time.monotonic()
+        with self._lock:
+            self.reported += 1
+            self.history.append((now, key, message))
+            if now < self._next_delivery:
+                self._held += 1
+                self.suppressed += 1
+                self._held_error = (message, key)
+                if self._flush_timer is None:
+                    self._schedule_flush(self._next_delivery - now)
+                return False
+            held = self._held
+            self._held = 0
+            self._held_error = None
+            self._next_delivery = now + self.interval
+            self.delivered += 1
+
+        self._deliver(message, key, held)
+        return True
+
+    def _schedule_flush(self, delay):
+        # Called with the lock held
+        self._flush_timer = threading.Timer(delay, self._flush)
+        self._flush_timer.daemon = True
+        self._flush_timer.start()
+
+    def _flush(self):
+        now = time.monotonic()
+        with self._lock:
+            self._flush_timer = None
+            if not self._held:
+                return
+            if now < self._next_delivery:
+                # A report delivered since the timer was set; wait for its interval
+                self._schedule_flush(self._next_delivery - now)
+                return
+            message, key = self._held_error
+            held = self._held - 1
+            self._held = 0
+            self._held_error = None
+            self._next_delivery = now + self.interval
+            self.delivered += 1
+
+        self._deliver(message, key, held)
+
+    def _deliver(self, message, key, held):
+        if self.sink is not None:
+            try:
+                self.sink(message, key, held)
+            except Exception as e:
+                print(f"Error in error sink: {e}")
+
+    def recent(self, count=10):
+        """Return the last count (key, message) pairs reported, oldest first."""
+        with self._lock:
+            entries = list(self.history)[-count:]
+        return [(key, message) for _, key, message in entries]
+
+    def stats(self):
+        """Return error counters as a dict."""
+        with self._lock:
+            return {
+                "reported": self.reported,
+                "delivered": self.delivered,
+                "suppressed": self.suppressed,
+                "held": self._held,
+            }
+
+    def close(self):
+        """Cancel delivery of any held error."""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
@@ -0,0 +1,134 @@
+"""
+KeyAura Highlight Animator
+Drives every key highlight on a KeyboardCanvas from one frame tick. Presses
+and selection changes only record state; each frame recolours the keys
+whose colour actually changed, so fast typing costs one pending callback
+and at most one redraw per frame rather than a timer per press. The tick
+stops while nothing is animating.
+"""
+
+import time
+
+from keyboard_canvas import KEY_FILL, KEY_OUTLINE
+
+DEFAULT_FPS = 60
+FLASH_COLOR = "#4a90e2"
+FLASH_MS = 100
+SELECTED_COLOR = "#00ff88"
+
+
+def parse_color(color):
+    """Return the (r, g, b) of a #rrggbb colour."""
+    return int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16)
+
+
+def blend(start, end, amount):
+    """Return the #rrggbb colour amount (0-1) of the way from start to end."""
+    start_rgb = parse_color(start)
+    end_rgb = parse_color(end)
+    return "#%02x%02x%02x" % tuple(round(s + (e - s) * amount) for s, e in zip(start_rgb, end_rgb))
+
+
+class HighlightAnimator:
+    """Animates press flashes and selection colours of a KeyboardCanvas.
+
+    root is any Tk widget, used for after(). A pressed key flashes in
+    flash_color and fades back to its resting colour (selected or not) over
+    flash_ms; pressing it again restarts the fade.
+    """
+
+    def __init__(self, root, keyboard, fps=DEFAULT_FPS, flash_color=FLASH_COLOR, flash_ms=FLASH_MS):
+        self.root = root
+        self.keyboard = keyboard
+        self.frame_ms = max(1, int(1000 / fps))
+        self.flash_color = flash_color
+        self.flash_seconds = flash_ms / 1000.0
+        self.selected = set()
+        self._flashes = {}
+        self._dirty = set()
+        self._shown = {}
+        self._after_id = None
+
+        # Frame counters
+        self.frames = 0
+        self.skipped = 0
+        self.last_frame_ms = 0.0
+        self.max_frame_ms = 0.0
+        self._total_frame_ms = 0.0
+
+    def flash(self, key):
+        """Flash a key that was just pressed."""
+        self._flashes[key] = time.perf_counter()
+        self._schedule()
+
+    def set_selected(self, key, selected):
+        """Show a key as selected or not."""
+        if selected:
+            self.selected.add(key)
+        else:
+            self.selected.discard(key)
+        self._dirty.add(key)
+        self._schedule()
+
+    def clear_selection(self):
+        """Show every selected key as unselected."""
+        self._dirty.update(self.selected)
+        self.selected.clear()
+        self._schedule()
+
+    def resting_colors(self, key):
+        """Return the (fill, outline) of a key that is not flashing."""
+        if key in self.selected:
+            return SELECTED_COLOR, SELECTED_COLOR
+        return KEY_FILL, KEY_OUTLINE
+
+    def _schedule(self):
+        if self._after_id is None:
+            self._after_id = self.root.after(self.frame_ms, self._tick)
+
+    def _tick(self):
+        self._after_id = None
+        start = time.perf_counter()
+        changed = 0
+        for key in self._dirty.union(self._flashes):
+            fill, outline = self.resting_colors(key)
+            flashed_at = self._flashes.get(key)
+            if flashed_at is not None:
+                progress = (start - flashed_at) / self.flash_seconds
+                if progress >= 1.0:
+                    del self._flashes[key]
+                else:
+                    fill = blend(self.flash_color, fill, progress)
+            colors = (fill, outline)
+            if self._shown.get(key) != colors:
+                self._shown[key] = colors
+                self.keyboard.set_key_colors(key, fill, outline)
+                changed += 1
+        self._dirty.clear()
+
+        if changed:
+            self.frames += 1
+            self.last_frame_ms = (time.perf_counter() - start) * 1000
+            self.max_frame_ms = max(self.max_frame_ms, self.last_frame_ms)
+            self._total_frame_ms += self.last_frame_ms
+        else:
+            self.skipped += 1
+        if self._flashes:
+            self._schedule()
+
+    def stats(self):
+        """Return frame counters as a dict."""
+        return {
+            "frames": self.frames,
+            "skipped": self.skipped,
+            "last_frame_ms": self.last_frame_ms,
+            "max_frame_ms": self.max_frame_ms,
+            "mean_frame_ms": self._total_frame_ms / self.frames if self.frames else 0.0,
+            "animating": len(self._flashes),
+        }
+
+    def stop(self):
+        """Cancel the pending frame."""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
@@ -0,0 +1,251 @@
+"""
+KeyAura Input Backends
+Sources of key events for the background daemon. Every backend turns its
+native events into template key names ("A", "Space", "LShift", ...) and
+hands them to a callback as KeyEvent tuples:
+
+    backend.run(on_event)   # blocks until stop() is called or input ends
+    backend.stop()          # safe to call from another thread or a signal handler
+"""
+
+import glob
+import json
+import os
+import select
+import struct
+import time
+from collections import namedtuple
+
+from key_model import KEY_IDS, KEY_NAMES
+
+KeyEvent = namedtuple("KeyEvent", ["key", "down", "time"])
+
+BACKEND_EVDEV = "evdev"
+BACKEND_TK = "tk"
+BACKEND_REPLAY = "replay"
+
+# struct input_event from <linux/input.h>: timeval, type, code, value
+EVDEV_EVENT = struct.Struct("llHHi")
+EV_KEY = 0x01
+KEY_UP, KEY_DOWN, KEY_REPEAT = 0, 1, 2
+
+# Linux keycodes (<linux/input-event-codes.h>) to template key names; key
+# IDs are these keycodes
+EVDEV_KEYCODES = KEY_NAMES
+
+# Tk keysyms that differ from template key names. Shifted symbols map to
+# the key they are typed with on a US layout
+TK_KEYSYMS = {
+    "space": "Space", "Return": "Enter", "KP_Enter": "NumEnter", "BackSpace": "Backspace",
+    "ISO_Left_Tab": "Tab", "Escape": "Esc",
+    "Shift_L": "LShift", "Shift_R": "RShift", "Control_L": "LCtrl", "Control_R": "RCtrl",
+    "Alt_L": "LAlt", "Alt_R": "RAlt", "ISO_Level3_Shift": "RAlt",
+    "Super_L": "LWin", "Super_R": "RWin", "Win_L": "LWin", "Win_R": "RWin", "App": "Menu",
+    "Caps_Lock": "Caps", "Num_Lock": "NumLk", "Scroll_Lock": "ScrLk", "Print": "PrtSc",
+    "Insert": "Ins", "Delete": "Del", "Prior": "PgUp", "Next": "PgDn",
+    "minus": "-", "underscore": "-", "equal": "=", "plus": "=",
+    "bracketleft": "[", "braceleft": "[", "bracketright": "]", "braceright": "]",
+    "backslash": "\\", "bar": "\\", "semicolon": ";", "colon": ";", "apostrophe": "'", "quotedbl": "'",
+    "grave": "`", "asciitilde": "`", "comma": ",", "less": ",", "period": ".", "greater": ".",
+    "slash": "/", "question": "/",
+    "exclam": "1", "at": "2", "numbersign": "3", "dollar": "4", "percent": "5",
+    "asciicircum": "6", "ampersand": "7", "asterisk": "8", "parenleft": "9", "parenright": "0",
+    "KP_Insert": "Num0", "KP_End": "Num1", "KP_Down": "Num2", "KP_Next": "Num3", "KP_Left": "Num4",
+    "KP_Begin": "Num5", "KP_Right": "Num6", "KP_Home": "Num7", "KP_Up": "Num8", "KP_Prior": "Num9",
+    "KP_Delete": "Num.", "KP_Decimal": "Num.", "KP_Divide": "Num/", "KP_Multiply": "Num*",
+    "KP_Subtract": "Num-", "KP_Add": "Num+",
+}
+TK_KEYSYMS.update({f"KP_{digit}": f"Num{digit}" for digit in range(10)})
+
+# Every Tk keysym with a key, resolved to its key ID once at import.
+# Keysyms spelled like key names ("A", "F1", "Home", ...) map to that key
+TK_KEYSYM_IDS = {name: KEY_IDS[name] for name in KEY_NAMES.values()}
+TK_KEYSYM_IDS.update({name.lower(): KEY_IDS[name] for name in KEY_NAMES.values()
+                      if len(name) == 1 and name.isalpha()})
+TK_KEYSYM_IDS.update({keysym: KEY_IDS[name] for keysym, name in TK_KEYSYMS.items()})
+
+POLL_INTERVAL = 0.2
+
+
+def tk_key_name(keysym):
+    """Return the template key name of a Tk keysym, or None if it has none."""
+    key = TK_KEYSYM_IDS.get(keysym)
+    return None if key is None else KEY_NAMES[key]
+
+
+def load_events(path):
+    """Read a JSONL event file into a list of KeyEvent sorted by time."""
+    events = []
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                record = json.loads(line)
+                events.append(KeyEvent(record["key"], record.get("down", True), float(record["t"])))
+    events.sort(key=lambda event: event.time)
+    return events
+
+
+def find_keyboards():
+    """Return the evdev device paths that look like keyboards."""
+    devices = sorted(glob.glob("/dev/input/by-path/*-event-kbd"))
+    if devices:
+        return [os.path.realpath(path) for path in devices]
+    return sorted(glob.glob("/dev/input/event*"))
+
+
+class InputBackend:
+    """Base class of the daemon's key event sources."""
+
+    name = None
+
+    def __init__(self):
+        self._running = False
+
+    def run(self, on_event):
+        raise NotImplementedError
+
+    def stop(self):
+        self._running = False
+
+
+class EvdevBackend(InputBackend):
+    """Reads key events of all keyboards system-wide from /dev/input (Linux).
+
+    Needs read access to the event devices, usually membership of the
+    'input' group. Auto-repeat events are ignored, so holding a key plays
+    its sound once.
+    """
+
+    name = BACKEND_EVDEV
+
+    def __init__(self, devices=None):
+        super().__init__()
+        self.devices = devices or find_keyboards()
+
+    def _open_devices(self):
+        fds = []
+        for device in self.devices:
+            try:
+                fds.append(os.open(device, os.O_RDONLY | os.O_NONBLOCK))
+            except OSError as e:
+                print(f"Cannot read input device {device}: {e}")
+        if not fds:
+            raise RuntimeError("No readable keyboard devices; is the user in the 'input' group?")
+        return fds
+
+    def run(self, on_event):
+        fds = self._open_devices()
+        self._running = True
+        try:
+            while self._running:
+                readable, _, _ = select.select(fds, [], [], POLL_INTERVAL)
+                for fd in readable:
+                    try:
+                        data = os.read(fd, EVDEV_EVENT.size * 64)
+                    except BlockingIOError:
+                        continue
+                    for offset in range(0, len(data) - EVDEV_EVENT.size + 1, EVDEV_EVENT.size):
+                        _, _, event_type, code, value = EVDEV_EVENT.unpack_from(data, offset)
+                        if event_type != EV_KEY or value == KEY_REPEAT:
+                            continue
+                        key = EVDEV_KEYCODES.get(code)
+                        if key is not None:
+                            on_event(KeyEvent(key, value == KEY_DOWN, time.perf_counter()))
+        finally:
+            for fd in fds:
+                os.close(fd)
+
+
+class TkBackend(InputBackend):
+    """Plays keys typed while a small KeyAura window has focus.
+
+    Works on every platform Tk runs on, at the cost of only hearing keys
+    sent to its own window. tkinter is imported only when this backend runs.
+    """
+
+    name = BACKEND_TK
+
+    def __init__(self):
+        super().__init__()
+        self._root = None
+
+    def run(self, on_event):
+        import tkinter as tk
+
+        self._root = tk.Tk()
+        self._root.title("KeyAura")
+        self._root.geometry("240x60")
+        tk.Label(self._root, text="Type here to hear KeyAura").pack(expand=True)
+
+        def handler(down):
+            def handle(event):
+                key = tk_key_name(event.keysym)
+                if key is not None:
+                    on_event(KeyEvent(key, down, time.perf_counter()))
+            return handle
+
+        self._root.bind("<KeyPress>", handler(True))
+        self._root.bind("<KeyRelease>", handler(False))
+        self._running = True
+        self._poll()
+        self._root.mainloop()
+        self._root.destroy()
+        self._root = None
+
+    def _poll(self):
+        # stop() may come from a signal handler; Tk is only touched here
+        if self._running:
+            self._root.after(int(POLL_INTERVAL * 1000), self._poll)
+        else:
+            self._root.quit()
+
+
+class ReplayBackend(InputBackend):
+    """Plays back a recorded event file, one JSON object per line:
+
+        {"t": 0.125, "key": "A", "down": true}
+
+    t is seconds since the start of the recording. speed scales the gaps
+    between events; 0 replays them as fast as possible. The whole file is
+    read before the clock starts, so parsing never delays an event.
+    """
+
+    name = BACKEND_REPLAY
+
+    def __init__(self, path, speed=1.0):
+        super().__init__()
+        self.path = path
+        self.speed = speed
+
+    def run(self, on_event):
+        events = load_events(self.path)
+        self._running = True
+        start = time.perf_counter()
+        for event in events:
+            if not self._running:
+                break
+            if self.speed > 0:
+                delay = start + event.time / self.speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            on_event(KeyEvent(event.key, event.down, time.perf_counter()))
+        self._running = False
+
+
+def create_backend(name, devices=None, replay_path=None, speed=1.0):
+    """Create an input backend by name."""
+    if name == BACKEND_EVDEV:
+        return EvdevBackend(devices)
+    if name == BACKEND_TK:
+        return TkBackend()
+    if name == BACKEND_REPLAY:
+        if not replay_path:
+            raise ValueError("The replay backend needs an event file")
+        return ReplayBackend(replay_path, speed)
+    raise ValueError(f"Unknown input backend: {name}")
+
+
+def backend_names():
+    """Return the names accepted by create_backend."""
+    return [BACKEND_EVDEV, BACKEND_TK, BACKEND_REPLAY]
@@ -0,0 +1,201 @@
+"""
+KeyAura Key Model
+Stable integer IDs for physical keys and compact tables indexed by them.
+A key's ID is the Linux input keycode of its position, so every physical
+key, including left and right modifiers, has its own ID and name.
+
+Templates keep storing {key name: sound path} JSON; KeySoundTable reads and
+writes that format while keeping sounds and gains in arrays, so playing a
+key is an index operation rather than a string lookup.
+"""
+
+from array import array
+from collections.abc import MutableMapping
+
+KEY_IDS = {
+    "Esc": 1, "1": 2, "2": 3, "3": 4, "4": 5, "5": 6, "6": 7, "7": 8, "8": 9, "9": 10, "0": 11,
+    "-": 12, "=": 13, "Backspace": 14, "Tab": 15,
+    "Q": 16, "W": 17, "E": 18, "R": 19, "T": 20, "Y": 21, "U": 22, "I": 23, "O": 24, "P": 25,
+    "[": 26, "]": 27, "Enter": 28, "LCtrl": 29,
+    "A": 30, "S": 31, "D": 32, "F": 33, "G": 34, "H": 35, "J": 36, "K": 37, "L": 38,
+    ";": 39, "'": 40, "`": 41, "LShift": 42, "\\": 43,
+    "Z": 44, "X": 45, "C": 46, "V": 47, "B": 48, "N": 49, "M": 50,
+    ",": 51, ".": 52, "/": 53, "RShift": 54, "Num*": 55, "LAlt": 56, "Space": 57, "Caps": 58,
+    "F1": 59, "F2": 60, "F3": 61, "F4": 62, "F5": 63, "F6": 64, "F7": 65, "F8": 66, "F9": 67, "F10": 68,
+    "NumLk": 69, "ScrLk": 70, "Num7": 71, "Num8": 72, "Num9": 73, "Num-": 74,
+    "Num4": 75, "Num5": 76, "Num6": 77, "Num+": 78, "Num1": 79, "Num2": 80, "Num3": 81,
+    "Num0": 82, "Num.": 83, "F11": 87, "F12": 88, "NumEnter": 96, "RCtrl": 97, "Num/": 98,
+    "PrtSc": 99, "RAlt": 100, "Home": 102, "Up": 103, "PgUp": 104, "Left": 105, "Right": 106,
+    "End": 107, "Down": 108, "PgDn": 109, "Ins": 110, "Del": 111, "Pause": 119,
+    "LWin": 125, "RWin": 126, "Menu": 127,
+}
+KEY_NAMES = {key_id: name for name, key_id in KEY_IDS.items()}
+KEY_ID_COUNT = max(KEY_IDS.values()) + 1
+
+# Names from before left and right modifiers were told apart; reading one
+# gives the left key, writing one sets both
+MODIFIER_ALIASES = {
+    "Shift": ("LShift", "RShift"),
+    "Ctrl": ("LCtrl", "RCtrl"),
+    "Alt": ("LAlt", "RAlt"),
+    "Win": ("LWin", "RWin"),
+}
+KEY_IDS.update({alias: KEY_IDS[left] for alias, (left, right) in MODIFIER_ALIASES.items()})
+
+
+def key_id(key):
+    """Return the ID of a key name or ID, or None if there is no such key."""
+    if isinstance(key, int):
+        return key if key in KEY_NAMES else None
+    return KEY_IDS.get(key)
+
+
+def key_ids(key):
+    """Return every key ID a key name or ID stands for (both sides for a modifier alias)."""
+    if key in MODIFIER_ALIASES:
+        return [KEY_IDS[name] for name in MODIFIER_ALIASES[key]]
+    found = key_id(key)
+    return [] if found is None else [found]
+
+
+def key_name(key):
+    """Return the name of a key ID (names are returned unchanged)."""
+    return KEY_NAMES.get(key) if isinstance(key, int) else key
+
+
+class KeySoundTable(MutableMapping):
+    """Sound path and gain of every key, held in arrays indexed by key ID.
+
+    As a mapping it is keyed by key name, like the JSON it is loaded from:
+    keys iterate as names, and key IDs are accepted wherever names are.
+    Paths are interned to small handles, so a key costs two array slots.
+    """
+
+    def __init__(self, key_sounds=None, key_gains=None):
+        self.handles = array('H', [0]) * KEY_ID_COUNT
+        self.gains = array('f', [1.0]) * KEY_ID_COUNT
+        self.paths = [None]
+        self._path_handles = {}
+        if key_sounds:
+            self.load(key_sounds, key_gains)
+
+    def load(self, key_sounds, key_gains=None):
+        """Add {name: path} and {name: gain} from a template, skipping unknown keys."""
+        for key, path in key_sounds.items():
+            if not key_ids(key):
+                print(f"Ignoring sound for unknown key {key}")
+                continue
+            if path:
+                self[key] = path
+        for key, gain in (key_gains or {}).items():
+            for found in key_ids(key):
+                self.gains[found] = gain
+
+    def sound_at(self, key_id):
+        """Return the sound path of a key ID, or None. This is the press path."""
+        return self.paths[self.handles[key_id]]
+
+    def _handle(self, path):
+        handle = self._path_handles.get(path)
+        if handle is None:
+            handle = len(self.paths)
+            self.paths.append(path)
+            self._path_handles[path] = handle
+        return handle
+
+    def _ids(self, key):
+        found = key_ids(key)
+        if not found:
+            raise KeyError(key)
+        return found
+
+    def __getitem__(self, key):
+        path = self.sound_at(self._ids(key)[0])
+        if path is None:
+            raise KeyError(key)
+        return path
+
+    def __setitem__(self, key, path):
+        handle = self._handle(path) if path else 0
+        for found in self._ids(key):
+            self.handles[found] = handle
+
+    def __delitem__(self, key):
+        found = [i for i in self._ids(key) if self.handles[i]]
+        if not found:
+            raise KeyError(key)
+        for i in found:
+            self.handles[i] = 0
+
+    def __iter__(self):
+        for i, handle in enumerate(self.handles):
+            if handle:
+                yield KEY_NAMES[i]
+
+    def __len__(self):
+        return sum(1 for handle in self.handles if handle)
+
+    def copy(self):
+        """Return the sounds as a {name: path} dict, as stored in templates."""
+        return dict(self.items())
+
+    def gain(self, key):
+        """Return the linear gain of a key."""
+        return self.gains[self._ids(key)[0]]
+
+    def set_gain(self, key, gain):
+        """Set the linear gain of a key (1.0 leaves its sound unchanged)."""
+        for found in self._ids(key):
+            self.gains[found] = gain
+
+    def key_gains(self):
+        """Return {name: gain} of the keys whose gain is not 1.0."""
+        return {KEY_NAMES[i]: gain for i, gain in enumerate(self.gains) if gain != 1.0}
+
+
+class KeySet:
+    """A set of keys stored as a bitset of key IDs. Iterates as key names."""
+
+    def __init__(self, keys=()):
+        self.bits = 0
+        for key in keys:
+            self.add(key)
+
+    def add(self, key):
+        for found in key_ids(key):
+            self.bits |= 1 << found
+
+    def discard(self, key):
+        for found in key_ids(key):
+            self.bits &= ~(1 << found)
+
+    def remove(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self.discard(key)
+
+    def clear(self):
+        self.bits = 0
+
+    def __contains__(self, key):
+        found = key_id(key)
+        return found is not None and bool(self.bits >> found & 1)
+
+    def ids(self):
+        """Return the key IDs in the set, in ascending order."""
+        bits = self.bits
+        found = []
+        while bits:
+            low = bits & -bits
+            found.append(low.bit_length() - 1)
+            bits ^= low
+        return found
+
+    def __iter__(self):
+        return (KEY_NAMES[i] for i in self.ids())
+
+    def __len__(self):
+        return bin(self.bits).count("1")
+
+    def __bool__(self):
+        return self.bits != 0
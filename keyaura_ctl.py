@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+KeyAura Control Client
+Sends commands to a running KeyAura daemon over its control socket.
+
+Usage:
+    python keyaura_ctl.py [--socket PATH] template NAME
+    python keyaura_ctl.py [--socket PATH] volume 0.5
+    python keyaura_ctl.py [--socket PATH] mute [on|off|toggle]
+    python keyaura_ctl.py [--socket PATH] press KEY
+    python keyaura_ctl.py [--socket PATH] stats
+    python keyaura_ctl.py [--socket PATH] bench [--count 1000]
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from bench_latency import percentile
+from control_socket import MUTE_OFF, MUTE_ON, MUTE_TOGGLE, ControlClient
+
+MUTE_MODES = {"on": MUTE_ON, "off": MUTE_OFF, "toggle": MUTE_TOGGLE}
+
+
+def bench(client, count):
+    """Time count round trips of ping and set-volume requests. Returns a report dict."""
+    volume = client.stats()["state"]["volume"]
+    report = {}
+    for name, request in (("ping", client.ping), ("volume", lambda: client.set_volume(volume))):
+        timings = []
+        for _ in range(count):
+            start = time.perf_counter()
+            request()
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        report[name] = {
+            "count": count,
+            "mean_us": sum(timings) / count * 1e6,
+            "p50_us": percentile(timings, 0.50) * 1e6,
+            "p99_us": percentile(timings, 0.99) * 1e6,
+            "max_us": timings[-1] * 1e6,
+        }
+    return report
+
+
+def main(argv=None):
+    """Parse arguments and send one command."""
+    parser = argparse.ArgumentParser(description="Control a running KeyAura daemon.")
+    parser.add_argument("--socket", help="control socket path (default: per-user runtime dir)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("ping", help="check that the daemon answers")
+    template_parser = commands.add_parser("template", help="switch to a template")
+    template_parser.add_argument("name")
+    volume_parser = commands.add_parser("volume", help="set the volume (0-1)")
+    volume_parser.add_argument("value", type=float)
+    mute_parser = commands.add_parser("mute", help="mute, unmute or toggle")
+    mute_parser.add_argument("mode", nargs="?", choices=sorted(MUTE_MODES), default="toggle")
+    press_parser = commands.add_parser("press", help="play a key's sound")
+    press_parser.add_argument("key")
+    commands.add_parser("stats", help="print engine stats as JSON")
+    bench_parser = commands.add_parser("bench", help="measure command round-trip time")
+    bench_parser.add_argument("--count", type=int, default=1000, help="round trips per command")
+    args = parser.parse_args(argv)
+
+    try:
+        client = ControlClient(args.socket)
+    except (OSError, RuntimeError) as e:
+        print(f"Cannot connect to KeyAura: {e}", file=sys.stderr)
+        return 1
+
+    try:
+        if args.command == "ping":
+            start = time.perf_counter()
+            client.ping()
+            print(f"pong in {(time.perf_counter() - start) * 1e6:.0f} us")
+        elif args.command == "template":
+            client.use_template(args.name)
+        elif args.command == "volume":
+            client.set_volume(args.value)
+        elif args.command == "mute":
+            print("muted" if client.mute(MUTE_MODES[args.mode]) else "unmuted")
+        elif args.command == "press":
+            if not client.press(args.key):
+                print(f"Key {args.key} has no sound")
+        elif args.command == "stats":
+            print(json.dumps(client.stats(), indent=2))
+        elif args.command == "bench":
+            print(json.dumps(bench(client, args.count), indent=2))
+    except (OSError, RuntimeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
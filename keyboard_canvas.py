@@ -0,0 +1,124 @@
+"""
+KeyAura Keyboard Canvas
+Draws a whole keyboard layout on one Tk canvas: a rounded rectangle and a
+label per key, instead of a CTkButton and font per key. The canvas items
+are reused when the layout changes, clicks are resolved through the
+layout's cached hit-test grid, and highlighting a key only recolours its
+rectangle.
+"""
+
+import tkinter as tk
+
+from keyboard_layouts import DEFAULT_LAYOUT, LAYOUTS, key_index_at, key_label, layout_keys, layout_size
+
+KEY_FILL = "#2d2d2d"
+KEY_OUTLINE = "#3d3d3d"
+KEY_TEXT = "#ffffff"
+UNIT = 40
+KEY_GAP = 5
+MARGIN = 10
+CORNER_RADIUS = 8
+
+
+def rounded_rectangle(x1, y1, x2, y2, radius=CORNER_RADIUS):
+    """Return polygon points that draw a rounded rectangle with smooth=True."""
+    return [x1 + radius, y1, x2 - radius, y1, x2, y1, x2, y1 + radius,
+            x2, y2 - radius, x2, y2, x2 - radius, y2, x1 + radius, y2,
+            x1, y2, x1, y2 - radius, x1, y1 + radius, x1, y1]
+
+
+class KeyboardCanvas(tk.Canvas):
+    """A clickable keyboard drawn on a single canvas.
+
+    on_click(key) is called with the key name under a click. Colours set
+    with set_key_colors are kept per key name, so they survive layout
+    changes.
+    """
+
+    def __init__(self, master, layout=DEFAULT_LAYOUT, on_click=None, unit=UNIT, bg="#1a1a1a"):
+        super().__init__(master, bg=bg, highlightthickness=0)
+        self.on_click = on_click
+        self.unit = unit
+        self.layout = None
+        self.font = ("Arial", max(8, unit // 4), "bold")
+
+        # Canvas items are pooled: one (rectangle, label) pair per key of the
+        # largest layout shown so far, reused by every layout
+        self._items = []
+        self._specs = ()
+        self._key_items = {}
+        self._colors = {}
+
+        self.bind("<Button-1>", self._on_click)
+        self.set_layout(layout)
+
+    def set_layout(self, layout):
+        """Show another layout, reusing the existing canvas items."""
+        if layout not in LAYOUTS:
+            print(f"Unknown keyboard layout {layout}, using {DEFAULT_LAYOUT}")
+            layout = DEFAULT_LAYOUT
+        if layout == self.layout:
+            return
+        self.layout = layout
+        self._specs = layout_keys(layout)
+        width, height = layout_size(layout)
+        self.configure(width=int(width * self.unit) + 2 * MARGIN, height=int(height * self.unit) + 2 * MARGIN)
+
+        while len(self._items) < len(self._specs):
+            rectangle = self.create_polygon(0, 0, 0, 0, smooth=True, width=2)
+            label = self.create_text(0, 0, fill=KEY_TEXT, font=self.font)
+            self._items.append((rectangle, label))
+
+        self._key_items = {}
+        for (rectangle, label), spec in zip(self._items, self._specs):
+            x1, y1, x2, y2 = self.key_bounds(spec)
+            self.coords(rectangle, *rounded_rectangle(x1, y1, x2, y2))
+            self.coords(label, (x1 + x2) / 2, (y1 + y2) / 2)
+            fill, outline = self._colors.get(spec.key, (KEY_FILL, KEY_OUTLINE))
+            self.itemconfigure(rectangle, fill=fill, outline=outline, state="normal")
+            self.itemconfigure(label, text=key_label(spec.key), state="normal")
+            self._key_items.setdefault(spec.key, []).append(rectangle)
+        for rectangle, label in self._items[len(self._specs):]:
+            self.itemconfigure(rectangle, state="hidden")
+            self.itemconfigure(label, state="hidden")
+
+    def key_bounds(self, spec):
+        """Return the pixel rectangle of a key."""
+        half_gap = KEY_GAP / 2
+        return (MARGIN + spec.x * self.unit + half_gap,
+                MARGIN + spec.y * self.unit + half_gap,
+                MARGIN + (spec.x + spec.width) * self.unit - half_gap,
+                MARGIN + (spec.y + spec.height) * self.unit - half_gap)
+
+    def keys(self):
+        """Return the distinct key names of the current layout, in drawing order."""
+        return list(self._key_items)
+
+    def key_at(self, x, y):
+        """Return the key name at canvas pixel (x, y), or None."""
+        index = key_index_at(self.layout, (x - MARGIN) / self.unit, (y - MARGIN) / self.unit)
+        return None if index is None else self._specs[index].key
+
+    def key_colors(self, key):
+        """Return the (fill, outline) colours of a key."""
+        return self._colors.get(key, (KEY_FILL, KEY_OUTLINE))
+
+    def set_key_colors(self, key, fill=None, outline=None):
+        """Recolour a key; None keeps the current colour."""
+        current_fill, current_outline = self.key_colors(key)
+        colors = (fill or current_fill, outline or current_outline)
+        if colors == (KEY_FILL, KEY_OUTLINE):
+            self._colors.pop(key, None)
+        else:
+            self._colors[key] = colors
+        for rectangle in self._key_items.get(key, ()):
+            self.itemconfigure(rectangle, fill=colors[0], outline=colors[1])
+
+    def reset_key_colors(self, key):
+        """Give a key its default colours back."""
+        self.set_key_colors(key, KEY_FILL, KEY_OUTLINE)
+
+    def _on_click(self, event):
+        key = self.key_at(self.canvasx(event.x), self.canvasy(event.y))
+        if key is not None and self.on_click is not None:
+            self.on_click(key)
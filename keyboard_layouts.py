@@ -0,0 +1,140 @@
+"""
+KeyAura Keyboard Layouts
+Physical keyboard layouts from 60% to a full 104 key board, described as
+rows of keys in key units (1u = one letter key). Geometry and hit-test grids
+are computed once per layout and cached; nothing here imports a GUI toolkit.
+
+A row is a list of items: a key name is a 1u key, ("Name", width) or
+("Name", width, height) sizes a key, and a bare number is a gap.
+"""
+
+from array import array
+from collections import namedtuple
+from functools import lru_cache
+
+KeySpec = namedtuple("KeySpec", ["key", "x", "y", "width", "height"])
+
+HIT_RESOLUTION = 4  # hit-test cells per key unit
+
+NUMBER_ROW = ["`", "1", "2", "3", "4", "5", "6", "7", "8", "9", "0", "-", "=", ("Backspace", 2)]
+TOP_ROW = [("Tab", 1.5), "Q", "W", "E", "R", "T", "Y", "U", "I", "O", "P", "[", "]", ("\\", 1.5)]
+HOME_ROW = [("Caps", 1.75), "A", "S", "D", "F", "G", "H", "J", "K", "L", ";", "'", ("Enter", 2.25)]
+SHIFT_ROW = [("LShift", 2.25), "Z", "X", "C", "V", "B", "N", "M", ",", ".", "/", ("RShift", 2.75)]
+BOTTOM_ROW = [("LCtrl", 1.25), ("LWin", 1.25), ("LAlt", 1.25), ("Space", 6.25),
+              ("RAlt", 1.25), ("RWin", 1.25), ("Menu", 1.25), ("RCtrl", 1.25)]
+FUNCTION_ROW = ["Esc", 1, "F1", "F2", "F3", "F4", 0.5, "F5", "F6", "F7", "F8", 0.5, "F9", "F10", "F11", "F12"]
+
+# Compact boards shorten the right Shift and bottom row to fit the arrows
+COMPACT_SHIFT_ROW = SHIFT_ROW[:-1] + [("RShift", 1.75), "Up"]
+COMPACT_BOTTOM_ROW = [("LCtrl", 1.25), ("LWin", 1.25), ("LAlt", 1.25), ("Space", 6.25),
+                      "RAlt", "Menu", "RCtrl", "Left", "Down", "Right"]
+MAIN_ROWS = [NUMBER_ROW, TOP_ROW, HOME_ROW, SHIFT_ROW, BOTTOM_ROW]
+NAVIGATION_ROWS = [["Ins", "Home", "PgUp"], ["Del", "End", "PgDn"], [], [1, "Up"], ["Left", "Down", "Right"]]
+NUMPAD_ROWS = [
+    ["NumLk", "Num/", "Num*", "Num-"],
+    ["Num7", "Num8", "Num9", ("Num+", 1, 2)],
+    ["Num4", "Num5", "Num6"],
+    ["Num1", "Num2", "Num3", ("NumEnter", 1, 2)],
+    [("Num0", 2), "Num."],
+]
+TENKEYLESS_BLOCKS = [
+    (0, 0, [FUNCTION_ROW]),
+    (15.25, 0, [["PrtSc", "ScrLk", "Pause"]]),
+    (0, 1.25, MAIN_ROWS),
+    (15.25, 1.25, NAVIGATION_ROWS),
+]
+
+# Each layout is a list of (x, y, rows) blocks
+LAYOUTS = {
+    "60%": [(0, 0, MAIN_ROWS)],
+    "67%": [(0, 0, [
+        NUMBER_ROW + ["Del"],
+        TOP_ROW + ["PgUp"],
+        HOME_ROW + ["PgDn"],
+        COMPACT_SHIFT_ROW + ["End"],
+        COMPACT_BOTTOM_ROW,
+    ])],
+    "75%": [(0, 0, [
+        ["Esc", "F1", "F2", "F3", "F4", "F5", "F6", "F7", "F8", "F9", "F10", "F11", "F12", "PrtSc", "Ins", "Del"],
+        NUMBER_ROW + ["Home"],
+        TOP_ROW + ["PgUp"],
+        HOME_ROW + ["PgDn"],
+        COMPACT_SHIFT_ROW + ["End"],
+        COMPACT_BOTTOM_ROW,
+    ])],
+    "80%": TENKEYLESS_BLOCKS,
+    "100%": TENKEYLESS_BLOCKS + [(18.5, 1.25, NUMPAD_ROWS)],
+}
+DEFAULT_LAYOUT = "100%"
+
+LABELS = {"NumLk": "Num", "NumEnter": "Enter"}
+LABELS.update({side + name: name for side in "LR" for name in ("Shift", "Ctrl", "Alt", "Win")})
+
+
+def layout_names():
+    """Return the names of all layouts, smallest first."""
+    return list(LAYOUTS)
+
+
+def key_label(key):
+    """Return the text drawn on a key."""
+    if key in LABELS:
+        return LABELS[key]
+    if key.startswith("Num") and len(key) > 3:
+        return key[3:]
+    return key
+
+
+@lru_cache(maxsize=None)
+def layout_keys(name):
+    """Return the KeySpecs of a layout, in key units."""
+    if name not in LAYOUTS:
+        raise ValueError(f"Unknown keyboard layout: {name}")
+    keys = []
+    for x0, y0, rows in LAYOUTS[name]:
+        for row_index, row in enumerate(rows):
+            x = x0
+            for item in row:
+                if isinstance(item, (int, float)):
+                    x += item
+                    continue
+                if isinstance(item, str):
+                    key, width, height = item, 1, 1
+                else:
+                    key, width, height = item[0], item[1], item[2] if len(item) > 2 else 1
+                keys.append(KeySpec(key, x, y0 + row_index, width, height))
+                x += width
+    return tuple(keys)
+
+
+@lru_cache(maxsize=None)
+def layout_size(name):
+    """Return (width, height) of a layout in key units."""
+    keys = layout_keys(name)
+    return max(k.x + k.width for k in keys), max(k.y + k.height for k in keys)
+
+
+@lru_cache(maxsize=None)
+def hit_grid(name):
+    """Return (columns, rows, cells) mapping grid cells to indexes in layout_keys(name), -1 for none."""
+    width, height = layout_size(name)
+    columns = int(round(width * HIT_RESOLUTION))
+    rows = int(round(height * HIT_RESOLUTION))
+    cells = array('h', [-1]) * (columns * rows)
+    for index, spec in enumerate(layout_keys(name)):
+        left = int(round(spec.x * HIT_RESOLUTION))
+        right = int(round((spec.x + spec.width) * HIT_RESOLUTION))
+        for row in range(int(round(spec.y * HIT_RESOLUTION)), int(round((spec.y + spec.height) * HIT_RESOLUTION))):
+            cells[row * columns + left:row * columns + right] = array('h', [index]) * (right - left)
+    return columns, rows, cells
+
+
+def key_index_at(name, x, y):
+    """Return the index of the key at (x, y) key units in a layout, or None."""
+    columns, rows, cells = hit_grid(name)
+    column = int(x * HIT_RESOLUTION)
+    row = int(y * HIT_RESOLUTION)
+    if not (0 <= column < columns and 0 <= row < rows):
+        return None
+    index = cells[row * columns + column]
+    return None if index < 0 else index
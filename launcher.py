@@ -2,6 +2,9 @@
 """
 KeyAura Launcher
 A simple launcher script that checks dependencies and starts the KeyAura application.
+
+Run "python launcher.py --daemon [daemon options]" to start the headless
+background daemon instead of the window; see daemon.py for its options.
 """
 
 import sys
@@ -48,6 +51,9 @@ def main():
     print("🎹 KeyAura Launcher")
     print("=" * 50)
     
+    # The daemon needs no GUI toolkit
+    daemon_mode = len(sys.argv) > 1 and sys.argv[1] == "--daemon"
+    
     # Check Python version
     if not check_python_version():
         sys.exit(1)
@@ -59,6 +65,8 @@ def main():
         ("pygame", "Pygame"),
         ("PIL", "Pillow")
     ]
+    if daemon_mode:
+        dependencies = [("pygame", "Pygame")]
     
     missing_deps = []
     for module, package in dependencies:
@@ -82,6 +90,12 @@ def main():
         print("   Please run this launcher from the KeyAura directory.")
         sys.exit(1)
     
+    # Start the background daemon
+    if daemon_mode:
+        print("\n🚀 Starting KeyAura daemon...")
+        import daemon
+        sys.exit(daemon.main(sys.argv[2:]))
+    
     # Start the application
     print("\n🚀 Starting KeyAura...")
     try:
@@ -0,0 +1,156 @@
+"""
+KeyAura Loudness Normalization
+Measures the loudness of every sound in a template and derives a per-sound
+gain so keys from different sources play at a similar level. Gains are
+applied once when a sound is built, never per key press.
+"""
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from transcode import read_pcm_samples, write_atomic
+
+LOUDNESS_FILE = "loudness.json"
+DEFAULT_WINDOW_MS = 10.0
+ABSOLUTE_GATE_DB = -70.0
+MAX_GAIN_DB = 12.0
+BATCH_SIZE = 64
+SILENCE_DB = -120.0
+
+
+def _to_db(power):
+    return 10.0 * np.log10(np.maximum(power, 10.0 ** (SILENCE_DB / 10.0)))
+
+
+def measure_loudness(sample_arrays, sample_rate, window_ms=DEFAULT_WINDOW_MS):
+    """Measure gated RMS loudness and peak of many sounds in one vectorized pass.
+
+    All sounds are cut into equal windows and concatenated, so the window
+    energies, the absolute gate (as in LUFS, windows below -70 dBFS are
+    ignored) and the per-sound sums are a handful of array operations for
+    the whole batch. Returns (loudness_db, peak_db) arrays.
+    """
+    window = max(1, int(sample_rate * window_ms / 1000.0))
+    counts = np.array([max(1, s.shape[0] // window) for s in sample_arrays])
+    powers = []
+    peaks = np.empty(len(sample_arrays), dtype=np.float64)
+    for i, samples in enumerate(sample_arrays):
+        usable = (samples.shape[0] // window) * window
+        if usable == 0:
+            # Shorter than one window: treat the whole sound as one window
+            padded = np.zeros((window, samples.shape[1]), dtype=np.float32)
+            padded[:samples.shape[0]] = samples
+            samples, usable = padded, window
+        powers.append(np.square(samples[:usable]).mean(axis=1))
+        peaks[i] = float(np.abs(samples).max()) if samples.size else 0.0
+
+    window_power = np.concatenate(powers).reshape(-1, window).mean(axis=1)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    gated = window_power >= 10.0 ** (ABSOLUTE_GATE_DB / 10.0)
+    gated_sum = np.add.reduceat(np.where(gated, window_power, 0.0), starts)
+    gated_count = np.add.reduceat(gated.astype(np.int64), starts)
+    mean_power = np.where(gated_count > 0, gated_sum / np.maximum(gated_count, 1), 0.0)
+    return _to_db(mean_power), _to_db(np.square(peaks))
+
+
+def normalization_gains(measurements, target_db=None, max_gain_db=MAX_GAIN_DB):
+    """Return {path: gain_db} bringing every sound to target_db.
+
+    The target defaults to the median loudness of the set, so the template's
+    overall level stays about the same. Gains are limited to +/- max_gain_db
+    and never push a sound's peak above full scale.
+    """
+    audible = {p: m for p, m in measurements.items() if m[0] > SILENCE_DB}
+    if not audible:
+        return {}
+    if target_db is None:
+        target_db = float(np.median([m[0] for m in audible.values()]))
+
+    gains = {}
+    for path, (loudness_db, peak_db) in audible.items():
+        gain = min(max(target_db - loudness_db, -max_gain_db), max_gain_db)
+        gains[path] = round(min(gain, -peak_db), 2)
+    return gains
+
+
+class LoudnessAnalyzer:
+    """Measures sounds on a thread pool and caches results by content hash."""
+
+    def __init__(self, transcoder, max_workers=None):
+        if np is None:
+            raise RuntimeError("NumPy is required for loudness normalization")
+        self.transcoder = transcoder
+        self.max_workers = max_workers or min(8, (os.cpu_count() or 1))
+        self._lock = threading.Lock()
+        self._cache_path = os.path.join(transcoder.cache_dir, LOUDNESS_FILE)
+        self._cache = self._load_cache()
+        self.analyzed = 0
+        self.reused = 0
+
+    def _load_cache(self):
+        if not os.path.exists(self._cache_path):
+            return {}
+        try:
+            with open(self._cache_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading loudness cache: {e}")
+            return {}
+
+    def _measure_batch(self, batch):
+        sample_rate = pygame.mixer.get_init()[0]
+        arrays = [read_pcm_samples(self.transcoder.transcode(path)) for path, _ in batch]
+        loudness, peaks = measure_loudness(arrays, sample_rate)
+        return [(digest, [float(l), float(p)]) for (_, digest), l, p in zip(batch, loudness, peaks)]
+
+    def analyze(self, paths):
+        """Return {path: (loudness_db, peak_db)}, measuring only unseen content."""
+        paths = [p for p in dict.fromkeys(paths) if p]
+        digests = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for path, result in zip(paths, pool.map(self._safe_hash, paths)):
+                if result is not None:
+                    digests[path] = result
+
+            pending = {}
+            for path, digest in digests.items():
+                if digest not in self._cache:
+                    pending.setdefault(digest, path)
+            todo = [(path, digest) for digest, path in pending.items()]
+            batches = [todo[i:i + BATCH_SIZE] for i in range(0, len(todo), BATCH_SIZE)]
+            for results in pool.map(self._safe_measure, batches):
+                with self._lock:
+                    self._cache.update(results)
+                self.analyzed += len(results)
+
+        if todo:
+            with self._lock:
+                write_atomic(self._cache_path, json.dumps(self._cache, indent=2).encode("utf-8"))
+        self.reused += len(digests) - len(todo)
+
+        return {path: tuple(self._cache[digest]) for path, digest in digests.items() if digest in self._cache}
+
+    def _safe_hash(self, path):
+        try:
+            # Transcoding here spreads first-time decoding across the pool
+            self.transcoder.transcode(path)
+            return self.transcoder.content_hash(path)
+        except (OSError, pygame.error) as e:
+            print(f"Error reading {path} for loudness analysis: {e}")
+            return None
+
+    def _safe_measure(self, batch):
+        try:
+            return self._measure_batch(batch)
+        except (OSError, pygame.error) as e:
+            print(f"Error measuring loudness: {e}")
+            return []
@@ -1,11 +1,18 @@
 import customtkinter as ctk
-import pygame
-import json
 import os
 from tkinter import filedialog, messagebox
-from PIL import Image, ImageTk
 import threading
-import time
+
+from control_socket import UNIX_SOCKETS, ControlServer, WindowControls
+from engine import KeyAuraEngine
+from highlight_animator import HighlightAnimator
+from key_model import KeySet
+from keyboard_canvas import KeyboardCanvas
+from keyboard_layouts import layout_names
+from mixer_config import PROFILE_CUSTOM, profile_names
+from status_bar import StatusBar
+from template_list import TemplateList
+from typing_input import TypingInput
 
 # Configure CustomTkinter appearance
 ctk.set_appearance_mode("dark")
@@ -18,28 +25,15 @@ class KeyAura:
         self.root.geometry("1600x1000")
         self.root.minsize(1400, 900)
         
-        # Initialize pygame mixer
-        pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
-        
-        # Application state
-        self.sound_enabled = True
-        self.current_template = None
-        self.templates = {}
-        self.key_sounds = {}
-        self.template_dir = "templates"
-        self.sounds_dir = "sounds"
-        self.volume = 0.7
+        # Audio, key sounds and templates live in the UI-free engine
+        self.engine = KeyAuraEngine(on_error=self.show_audio_error, confirm=self.confirm)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
-        # Multi-key selection state
-        self.selected_keys = set()
+        # Multi-key selection state, a bitset of key IDs
+        self.selected_keys = KeySet()
         self.ctrl_pressed = False
-        
-        # Create directories if they don't exist
-        os.makedirs(self.template_dir, exist_ok=True)
-        os.makedirs(self.sounds_dir, exist_ok=True)
-        
-        # Load existing templates
-        self.load_templates()
+        self._selected_keys_text = None
+        self._selected_keys_display_pending = False
         
         # Bind keyboard events for Ctrl key detection
         self.root.bind('<KeyPress>', self.on_key_press)
@@ -48,6 +42,9 @@ class KeyAura:
         # Create UI
         self.create_ui()
         
+        # Scripts can switch template, volume and mute over the control socket
+        self.control = self.start_control_socket()
+        
     def create_ui(self):
         # Configure grid weights for responsive layout
         self.root.grid_columnconfigure(0, weight=1)
@@ -62,6 +59,10 @@ class KeyAura:
         # Top Bar
         self.create_top_bar(main_frame)
         
+        # Status Bar - non-modal messages and errors
+        self.status_bar = StatusBar(main_frame)
+        self.status_bar.grid(row=2, column=0, sticky="ew", pady=(15, 0))
+        
         # Content Area with responsive layout
         content_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
         content_frame.grid(row=1, column=0, sticky="nsew", pady=(20, 0))
@@ -116,6 +117,21 @@ class KeyAura:
         controls_frame = ctk.CTkFrame(top_frame, fg_color="transparent")
         controls_frame.grid(row=0, column=2, padx=20, pady=15)
         
+        # Mixer latency profile
+        self.profile_var = ctk.StringVar(value=self.engine.audio_settings["profile"])
+        profile_menu = ctk.CTkOptionMenu(
+            controls_frame,
+            values=profile_names(),
+            variable=self.profile_var,
+            command=self.set_mixer_profile,
+            fg_color="#2d2d2d",
+            button_color="#4a90e2",
+            button_hover_color="#357abd",
+            width=150,
+            height=35
+        )
+        profile_menu.pack(side="left", padx=(0, 15))
+        
         # Volume control
         volume_frame = ctk.CTkFrame(controls_frame, fg_color="transparent")
         volume_frame.pack(side="left", padx=(0, 15))
@@ -131,7 +147,7 @@ class KeyAura:
             command=self.set_volume,
             width=120
         )
-        self.volume_slider.set(self.volume)
+        self.volume_slider.set(self.engine.volume)
         self.volume_slider.pack(side="left")
         
         # Sound Toggle Button
@@ -206,7 +222,7 @@ class KeyAura:
         self.layout_var = ctk.StringVar(value="100%")
         layout_menu = ctk.CTkOptionMenu(
             layout_frame,
-            values=["67%", "75%", "100%"],
+            values=layout_names(),
             variable=self.layout_var,
             command=self.change_layout,
             fg_color="#2d2d2d",
@@ -226,59 +242,15 @@ class KeyAura:
         self.create_keyboard_keys(keys_container)
         
     def create_keyboard_keys(self, parent):
-        # Define key rows with proper spacing and additional keys
-        key_rows = [
-            ["Q", "W", "E", "R", "T", "Y", "U", "I", "O", "P"],
-            ["A", "S", "D", "F", "G", "H", "J", "K", "L"],
-            ["Shift", "Z", "X", "C", "V", "B", "N", "M", "Shift"],
-            ["Ctrl", "Space", "Enter", "Ctrl"]
-        ]
-        
-        # Create main keys frame
-        keys_frame = ctk.CTkFrame(parent, fg_color="transparent")
-        keys_frame.pack(pady=10, fill="x")
-        
-        self.key_buttons = {}
-        
-        for row_idx, row in enumerate(key_rows):
-            row_frame = ctk.CTkFrame(keys_frame, fg_color="transparent")
-            row_frame.pack(pady=8, fill="x")
-            
-            # Add offset for second and third rows
-            if row_idx == 1:
-                offset_frame = ctk.CTkFrame(row_frame, fg_color="transparent", width=30)
-                offset_frame.pack(side="left")
-            elif row_idx == 2:
-                offset_frame = ctk.CTkFrame(row_frame, fg_color="transparent", width=60)
-                offset_frame.pack(side="left")
-            elif row_idx == 3:
-                offset_frame = ctk.CTkFrame(row_frame, fg_color="transparent", width=90)
-                offset_frame.pack(side="left")
-            
-            for key in row:
-                # Determine button size based on key type
-                if key in ["Space", "Enter"]:
-                    width, height = 120, 55
-                elif key in ["Shift", "Ctrl"]:
-                    width, height = 80, 55
-                else:
-                    width, height = 55, 55
-                
-                key_btn = ctk.CTkButton(
-                    row_frame,
-                    text=key,
-                    width=width,
-                    height=height,
-                    command=lambda k=key: self.on_key_click(k),
-                    fg_color="#2d2d2d",
-                    hover_color="#4a90e2",
-                    corner_radius=12,
-                    font=ctk.CTkFont(size=16, weight="bold"),
-                    border_width=2,
-                    border_color="#3d3d3d"
-                )
-                key_btn.pack(side="left", padx=4)
-                self.key_buttons[key] = key_btn
+        # Every key of the layout is drawn on one canvas
+        self.keyboard = KeyboardCanvas(parent, layout=self.layout_var.get(), on_click=self.on_key_click)
+        self.keyboard.pack(pady=10)
+        
+        # Selection and press flashes are drawn by one frame tick
+        self.highlights = HighlightAnimator(self.root, self.keyboard)
+        
+        # Keys typed on the physical keyboard play and flash too
+        self.typing = TypingInput(self.root, self.engine, on_key=self.highlights.flash)
                 
     def create_sound_customization(self, parent):
         sound_frame = ctk.CTkFrame(parent, fg_color="#1a1a1a", corner_radius=15)
@@ -404,13 +376,28 @@ class KeyAura:
         )
         template_title.grid(row=0, column=0, pady=(20, 15), sticky="w", padx=20)
         
-        # Templates List
-        self.templates_list_frame = ctk.CTkScrollableFrame(
+        # Templates List (only the visible cards exist)
+        self.templates_list = TemplateList(
             template_frame,
-            fg_color="transparent",
+            on_use=self.use_template,
+            on_edit=self.edit_template,
+            on_delete=self.delete_template,
             height=500
         )
-        self.templates_list_frame.grid(row=1, column=0, sticky="nsew", padx=15, pady=(0, 20))
+        self.templates_list.grid(row=1, column=0, sticky="nsew", padx=15, pady=(0, 10))
+        
+        # Template loading progress
+        self.template_progress_label = ctk.CTkLabel(
+            template_frame,
+            text="",
+            font=ctk.CTkFont(size=12),
+            text_color="#888888"
+        )
+        self.template_progress_label.grid(row=2, column=0, sticky="w", padx=20)
+        
+        self.template_progress = ctk.CTkProgressBar(template_frame, progress_color="#00ff88")
+        self.template_progress.set(0)
+        self.template_progress.grid(row=3, column=0, sticky="ew", padx=20, pady=(5, 20))
         
         self.refresh_templates_list()
         
@@ -430,45 +417,42 @@ class KeyAura:
             # Multi-key selection mode
             if key in self.selected_keys:
                 self.selected_keys.remove(key)
-                self.key_buttons[key].configure(
-                    fg_color="#2d2d2d",
-                    border_color="#3d3d3d"
-                )
+                self.highlights.set_selected(key, False)
             else:
                 self.selected_keys.add(key)
-                self.key_buttons[key].configure(
-                    fg_color="#00ff88",
-                    border_color="#00ff88"
-                )
+                self.highlights.set_selected(key, True)
         else:
             # Single key mode - clear selection and select only this key
             self.clear_key_selection()
             self.selected_keys.add(key)
-            self.key_buttons[key].configure(
-                fg_color="#00ff88",
-                border_color="#00ff88"
-            )
+            self.highlights.set_selected(key, True)
             
-        # Update selected keys display
-        self.update_selected_keys_display()
+        # The label is redrawn once the clicks are handled, not per click
+        self.schedule_selected_keys_display()
         
         # Play sound if available
         self.play_key_sound(key)
         
     def clear_key_selection(self):
         """Clear all key selections."""
-        for key in self.selected_keys:
-            if key in self.key_buttons:
-                self.key_buttons[key].configure(
-                    fg_color="#2d2d2d",
-                    border_color="#3d3d3d"
-                )
+        self.highlights.clear_selection()
         self.selected_keys.clear()
         
+    def schedule_selected_keys_display(self):
+        """Update the selected keys display when Tk is next idle."""
+        if not self._selected_keys_display_pending:
+            self._selected_keys_display_pending = True
+            self.root.after_idle(self.update_selected_keys_display)
+            
     def update_selected_keys_display(self):
         """Update the display of selected keys."""
-        if self.selected_keys:
-            keys_text = ", ".join(sorted(self.selected_keys))
+        self._selected_keys_display_pending = False
+        # KeySet iterates in key ID order, so the text needs no sorting
+        keys_text = ", ".join(self.selected_keys)
+        if keys_text == self._selected_keys_text:
+            return
+        self._selected_keys_text = keys_text
+        if keys_text:
             self.selected_keys_label.configure(
                 text=f"Selected keys: {keys_text}",
                 text_color="#00ff88"
@@ -480,40 +464,66 @@ class KeyAura:
             )
             
     def set_volume(self, value):
-        self.volume = float(value)
-        pygame.mixer.music.set_volume(self.volume)
+        self.engine.set_volume(value)
+        
+    def apply_volume(self, volume):
+        """Set the volume from outside the slider, e.g. the control socket."""
+        self.volume_slider.set(volume)
+        self.set_volume(volume)
+        
+    def set_mixer_profile(self, profile):
+        """Re-initialize the mixer with a latency profile without restarting."""
+        try:
+            self.engine.set_mixer_profile(profile)
+        except Exception as e:
+            self.profile_var.set(PROFILE_CUSTOM)
+            messagebox.showerror("Error", f"Could not apply mixer profile '{profile}': {e}")
         
     def toggle_sound(self):
-        self.sound_enabled = not self.sound_enabled
-        if self.sound_enabled:
+        self.set_sound_enabled(not self.engine.sound_enabled)
+        
+    def set_sound_enabled(self, enabled):
+        self.engine.sound_enabled = enabled
+        if enabled:
             self.sound_button.configure(text="🔊")
         else:
             self.sound_button.configure(text="🔇")
             
     def change_layout(self, layout_type):
-        # This would implement different keyboard layouts
-        print(f"Layout changed to: {layout_type}")
+        self.keyboard.set_layout(layout_type)
         
     def play_key_sound(self, key):
-        if not self.sound_enabled:
-            return
-            
-        if key in self.key_sounds and self.key_sounds[key]:
-            try:
-                # Stop any currently playing sound
-                pygame.mixer.music.stop()
-                pygame.mixer.music.load(self.key_sounds[key])
-                pygame.mixer.music.set_volume(self.volume)
-                pygame.mixer.music.play()
+        if self.engine.press(key):
+            # Visual feedback
+            self.highlights.flash(key)
                 
-                # Visual feedback
-                original_color = self.key_buttons[key].cget("fg_color")
-                self.key_buttons[key].configure(fg_color="#4a90e2")
-                self.root.after(100, lambda: self.key_buttons[key].configure(fg_color=original_color))
-                
-            except Exception as e:
-                print(f"Error playing sound for key {key}: {e}")
-                messagebox.showerror("Error", f"Could not play sound for key {key}: {e}")
+    def show_audio_error(self, message):
+        """Show an engine error in the status bar. Called from the audio or loader thread.
+
+        The engine already limits how often this is called; nothing here
+        waits for the user.
+        """
+        self.root.after(0, self.show_error_status, message)
+        
+    def show_error_status(self, message):
+        self.status_bar.show_error(message, self.engine.errors.reported)
+        
+    def confirm(self, title, message):
+        """Ask a yes/no question for the engine, from any thread."""
+        if threading.current_thread() is threading.main_thread():
+            return messagebox.askyesno(title, message)
+            
+        # Template loads ask from their loader thread; Tk must ask on its own
+        answer = []
+        answered = threading.Event()
+        
+        def ask():
+            answer.append(messagebox.askyesno(title, message))
+            answered.set()
+            
+        self.root.after(0, ask)
+        answered.wait()
+        return answer[0]
                 
     def browse_sound_file(self):
         file_path = filedialog.askopenfilename(
@@ -527,10 +537,7 @@ class KeyAura:
         sound_path = self.sound_path_var.get()
         if sound_path and os.path.exists(sound_path):
             try:
-                pygame.mixer.music.stop()
-                pygame.mixer.music.load(sound_path)
-                pygame.mixer.music.set_volume(self.volume)
-                pygame.mixer.music.play()
+                self.engine.preview_sound(sound_path)
             except Exception as e:
                 messagebox.showerror("Error", f"Could not play sound: {e}")
         else:
@@ -548,8 +555,7 @@ class KeyAura:
             return
             
         # Apply sound to all selected keys
-        for key in self.selected_keys:
-            self.key_sounds[key] = sound_path
+        self.engine.assign_sound(self.selected_keys, sound_path)
             
         messagebox.showinfo("Success", f"Sound applied to {len(self.selected_keys)} selected keys!")
         
@@ -561,8 +567,7 @@ class KeyAura:
             return
             
         # Apply sound to all keys
-        for key in self.key_buttons.keys():
-            self.key_sounds[key] = sound_path
+        self.engine.assign_sound(self.keyboard.keys(), sound_path)
             
         messagebox.showinfo("Success", "Sound applied to all keys!")
         
@@ -573,9 +578,7 @@ class KeyAura:
             return
             
         # Clear sounds from selected keys
-        for key in self.selected_keys:
-            if key in self.key_sounds:
-                del self.key_sounds[key]
+        self.engine.clear_sounds(self.selected_keys)
                 
         messagebox.showinfo("Success", f"Cleared sounds from {len(self.selected_keys)} selected keys!")
             
@@ -587,18 +590,7 @@ class KeyAura:
         
         if template_name:
             # Save current key sounds as template
-            template_data = {
-                "name": template_name,
-                "key_sounds": self.key_sounds.copy(),
-                "layout": self.layout_var.get(),
-                "created": time.strftime("%Y-%m-%d %H:%M:%S")
-            }
-            
-            template_file = os.path.join(self.template_dir, f"{template_name}.json")
-            with open(template_file, 'w') as f:
-                json.dump(template_data, f, indent=2)
-                
-            self.templates[template_name] = template_data
+            self.engine.save_template(template_name, self.layout_var.get())
             self.refresh_templates_list()
             messagebox.showinfo("Success", f"Template '{template_name}' saved successfully!")
             
@@ -606,113 +598,42 @@ class KeyAura:
         # This would show a detailed template view
         pass
         
-    def load_templates(self):
-        if os.path.exists(self.template_dir):
-            for filename in os.listdir(self.template_dir):
-                if filename.endswith('.json'):
-                    template_path = os.path.join(self.template_dir, filename)
-                    try:
-                        with open(template_path, 'r') as f:
-                            template_data = json.load(f)
-                            self.templates[template_data['name']] = template_data
-                    except Exception as e:
-                        print(f"Error loading template {filename}: {e}")
-                        
     def refresh_templates_list(self):
-        # Clear existing widgets
-        for widget in self.templates_list_frame.winfo_children():
-            widget.destroy()
-            
-        # Add template cards
-        for template_name, template_data in self.templates.items():
-            self.create_template_card(template_name, template_data)
+        self.templates_list.sync(self.engine.templates)
             
-    def create_template_card(self, template_name, template_data):
-        card_frame = ctk.CTkFrame(
-            self.templates_list_frame,
-            fg_color="#2d2d2d",
-            corner_radius=12,
-            border_width=2,
-            border_color="#3d3d3d"
-        )
-        card_frame.pack(fill="x", pady=8, padx=10)
-        
-        # Template info
-        info_frame = ctk.CTkFrame(card_frame, fg_color="transparent")
-        info_frame.pack(side="left", fill="both", expand=True, padx=15, pady=12)
-        
-        name_label = ctk.CTkLabel(
-            info_frame,
-            text=template_name,
-            font=ctk.CTkFont(size=16, weight="bold"),
-            text_color="#ffffff"
-        )
-        name_label.pack(anchor="w")
-        
-        created_label = ctk.CTkLabel(
-            info_frame,
-            text=f"Created: {template_data.get('created', 'Unknown')}",
-            font=ctk.CTkFont(size=12),
-            text_color="#cccccc"
-        )
-        created_label.pack(anchor="w")
-        
-        layout_label = ctk.CTkLabel(
-            info_frame,
-            text=f"Layout: {template_data.get('layout', '100%')}",
-            font=ctk.CTkFont(size=12),
-            text_color="#888888"
-        )
-        layout_label.pack(anchor="w")
-        
-        # Action buttons
-        buttons_frame = ctk.CTkFrame(card_frame, fg_color="transparent")
-        buttons_frame.pack(side="right", padx=15, pady=12)
-        
-        use_btn = ctk.CTkButton(
-            buttons_frame,
-            text="Use",
-            width=60,
-            command=lambda: self.use_template(template_name),
-            fg_color="#27ae60",
-            hover_color="#229954",
-            corner_radius=8,
-            height=30
-        )
-        use_btn.pack(side="left", padx=2)
-        
-        edit_btn = ctk.CTkButton(
-            buttons_frame,
-            text="Edit",
-            width=60,
-            command=lambda: self.edit_template(template_name),
-            fg_color="#f39c12",
-            hover_color="#e67e22",
-            corner_radius=8,
-            height=30
-        )
-        edit_btn.pack(side="left", padx=2)
-        
-        delete_btn = ctk.CTkButton(
-            buttons_frame,
-            text="Delete",
-            width=60,
-            command=lambda: self.delete_template(template_name),
-            fg_color="#e74c3c",
-            hover_color="#c0392b",
-            corner_radius=8,
-            height=30
-        )
-        delete_btn.pack(side="left", padx=2)
-        
     def use_template(self, template_name):
-        if template_name in self.templates:
-            template_data = self.templates[template_name]
-            self.key_sounds = template_data['key_sounds'].copy()
-            self.layout_var.set(template_data.get('layout', '100%'))
-            self.current_template = template_name
+        # Sounds load in the background; the loader reports back through after()
+        load = self.engine.load_template(
+            template_name,
+            on_progress=lambda loaded, total: self.root.after(
+                0, self.show_template_progress, template_name, loaded, total),
+            on_done=lambda template_data: self.root.after(
+                0, self.template_loaded, template_name, template_data)
+        )
+        if load is not None:
+            self.layout_var.set(self.engine.templates[template_name].get('layout', '100%'))
+            self.change_layout(self.layout_var.get())
             self.clear_key_selection()
-            messagebox.showinfo("Success", f"Template '{template_name}' loaded successfully!")
+            
+    def show_template_progress(self, template_name, loaded, total):
+        """Show how many sounds of the loading template are playable."""
+        if template_name != self.engine.current_template:
+            return
+        self.template_progress.set(loaded / total if total else 1.0)
+        self.template_progress_label.configure(text=f"Loading '{template_name}': {loaded}/{total} sounds")
+        
+    def template_loaded(self, template_name, template_data):
+        """Report a template whose sounds have all loaded."""
+        if template_name != self.engine.current_template:
+            return
+        self.template_progress.set(1.0)
+        self.template_progress_label.configure(text=f"Template '{template_name}' ready")
+        
+        trimmed = self.engine.trimmed_keys_ms()
+        message = f"Template '{template_name}' loaded successfully!"
+        if trimmed:
+            message += f"\nRemoved {sum(trimmed) / len(trimmed):.1f} ms of leading silence on average from {len(trimmed)} keys."
+        messagebox.showinfo("Success", message)
             
     def edit_template(self, template_name):
         # This would open an edit dialog
@@ -720,14 +641,31 @@ class KeyAura:
         
     def delete_template(self, template_name):
         if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete template '{template_name}'?"):
-            template_file = os.path.join(self.template_dir, f"{template_name}.json")
-            if os.path.exists(template_file):
-                os.remove(template_file)
-            if template_name in self.templates:
-                del self.templates[template_name]
+            self.engine.delete_template(template_name)
             self.refresh_templates_list()
             messagebox.showinfo("Success", f"Template '{template_name}' deleted successfully!")
             
+    def start_control_socket(self):
+        """Serve the control socket for this window. Returns the server, or None."""
+        if not UNIX_SOCKETS:
+            return None
+        try:
+            server = ControlServer(self.engine, controls=WindowControls(self))
+            server.start()
+        except (OSError, RuntimeError) as e:
+            self.status_bar.show(f"No control socket: {e}")
+            return None
+        return server
+        
+    def on_close(self):
+        """Stop the control socket and the audio engine and close the window."""
+        if self.control is not None:
+            self.control.stop()
+        self.highlights.stop()
+        self.typing.close()
+        self.engine.close()
+        self.root.destroy()
+        
     def run(self):
         self.root.mainloop()
 
@@ -0,0 +1,110 @@
+"""
+KeyAura Mixer Configuration
+Turns audio_settings into pygame.mixer parameters, provides named latency
+profiles and can probe for the smallest buffer that plays without underruns.
+"""
+
+import time
+
+import pygame
+
+PROFILE_CUSTOM = "custom"
+PROFILE_AUTO = "auto"
+
+# Profiles only override the fields they name; the rest comes from config.json
+PROFILES = {
+    "ultra-low-latency": {"buffer_size": 128, "polyphony": 24},
+    "balanced": {"buffer_size": 512, "polyphony": 16},
+    "power-saver": {"buffer_size": 2048, "polyphony": 8},
+}
+
+PROBE_BUFFER_SIZES = (2048, 1024, 512, 256, 128, 64)
+PROBE_DURATION = 0.5
+
+
+def profile_names():
+    """Return the profile names offered to the user, in display order."""
+    return [PROFILE_CUSTOM] + list(PROFILES) + [PROFILE_AUTO]
+
+
+def apply_profile(settings, profile):
+    """Return a copy of settings with the named profile applied."""
+    merged = dict(settings)
+    merged["profile"] = profile
+    merged.update(PROFILES.get(profile, {}))
+    return merged
+
+
+def mixer_init_args(settings):
+    """Return the pygame.mixer.init keyword arguments for settings."""
+    return {
+        "frequency": settings["sample_rate"],
+        "size": -16,
+        "channels": settings["channels"],
+        "buffer": settings["buffer_size"],
+    }
+
+
+def init_mixer(settings):
+    """(Re)initialize pygame.mixer in place from settings."""
+    if pygame.mixer.get_init():
+        pygame.mixer.quit()
+    pygame.mixer.init(**mixer_init_args(settings))
+    return pygame.mixer.get_init()
+
+
+def count_underruns(buffer_size, duration=PROBE_DURATION):
+    """Stream silent blocks of buffer_size frames and count underruns.
+
+    Blocks are queued on one channel the same way the software mixer feeds
+    the device. An underrun is counted whenever the channel has gone idle
+    before the next block could be queued.
+    """
+    frequency, size, channels = pygame.mixer.get_init()
+    block = pygame.mixer.Sound(buffer=bytes(buffer_size * (abs(size) // 8) * channels))
+    block_seconds = buffer_size / float(frequency)
+    channel = pygame.mixer.Channel(0)
+    channel.set_volume(0.0)
+
+    underruns = 0
+    channel.play(block)
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        if channel.get_queue() is None:
+            if not channel.get_busy():
+                underruns += 1
+                channel.play(block)
+            else:
+                channel.queue(block)
+        time.sleep(block_seconds / 4)
+    channel.stop()
+    channel.set_volume(1.0)
+    return underruns
+
+
+def probe_buffer_size(settings, candidates=PROBE_BUFFER_SIZES, duration=PROBE_DURATION):
+    """Find the smallest buffer size that streams without underruns.
+
+    Tries candidates from largest to smallest and stops at the first size
+    that underruns. The mixer is left initialized with the chosen size.
+    Returns the chosen buffer size and a list of (buffer_size, underruns).
+    """
+    chosen = None
+    results = []
+    for buffer_size in sorted(candidates, reverse=True):
+        trial = dict(settings, buffer_size=buffer_size)
+        try:
+            init_mixer(trial)
+            underruns = count_underruns(buffer_size, duration)
+        except pygame.error as e:
+            print(f"Mixer probe failed at buffer {buffer_size}: {e}")
+            break
+        results.append((buffer_size, underruns))
+        if underruns:
+            break
+        chosen = buffer_size
+
+    if chosen is None:
+        chosen = max(candidates)
+    init_mixer(dict(settings, buffer_size=chosen))
+    return chosen, results
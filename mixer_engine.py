@@ -0,0 +1,286 @@
+"""
+KeyAura Software Mixer
+Optional playback engine that mixes key sounds itself with NumPy and feeds
+the audio device through a single reserved pygame channel.
+"""
+
+import threading
+import time
+import weakref
+from collections import deque
+
+import pygame
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from voice_pool import DEFAULT_MAX_VOICES_PER_KEY, DEFAULT_POLYPHONY, STEAL_OLDEST, VoicePool
+
+ENGINE_PYGAME = "pygame"
+ENGINE_NUMPY = "numpy"
+
+DEFAULT_MAX_VOICES = 64
+DEFAULT_BLOCK_FRAMES = 512
+DEFAULT_RING_BLOCKS = 4
+DEFAULT_LIMITER_THRESHOLD = 0.98
+DEFAULT_LIMITER_RELEASE = 0.2
+
+
+class PeakLimiter:
+    """Block-based peak limiter for the mix bus.
+
+    Gain drops instantly when a block would exceed the threshold and
+    recovers towards unity over the following blocks, ramped per sample so
+    the release does not click.
+    """
+
+    def __init__(self, block_frames, threshold=DEFAULT_LIMITER_THRESHOLD,
+                 release=DEFAULT_LIMITER_RELEASE):
+        self.threshold = threshold
+        self.release = release
+        self.gain = 1.0
+        self.reductions = 0
+        self._ramp = np.linspace(0.0, 1.0, block_frames, dtype=np.float32)[:, None]
+        self._gains = np.empty_like(self._ramp)
+
+    def process(self, block):
+        """Limit a float32 (frames, channels) block in place."""
+        peak = float(np.abs(block).max()) if block.size else 0.0
+        target = self.threshold / peak if peak > self.threshold else 1.0
+
+        if target < self.gain:
+            # Instant attack: nothing in this block may exceed the threshold
+            self.gain = target
+            block *= target
+            self.reductions += 1
+        elif self.gain < 1.0:
+            new_gain = self.gain + (target - self.gain) * self.release
+            frames = block.shape[0]
+            np.multiply(self._ramp[:frames], new_gain - self.gain, out=self._gains[:frames])
+            self._gains[:frames] += self.gain
+            block *= self._gains[:frames]
+            self.gain = new_gain
+
+        np.clip(block, -self.threshold, self.threshold, out=block)
+
+
+class SoftwareMixer:
+    """Mixes any number of key voices into blocks and streams them to SDL.
+
+    Each voice is a float32 sample array, a read position and a gain. The
+    mixer thread adds active voices into a block with vectorized array ops,
+    applies master volume and the peak limiter, converts to the mixer's
+    sample format and queues the block on one reserved pygame Channel. Output
+    blocks rotate through a small ring so a block is never rewritten while
+    SDL may still be reading it.
+    """
+
+    def __init__(self, max_voices=DEFAULT_MAX_VOICES, block_frames=DEFAULT_BLOCK_FRAMES,
+                 ring_blocks=DEFAULT_RING_BLOCKS, limiter_threshold=DEFAULT_LIMITER_THRESHOLD):
+        if np is None:
+            raise RuntimeError("NumPy is required for the software mixer")
+        mixer_format = pygame.mixer.get_init()
+        if not mixer_format:
+            raise RuntimeError("pygame.mixer must be initialized before the software mixer")
+        self.frequency, size, self.channels = mixer_format
+        if size == -16:
+            self.out_dtype, self.out_scale = np.int16, 32767.0
+        elif size == 32:
+            self.out_dtype, self.out_scale = np.float32, 1.0
+        else:
+            raise RuntimeError(f"Unsupported mixer sample size for software mixing: {size}")
+
+        self.max_voices = max_voices
+        self.block_frames = block_frames
+        self.volume = 1.0
+        self.limiter = PeakLimiter(block_frames, threshold=limiter_threshold)
+
+        # The output channel is reserved so Sound.play() never grabs it
+        pygame.mixer.set_reserved(1)
+        self.output = pygame.mixer.Channel(0)
+
+        self._mix = np.zeros((block_frames, self.channels), dtype=np.float32)
+        self._scratch = np.zeros_like(self._mix)
+        self._ring = np.zeros((ring_blocks, block_frames, self.channels), dtype=self.out_dtype)
+        self._ring_index = 0
+
+        self._samples = weakref.WeakKeyDictionary()
+        self._incoming = deque()
+        self._voices = []  # [samples, position, gain, key, started]
+        self._wakeup = threading.Event()
+        self._running = False
+        self._thread = None
+        # on_admit(key) is called on the mixer thread as each voice starts mixing
+        self.on_admit = None
+
+        self.played = 0
+        self.steals = 0
+        self.underruns = 0
+        self.blocks_mixed = 0
+        self.peak_voices = 0
+        self.mix_time = 0.0
+
+    def start(self):
+        """Start the mixing thread."""
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="KeyAuraMixer", daemon=True)
+        self._thread.start()
+
+    def samples_for(self, sound):
+        """Return (and remember) a Sound's samples as a float32 (frames, channels) array."""
+        samples = self._samples.get(sound)
+        if samples is None:
+            raw = np.frombuffer(sound.get_raw(), dtype=self.out_dtype)
+            samples = raw.reshape(-1, self.channels).astype(np.float32)
+            if self.out_dtype == np.int16:
+                samples /= 32768.0
+            self._samples[sound] = samples
+        return samples
+
+    def play(self, key, sound, volume=None, gain=1.0):
+        """Queue sound for key on a new voice. Safe to call from any thread."""
+        if volume is None:
+            volume = 1.0
+        volume *= gain
+        self._incoming.append((self.samples_for(sound), volume, key, time.perf_counter()))
+        self._wakeup.set()
+
+    def set_volume(self, volume):
+        """Set the master volume applied to the mix bus."""
+        self.volume = volume
+
+    def active_voices(self):
+        """Return the number of voices currently being mixed."""
+        return len(self._voices)
+
+    def stop_all(self):
+        """Silence every voice."""
+        self._incoming.clear()
+        self._voices = []
+        self.output.stop()
+
+    def close(self):
+        """Stop the mixing thread and release the output channel."""
+        self._running = False
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(1.0)
+            self._thread = None
+        self.stop_all()
+        pygame.mixer.set_reserved(0)
+
+    def _admit_incoming(self):
+        while True:
+            try:
+                samples, gain, key, started = self._incoming.popleft()
+            except IndexError:
+                return
+            if len(self._voices) >= self.max_voices:
+                oldest = min(range(len(self._voices)), key=lambda i: self._voices[i][4])
+                del self._voices[oldest]
+                self.steals += 1
+            self._voices.append([samples, 0, gain, key, started])
+            self.played += 1
+            if self.on_admit is not None:
+                self.on_admit(key)
+
+    def mix_block(self):
+        """Mix the next block of all voices. Returns the output array."""
+        started = time.perf_counter()
+        self._admit_incoming()
+        block = self._mix
+        block.fill(0.0)
+        frames = self.block_frames
+
+        finished = False
+        for voice in self._voices:
+            samples, position, gain = voice[0], voice[1], voice[2]
+            count = min(frames, samples.shape[0] - position)
+            if count > 0:
+                np.multiply(samples[position:position + count], gain, out=self._scratch[:count])
+                block[:count] += self._scratch[:count]
+            voice[1] = position + count
+            if voice[1] >= samples.shape[0]:
+                finished = True
+
+        if len(self._voices) > self.peak_voices:
+            self.peak_voices = len(self._voices)
+        if finished:
+            self._voices = [v for v in self._voices if v[1] < v[0].shape[0]]
+
+        block *= self.volume
+        self.limiter.process(block)
+        block *= self.out_scale
+
+        out = self._ring[self._ring_index]
+        self._ring_index = (self._ring_index + 1) % self._ring.shape[0]
+        np.copyto(out, block, casting="unsafe")
+
+        self.blocks_mixed += 1
+        self.mix_time += time.perf_counter() - started
+        return out
+
+    def _run(self):
+        block_seconds = self.block_frames / float(self.frequency)
+        while self._running:
+            if not self._voices and not self._incoming:
+                # Nothing to mix: sleep until the next key press
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+
+            if self.output.get_queue() is not None:
+                time.sleep(block_seconds / 4)
+                continue
+
+            if self._voices and not self.output.get_busy():
+                # The device drained everything we gave it mid-sound
+                self.underruns += 1
+
+            out = self.mix_block()
+            sound = pygame.mixer.Sound(buffer=out)
+            if self.output.get_busy():
+                self.output.queue(sound)
+            else:
+                self.output.play(sound)
+
+    def stats(self):
+        """Return mixer counters as a dict."""
+        return {
+            "engine": ENGINE_NUMPY,
+            "max_voices": self.max_voices,
+            "active": len(self._voices),
+            "peak": self.peak_voices,
+            "played": self.played,
+            "steals": self.steals,
+            "underruns": self.underruns,
+            "blocks_mixed": self.blocks_mixed,
+            "mix_time": self.mix_time,
+            "limiter_reductions": self.limiter.reductions,
+            "limiter_gain": self.limiter.gain,
+        }
+
+
+def create_voice_engine(settings):
+    """Build the playback engine selected by audio_settings["engine"]."""
+    if settings.get("engine") == ENGINE_NUMPY:
+        if np is None:
+            print("NumPy is not installed; falling back to pygame voices")
+        else:
+            mixer = SoftwareMixer(
+                max_voices=settings.get("software_voices", DEFAULT_MAX_VOICES),
+                block_frames=settings.get("buffer_size", DEFAULT_BLOCK_FRAMES),
+                limiter_threshold=settings.get("limiter_threshold", DEFAULT_LIMITER_THRESHOLD),
+            )
+            mixer.start()
+            return mixer
+
+    return VoicePool(
+        polyphony=settings.get("polyphony", DEFAULT_POLYPHONY),
+        max_voices_per_key=settings.get("max_voices_per_key", DEFAULT_MAX_VOICES_PER_KEY),
+        steal_policy=settings.get("steal_policy", STEAL_OLDEST),
+    )
@@ -0,0 +1,65 @@
+"""
+KeyAura Onset Detection
+Finds where each key sound actually starts so leading silence can be skipped
+when the sound is built, instead of adding to perceived latency on every press.
+"""
+
+import pygame
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from transcode import read_pcm_samples
+
+DEFAULT_THRESHOLD_DB = -30.0
+DEFAULT_WINDOW_MS = 1.0
+DEFAULT_PREROLL_MS = 1.0
+
+
+def detect_onset(samples, sample_rate, threshold_db=DEFAULT_THRESHOLD_DB,
+                 window_ms=DEFAULT_WINDOW_MS, preroll_ms=DEFAULT_PREROLL_MS):
+    """Return the frame index where a (frames, channels) sound starts.
+
+    The signal is cut into short windows and the RMS energy of every window
+    is computed in one vectorized pass. The onset is the first window whose
+    energy is within threshold_db of the loudest window, which ignores a
+    constant noise floor. A short pre-roll is kept so the attack transient
+    is not clipped.
+    """
+    frames = samples.shape[0]
+    window = max(1, int(sample_rate * window_ms / 1000.0))
+    windows = frames // window
+    if windows == 0:
+        return 0
+
+    power = np.square(samples[:windows * window], dtype=np.float32).mean(axis=1)
+    energy = np.sqrt(power.reshape(windows, window).mean(axis=1))
+    peak = float(energy.max())
+    if peak <= 0.0:
+        return 0
+
+    above = np.flatnonzero(energy >= peak * (10.0 ** (threshold_db / 20.0)))
+    onset = int(above[0]) * window
+    preroll = int(sample_rate * preroll_ms / 1000.0)
+    return max(0, onset - preroll)
+
+
+def analyze_onsets(transcoder, paths, threshold_db=DEFAULT_THRESHOLD_DB):
+    """Detect the leading silence of every path. Returns {path: offset_ms}."""
+    if np is None:
+        print("NumPy is not installed; skipping leading-silence trimming")
+        return {}
+
+    sample_rate = pygame.mixer.get_init()[0]
+    offsets = {}
+    for path in dict.fromkeys(p for p in paths if p):
+        try:
+            samples = read_pcm_samples(transcoder.transcode(path))
+        except (OSError, pygame.error) as e:
+            print(f"Error analyzing onset of {path}: {e}")
+            continue
+        onset = detect_onset(samples, sample_rate, threshold_db)
+        offsets[path] = round(onset * 1000.0 / sample_rate, 2)
+    return offsets
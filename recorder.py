@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+KeyAura Keystroke Recorder
+Records real typing to a JSONL event file, generates synthetic typing at a
+given speed, and replays event files through the playback path to measure
+how the engine keeps up. Event files use the replay backend's format:
+
+    {"t": 0.125, "key": "A", "down": true}
+
+Usage:
+    python recorder.py record --output FILE [--backend evdev|tk] [--duration SECONDS]
+    python recorder.py generate --output FILE [--wpm 300] [--words 200] [--seed 0]
+    python recorder.py replay FILE [--speed 1.0] [--engine pygame|numpy] [--profile NAME] [--output REPORT]
+"""
+
+import argparse
+import json
+import os
+import random
+import signal
+import sys
+import tempfile
+import threading
+import time
+
+# Must be set before the mixer is initialized
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+from app_config import load_config
+from bench_latency import KEYS, LatencyProbe, create_synthetic_template, summarize
+from input_backends import BACKEND_EVDEV, BACKEND_TK, ReplayBackend, create_backend, load_events
+from mixer_config import profile_names
+
+CHARACTERS_PER_WORD = 5
+DEFAULT_HOLD = 0.08
+DRAIN_TIMEOUT = 10.0
+
+
+class EventRecorder:
+    """Writes key events to a JSONL file with times relative to the first event."""
+
+    def __init__(self, path):
+        self._file = open(path, 'w')
+        self._start = None
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def on_event(self, event):
+        with self._lock:
+            if self._start is None:
+                self._start = event.time
+            record = {"t": round(event.time - self._start, 6), "key": event.key, "down": event.down}
+            self._file.write(json.dumps(record) + "\n")
+            self.count += 1
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def record(backend, path, duration=None):
+    """Record events from backend into path until stopped. Returns the event count."""
+    recorder = EventRecorder(path)
+    signal.signal(signal.SIGINT, lambda *args: backend.stop())
+    timer = None
+    if duration:
+        timer = threading.Timer(duration, backend.stop)
+        timer.start()
+    try:
+        backend.run(recorder.on_event)
+    finally:
+        if timer is not None:
+            timer.cancel()
+        recorder.close()
+    return recorder.count
+
+
+def generate_typing(wpm, words, seed=0, hold=DEFAULT_HOLD):
+    """Return JSONL records of typing words at wpm, seeded so runs repeat exactly.
+
+    Keystroke gaps are drawn around the mean interval for the speed and key
+    holds overlap the next press, as in real fast typing.
+    """
+    rng = random.Random(seed)
+    interval = 60.0 / (wpm * CHARACTERS_PER_WORD)
+    records = []
+    t = 0.0
+    for _ in range(words):
+        word = [rng.choice(KEYS) for _ in range(rng.randint(2, 2 * CHARACTERS_PER_WORD - 2))]
+        for key in word + ["Space"]:
+            records.append({"t": round(t, 6), "key": key, "down": True})
+            records.append({"t": round(t + hold * rng.uniform(0.6, 1.4), 6), "key": key, "down": False})
+            t += interval * rng.uniform(0.5, 1.5)
+    records.sort(key=lambda record: record["t"])
+    return records
+
+
+def replay(path, speed=1.0, engine=None, profile=None):
+    """Replay an event file through KeyAuraEngine and return a report dict.
+
+    Every recorded key is mapped to a synthetic sound, so the report
+    measures the playback path rather than a particular template.
+    """
+    events = load_events(path)
+    config = load_config()
+    overrides = dict(config.get("audio_settings", {}))
+    if profile:
+        overrides["profile"] = profile
+    if engine:
+        overrides["engine"] = engine
+    config = dict(config, audio_settings=overrides)
+
+    with tempfile.TemporaryDirectory() as directory:
+        keys = sorted({event.key for event in events})
+        key_sounds = create_synthetic_template(directory, keys)
+        probe = LatencyProbe(config, key_sounds, directory)
+        probe.engine.sound_cache.warm(key_sounds.values())
+        queued = []
+
+        def on_event(event):
+            if event.down and probe.press(event.key):
+                queued.append(event.time)
+
+        try:
+            start = time.perf_counter()
+            ReplayBackend(path, speed).run(on_event)
+            fed = time.perf_counter() - start
+
+            # Dropped events never reach the mixer, so wait for the rest only
+            dispatcher = probe.engine.audio_dispatcher
+            deadline = time.perf_counter() + DRAIN_TIMEOUT
+            while len(probe.latencies) + dispatcher.dropped < len(queued) and time.perf_counter() < deadline:
+                time.sleep(0.005)
+            elapsed = time.perf_counter() - start
+
+            keys_per_sec = len(probe.latencies) / elapsed if elapsed > 0 else 0.0
+            report = {
+                "file": path,
+                "speed": speed,
+                "engine": probe.engine.audio_settings["engine"],
+                "profile": probe.engine.audio_settings["profile"],
+                "buffer_size": probe.engine.audio_settings["buffer_size"],
+                "events": len(events),
+                "recorded_s": events[-1].time if events else 0.0,
+                "replayed_s": fed,
+                "pressed": len(queued),
+                "played": len(probe.latencies),
+                "dropped": dispatcher.dropped,
+                "keys_per_sec": keys_per_sec,
+                "wpm": keys_per_sec * 60 / CHARACTERS_PER_WORD,
+                "latency": summarize(probe.latencies),
+                "voices": probe.engine.voices.stats(),
+                "dispatcher": dispatcher.stats(),
+            }
+        finally:
+            probe.close()
+            pygame.mixer.quit()
+    return report
+
+
+def write_json(text, output):
+    if output:
+        with open(output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+def main(argv=None):
+    """Parse arguments and run the selected command."""
+    parser = argparse.ArgumentParser(description="Record, generate and replay KeyAura key events.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="record real typing to an event file")
+    record_parser.add_argument("--output", required=True, help="event file to write")
+    record_parser.add_argument("--backend", choices=[BACKEND_EVDEV, BACKEND_TK], default=BACKEND_EVDEV)
+    record_parser.add_argument("--device", action="append", help="evdev device to read (repeatable)")
+    record_parser.add_argument("--duration", type=float, help="stop after this many seconds")
+
+    generate_parser = commands.add_parser("generate", help="write synthetic typing to an event file")
+    generate_parser.add_argument("--output", required=True, help="event file to write")
+    generate_parser.add_argument("--wpm", type=float, default=300.0, help="typing speed in words per minute")
+    generate_parser.add_argument("--words", type=int, default=200, help="number of words to type")
+    generate_parser.add_argument("--seed", type=int, default=0, help="random seed")
+
+    replay_parser = commands.add_parser("replay", help="replay an event file and report latency")
+    replay_parser.add_argument("file", help="event file to replay")
+    replay_parser.add_argument("--speed", type=float, default=1.0,
+                               help="speed factor, 0 for as fast as possible (default: 1)")
+    replay_parser.add_argument("--engine", choices=["pygame", "numpy"], help="override audio_settings.engine")
+    replay_parser.add_argument("--profile", choices=profile_names(), help="override audio_settings.profile")
+    replay_parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        backend = create_backend(args.backend, args.device)
+        print("Recording; press Ctrl+C to stop", file=sys.stderr)
+        count = record(backend, args.output, args.duration)
+        print(f"Recorded {count} events to {args.output}", file=sys.stderr)
+    elif args.command == "generate":
+        records = generate_typing(args.wpm, args.words, args.seed)
+        write_json("\n".join(json.dumps(record) for record in records), args.output)
+    else:
+        report = replay(args.file, args.speed, args.engine, args.profile)
+        write_json(json.dumps(report, indent=2), args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
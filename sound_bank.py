@@ -0,0 +1,144 @@
+"""
+KeyAura Sound Banks
+Packs all PCM used by a template into one memory-mapped .kabank file so that
+switching templates costs one open and a page-in instead of one decode per
+sound.
+
+File layout (little endian):
+    8 bytes   magic b"KABANK01"
+    4 bytes   length of the JSON index that follows
+    N bytes   JSON index: mixer format, template mtime and one entry per sound
+              with its source path, mtime, size, data offset and length
+    padding   to a 16 byte boundary
+    ...       PCM data of every sound, back to back, each 16 byte aligned
+"""
+
+import json
+import mmap
+import os
+import struct
+
+import pygame
+
+from transcode import mixer_format_tag, write_atomic
+
+BANK_EXTENSION = ".kabank"
+BANK_MAGIC = b"KABANK01"
+BANK_VERSION = 1
+HEADER = struct.Struct("<8sI")
+ALIGNMENT = 16
+
+
+def bank_path_for(template_path):
+    """Return the .kabank path stored next to a template JSON file."""
+    return os.path.splitext(template_path)[0] + BANK_EXTENSION
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return stat.st_mtime, stat.st_size
+
+
+def read_bank_index(bank_path):
+    """Return (index, data_start) of a bank, or (None, 0) if it is unreadable."""
+    try:
+        with open(bank_path, 'rb') as f:
+            magic, index_length = HEADER.unpack(f.read(HEADER.size))
+            if magic != BANK_MAGIC:
+                return None, 0
+            index = json.loads(f.read(index_length).decode("utf-8"))
+    except (OSError, ValueError, struct.error):
+        return None, 0
+    return index, _align(HEADER.size + index_length)
+
+
+def bank_is_current(index, template_path, sound_paths):
+    """Check a bank index against the template, its sounds and the mixer format."""
+    if not index or index.get("version") != BANK_VERSION:
+        return False
+    if index.get("format") != mixer_format_tag():
+        return False
+    try:
+        if index.get("template_mtime") != os.path.getmtime(template_path):
+            return False
+    except OSError:
+        return False
+
+    entries = {entry["path"]: entry for entry in index.get("sounds", [])}
+    missing = set(index.get("missing", []))
+    for path in sound_paths:
+        if path in missing:
+            if os.path.exists(path):
+                return False
+            continue
+        entry = entries.get(path)
+        if entry is None:
+            return False
+        try:
+            if _file_signature(path) != (entry["mtime"], entry["size"]):
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def build_bank(bank_path, template_path, sound_paths, transcoder):
+    """Write a bank holding the native PCM of every sound a template uses."""
+    entries = []
+    missing = []
+    chunks = []
+    offset = 0
+    for path in dict.fromkeys(p for p in sound_paths if p):
+        try:
+            mtime, size = _file_signature(path)
+            with open(transcoder.transcode(path), 'rb') as f:
+                pcm = f.read()
+        except (OSError, pygame.error) as e:
+            print(f"Error adding {path} to sound bank: {e}")
+            missing.append(path)
+            continue
+        entries.append({"path": path, "mtime": mtime, "size": size,
+                        "offset": offset, "length": len(pcm)})
+        padding = _align(len(pcm)) - len(pcm)
+        chunks.append(pcm + bytes(padding))
+        offset += len(pcm) + padding
+
+    index = {
+        "version": BANK_VERSION,
+        "format": mixer_format_tag(),
+        "template_mtime": os.path.getmtime(template_path),
+        "sounds": entries,
+        "missing": missing,
+    }
+    index_bytes = json.dumps(index).encode("utf-8")
+    header = HEADER.pack(BANK_MAGIC, len(index_bytes)) + index_bytes
+    header += bytes(_align(len(header)) - len(header))
+    write_atomic(bank_path, header + b"".join(chunks))
+    return index
+
+
+def load_bank_sounds(bank_path, index, data_start, build=None):
+    """Map a bank and build a Sound for every entry. Returns {path: (Sound, mtime)}.
+
+    Sounds are built from memoryview slices of the mapping, so no intermediate
+    bytes objects are made; SDL_mixer keeps its own copy of each chunk, which
+    lets the mapping be closed again straight away. build(path, chunk) can
+    replace plain pygame.mixer.Sound construction, e.g. to apply trims.
+    """
+    sounds = {}
+    with open(bank_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as view:
+                for entry in index["sounds"]:
+                    start = data_start + entry["offset"]
+                    with view[start:start + entry["length"]] as chunk:
+                        if build is not None:
+                            sound = build(entry["path"], chunk)
+                        else:
+                            sound = pygame.mixer.Sound(buffer=chunk)
+                        sounds[entry["path"]] = (sound, entry["mtime"])
+    return sounds
@@ -0,0 +1,186 @@
+"""
+KeyAura Sound Cache
+Keeps decoded pygame Sound objects in memory so key presses never touch the disk.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import pygame
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+FAILURE_RECHECK_SECONDS = 1.0
+
+
+def sound_nbytes(sound):
+    """Estimate the decoded size of a Sound from the current mixer format."""
+    mixer_format = pygame.mixer.get_init()
+    if not mixer_format:
+        return 0
+    frequency, size, channels = mixer_format
+    frames = int(round(sound.get_length() * frequency))
+    return frames * (abs(size) // 8) * channels
+
+
+class SoundCache:
+    """LRU cache of decoded sounds keyed by file path and modification time.
+
+    `get` is the hot path: once a path is cached it is served from memory
+    without a stat() call. `load` and `warm` re-check the file's mtime and
+    decode again only when the file changed on disk.
+
+    Paths that failed to load are remembered too (a negative cache): while
+    a broken file's mtime stays the same, `failed` answers from memory and
+    `warm` skips it, so a missing or corrupt sound costs one error rather
+    than one per key press.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, loader=None):
+        self.max_bytes = max_bytes
+        self.loader = loader or pygame.mixer.Sound
+        self._entries = OrderedDict()  # path -> (mtime, sound, nbytes)
+        self._failures = {}  # path -> (mtime or None, message, checked_at)
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.failures = 0
+
+    def __contains__(self, path):
+        return path in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, path):
+        """Return the cached Sound for path, decoding it only on a miss."""
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+        return self.load(path)
+
+    def load(self, path):
+        """Return the Sound for path, re-decoding it if the file changed.
+
+        A file that cannot be read or decoded is recorded with mark_failed
+        before the error is raised.
+        """
+        try:
+            mtime = os.path.getmtime(path)
+            with self._lock:
+                entry = self._entries.get(path)
+                if entry is not None and entry[0] == mtime:
+                    self._entries.move_to_end(path)
+                    self.hits += 1
+                    return entry[1]
+                self.misses += 1
+            sound = self.loader(path)
+        except (OSError, pygame.error) as e:
+            self.mark_failed(path, e)
+            raise
+        self.put(path, sound, mtime)
+        return sound
+
+    def mark_failed(self, path, error):
+        """Remember that path could not be loaded, until its mtime changes."""
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            mtime = None
+        with self._lock:
+            self._failures[path] = (mtime, str(error), time.monotonic())
+            self.failures += 1
+
+    def failed(self, path):
+        """Return True if path failed to load and has not changed since.
+
+        Safe on the press path: the file is stat()ed again at most once per
+        FAILURE_RECHECK_SECONDS, and never for paths that loaded fine.
+        """
+        failure = self._failures.get(path)
+        if failure is None:
+            return False
+        now = time.monotonic()
+        if now - failure[2] < FAILURE_RECHECK_SECONDS:
+            return True
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            mtime = None
+        with self._lock:
+            if mtime != failure[0]:
+                # The file was fixed or replaced; let the next load try it
+                self._failures.pop(path, None)
+                return False
+            self._failures[path] = (failure[0], failure[1], now)
+        return True
+
+    def failure(self, path):
+        """Return the error message of a path that failed to load, or None."""
+        failure = self._failures.get(path)
+        return None if failure is None else failure[1]
+
+    def put(self, path, sound, mtime):
+        """Store an already decoded Sound and evict old entries over budget."""
+        nbytes = sound_nbytes(sound)
+        with self._lock:
+            self._failures.pop(path, None)
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self.current_bytes -= old[2]
+            self._entries[path] = (mtime, sound, nbytes)
+            self.current_bytes += nbytes
+
+            # Always keep the newest entry, even if it alone exceeds the budget
+            while self.current_bytes > self.max_bytes and len(self._entries) > 1:
+                _, (_, _, evicted_bytes) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_bytes
+                self.evictions += 1
+
+    def warm(self, paths):
+        """Decode every path up front. Returns the number of sounds ready."""
+        ready = 0
+        for path in dict.fromkeys(p for p in paths if p):
+            if self.failed(path):
+                continue
+            try:
+                self.load(path)
+                ready += 1
+            except (OSError, pygame.error) as e:
+                print(f"Error caching sound {path}: {e}")
+        return ready
+
+    def invalidate(self, path):
+        """Drop a single path from the cache, or forget that it failed."""
+        with self._lock:
+            self._failures.pop(path, None)
+            entry = self._entries.pop(path, None)
+            if entry is not None:
+                self.current_bytes -= entry[2]
+
+    def clear(self):
+        """Drop every cached sound and failure (e.g. after the mixer format changed)."""
+        with self._lock:
+            self._entries.clear()
+            self._failures.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """Return cache counters as a dict."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "failed": len(self._failures),
+                "failures": self.failures,
+            }
@@ -0,0 +1,62 @@
+"""
+KeyAura Status Bar
+A one-line status bar for messages and errors. Messages clear themselves
+after a few seconds, so reporting an error never opens a dialog, needs a
+click or blocks the window.
+"""
+
+import customtkinter as ctk
+
+MESSAGE_MS = 6000
+INFO_COLOR = "#888888"
+ERROR_COLOR = "#ff6b6b"
+
+
+class StatusBar(ctk.CTkFrame):
+    """Shows the latest message on the left and an error count on the right.
+
+    Call its methods on the Tk thread; from other threads go through
+    root.after(0, ...).
+    """
+
+    def __init__(self, master, message_ms=MESSAGE_MS):
+        super().__init__(master, height=32, fg_color="#1a1a1a", corner_radius=10)
+        self.grid_columnconfigure(0, weight=1)
+        self.message_ms = message_ms
+        self.error_count = 0
+        self._clear_id = None
+
+        self.message_label = ctk.CTkLabel(
+            self,
+            text="",
+            anchor="w",
+            font=ctk.CTkFont(size=13),
+            text_color=INFO_COLOR
+        )
+        self.message_label.grid(row=0, column=0, sticky="ew", padx=15, pady=3)
+
+        self.count_label = ctk.CTkLabel(
+            self,
+            text="",
+            font=ctk.CTkFont(size=13, weight="bold"),
+            text_color=ERROR_COLOR
+        )
+        self.count_label.grid(row=0, column=1, sticky="e", padx=15, pady=3)
+
+    def show(self, message, color=INFO_COLOR):
+        """Show a message until it times out or another one replaces it."""
+        self.message_label.configure(text=message, text_color=color)
+        if self._clear_id is not None:
+            self.after_cancel(self._clear_id)
+        self._clear_id = self.after(self.message_ms, self.clear)
+
+    def show_error(self, message, count=None):
+        """Show an error; count is the total reported so far (default: one more)."""
+        self.error_count = self.error_count + 1 if count is None else count
+        self.count_label.configure(text=f"⚠ {self.error_count} error{'s' if self.error_count != 1 else ''}")
+        self.show(message, ERROR_COLOR)
+
+    def clear(self):
+        """Remove the current message. The error count stays."""
+        self._clear_id = None
+        self.message_label.configure(text="")
@@ -0,0 +1,165 @@
+"""
+KeyAura Template Catalog
+A SQLite index of the templates directory holding what the template list
+shows (name, layout, created time) plus each file's mtime and size. Startup
+reads the index and stats the directory; only files that are new or whose
+mtime or size changed are parsed, and a template's key sounds are read
+from its JSON file when it is used.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+
+CATALOG_FILE = ".catalog.sqlite"
+CATALOG_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS templates (
+    filename TEXT PRIMARY KEY,
+    name     TEXT,
+    layout   TEXT,
+    created  TEXT,
+    mtime_ns INTEGER NOT NULL,
+    size     INTEGER NOT NULL
+)
+"""
+
+
+def template_summary(template_data, filename):
+    """Return the catalog entry of a template: everything but its sounds."""
+    return {
+        "name": template_data["name"],
+        "layout": template_data.get("layout", "100%"),
+        "created": template_data.get("created", "Unknown"),
+        "filename": filename,
+    }
+
+
+class TemplateCatalog:
+    """Indexes the JSON templates of one directory.
+
+    self.entries maps template name to its summary dict and is updated in
+    place, so callers may keep a reference to it. Files that fail to parse
+    are indexed without a name, so they are not parsed again until they
+    change. Safe to use from several threads.
+    """
+
+    def __init__(self, template_dir, path=None):
+        self.template_dir = template_dir
+        self.path = path or os.path.join(template_dir, CATALOG_FILE)
+        self.entries = {}
+        self.parsed = 0
+        self.reused = 0
+        self._lock = threading.Lock()
+        try:
+            self._db = self._open(self.path)
+        except sqlite3.Error as e:
+            # A read-only shared directory still works, just without persistence
+            print(f"Template catalog not persisted ({self.path}): {e}")
+            self._db = self._open(":memory:")
+
+    def _open(self, path):
+        db = sqlite3.connect(path, check_same_thread=False)
+        try:
+            if db.execute("PRAGMA user_version").fetchone()[0] != CATALOG_VERSION:
+                db.execute("DROP TABLE IF EXISTS templates")
+                db.execute(f"PRAGMA user_version = {CATALOG_VERSION}")
+            db.execute(SCHEMA)
+            db.commit()
+        except sqlite3.Error:
+            db.close()
+            raise
+        return db
+
+    def refresh(self):
+        """Bring the index up to date with the directory. Returns the number of files parsed."""
+        with self._lock:
+            known = {filename: (mtime_ns, size) for filename, mtime_ns, size
+                     in self._db.execute("SELECT filename, mtime_ns, size FROM templates")}
+            seen = set()
+            parsed = 0
+            if os.path.isdir(self.template_dir):
+                with os.scandir(self.template_dir) as entries:
+                    for entry in entries:
+                        if not entry.name.endswith('.json') or not entry.is_file():
+                            continue
+                        seen.add(entry.name)
+                        stat = entry.stat()
+                        if known.get(entry.name) == (stat.st_mtime_ns, stat.st_size):
+                            continue
+                        self._index(entry.name, self._read_summary(entry.path, entry.name), stat)
+                        parsed += 1
+
+            gone = [(filename,) for filename in known if filename not in seen]
+            self._db.executemany("DELETE FROM templates WHERE filename = ?", gone)
+            self._db.commit()
+            self.parsed += parsed
+            self.reused += len(seen) - parsed
+            self._reload_entries()
+        return parsed
+
+    def _read_summary(self, path, filename):
+        try:
+            with open(path, 'r') as f:
+                return template_summary(json.load(f), filename)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Error loading template {filename}: {e}")
+            return None
+
+    def _index(self, filename, summary, stat):
+        summary = summary or {"name": None, "layout": None, "created": None}
+        self._db.execute(
+            "INSERT OR REPLACE INTO templates (filename, name, layout, created, mtime_ns, size) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (filename, summary["name"], summary["layout"], summary["created"],
+             stat.st_mtime_ns, stat.st_size))
+
+    def _reload_entries(self):
+        # Ordered by filename so a name shared by two files resolves the same way every run
+        entries = {}
+        for filename, name, layout, created in self._db.execute(
+                "SELECT filename, name, layout, created FROM templates "
+                "WHERE name IS NOT NULL ORDER BY filename"):
+            entries[name] = {"name": name, "layout": layout, "created": created, "filename": filename}
+        self.entries.clear()
+        self.entries.update(entries)
+
+    def file_path(self, name):
+        """Return the JSON file of a cataloged template, or None."""
+        entry = self.entries.get(name)
+        return os.path.join(self.template_dir, entry["filename"]) if entry else None
+
+    def load(self, name):
+        """Read a template's full data from its file. Returns None if it is not cataloged."""
+        path = self.file_path(name)
+        if path is None:
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def add(self, template_data, path):
+        """Index a template just written to path."""
+        filename = os.path.basename(path)
+        summary = template_summary(template_data, filename)
+        with self._lock:
+            self._index(filename, summary, os.stat(path))
+            self._db.commit()
+            self.entries[summary["name"]] = summary
+
+    def remove(self, name):
+        """Drop a template from the index."""
+        with self._lock:
+            entry = self.entries.pop(name, None)
+            if entry is not None:
+                self._db.execute("DELETE FROM templates WHERE filename = ?", (entry["filename"],))
+                self._db.commit()
+
+    def stats(self):
+        """Return index counters as a dict."""
+        return {"templates": len(self.entries), "parsed": self.parsed, "reused": self.reused}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,218 @@
+"""
+KeyAura Template List
+A virtualized list of template cards. Only the rows inside the viewport
+(plus a small overscan) have widgets; cards are recycled as the list
+scrolls, and adding or deleting templates applies an insert/remove diff
+instead of rebuilding the list, so its cost does not grow with the number
+of templates.
+"""
+
+import tkinter as tk
+
+import customtkinter as ctk
+
+ROW_HEIGHT = 100
+CARD_HEIGHT = 84
+CARD_PADX = 10
+OVERSCAN = 2
+SCROLL_STEP = 20
+
+
+def visible_rows(top, height, count, row_height=ROW_HEIGHT, overscan=OVERSCAN):
+    """Return the range of rows shown in a viewport starting top pixels down."""
+    first = max(0, int(top // row_height) - overscan)
+    last = min(count, int((top + height) // row_height) + 1 + overscan)
+    return range(first, max(first, last))
+
+
+def diff_names(names, templates):
+    """Return (removed, added) to turn the list names into the keys of templates."""
+    removed = [name for name in names if name not in templates]
+    present = set(names)
+    added = [name for name in templates if name not in present]
+    return removed, added
+
+
+class TemplateCard(ctk.CTkFrame):
+    """One reusable row of the template list."""
+
+    def __init__(self, master, on_use, on_edit, on_delete):
+        super().__init__(
+            master,
+            fg_color="#2d2d2d",
+            corner_radius=12,
+            border_width=2,
+            border_color="#3d3d3d"
+        )
+        self.template_name = None
+        self.row = None
+        self.shown = None
+
+        # Template info
+        info_frame = ctk.CTkFrame(self, fg_color="transparent")
+        info_frame.pack(side="left", fill="both", expand=True, padx=15, pady=12)
+
+        self.name_label = ctk.CTkLabel(
+            info_frame,
+            text="",
+            font=ctk.CTkFont(size=16, weight="bold"),
+            text_color="#ffffff"
+        )
+        self.name_label.pack(anchor="w")
+
+        self.created_label = ctk.CTkLabel(
+            info_frame,
+            text="",
+            font=ctk.CTkFont(size=12),
+            text_color="#cccccc"
+        )
+        self.created_label.pack(anchor="w")
+
+        self.layout_label = ctk.CTkLabel(
+            info_frame,
+            text="",
+            font=ctk.CTkFont(size=12),
+            text_color="#888888"
+        )
+        self.layout_label.pack(anchor="w")
+
+        # Action buttons act on whichever template the card shows
+        buttons_frame = ctk.CTkFrame(self, fg_color="transparent")
+        buttons_frame.pack(side="right", padx=15, pady=12)
+
+        for text, action, color, hover in (
+            ("Use", on_use, "#27ae60", "#229954"),
+            ("Edit", on_edit, "#f39c12", "#e67e22"),
+            ("Delete", on_delete, "#e74c3c", "#c0392b"),
+        ):
+            button = ctk.CTkButton(
+                buttons_frame,
+                text=text,
+                width=60,
+                command=lambda action=action: action(self.template_name),
+                fg_color=color,
+                hover_color=hover,
+                corner_radius=8,
+                height=30
+            )
+            button.pack(side="left", padx=2)
+
+    def show(self, template_name, template_data):
+        """Point the card at a template, touching the labels only if it changed."""
+        shown = (template_name, template_data.get('created', 'Unknown'), template_data.get('layout', '100%'))
+        self.template_name = template_name
+        if shown == self.shown:
+            return
+        self.shown = shown
+        self.name_label.configure(text=template_name)
+        self.created_label.configure(text=f"Created: {shown[1]}")
+        self.layout_label.configure(text=f"Layout: {shown[2]}")
+
+
+class TemplateList(ctk.CTkFrame):
+    """Scrollable list of template cards that only builds the visible ones.
+
+    on_use, on_edit and on_delete are called with a template name. Call
+    sync(templates) with the name to summary mapping after templates are
+    added or removed.
+    """
+
+    def __init__(self, master, on_use, on_edit, on_delete, height=400, bg="#1a1a1a"):
+        super().__init__(master, fg_color="transparent")
+        self.on_use = on_use
+        self.on_edit = on_edit
+        self.on_delete = on_delete
+        self.names = []
+        self.templates = {}
+        self.cards = []
+        self._windows = []
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+        self.canvas = tk.Canvas(self, height=height, bg=bg, highlightthickness=0,
+                                yscrollincrement=SCROLL_STEP)
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar = ctk.CTkScrollbar(self, command=self.canvas.yview)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.canvas.configure(yscrollcommand=self._on_scroll)
+
+        self.canvas.bind("<Configure>", lambda event: self.render())
+        self.bind("<Enter>", self._bind_wheel)
+        self.bind("<Leave>", self._unbind_wheel)
+
+    def sync(self, templates):
+        """Apply the templates added to or removed from templates since the last sync."""
+        removed, added = diff_names(self.names, templates)
+        if removed:
+            gone = set(removed)
+            self.names = [name for name in self.names if name not in gone]
+        self.names.extend(added)
+        self.templates = templates
+        self.canvas.configure(scrollregion=(0, 0, 0, len(self.names) * ROW_HEIGHT))
+        self.render()
+
+    def render(self):
+        """Show the cards of the rows in the viewport, recycling the rest."""
+        top = self.canvas.canvasy(0)
+        rows = visible_rows(top, self.canvas.winfo_height(), len(self.names))
+        while len(self.cards) < len(rows):
+            self._add_card()
+        if not self.cards:
+            return
+
+        # A row keeps the same card while it stays in view, so scrolling
+        # by one row rebinds a single card
+        width = max(1, self.canvas.winfo_width() - 2 * CARD_PADX)
+        used = set()
+        for row in rows:
+            index = row % len(self.cards)
+            card, window = self.cards[index], self._windows[index]
+            name = self.names[row]
+            card.show(name, self.templates[name])
+            if card.row != row:
+                card.row = row
+                self.canvas.coords(window, CARD_PADX, row * ROW_HEIGHT + (ROW_HEIGHT - CARD_HEIGHT) // 2)
+            self.canvas.itemconfigure(window, width=width, state="normal")
+            used.add(index)
+        for index, window in enumerate(self._windows):
+            if index not in used:
+                self.cards[index].row = None
+                self.canvas.itemconfigure(window, state="hidden")
+
+    def _add_card(self):
+        card = TemplateCard(self.canvas, self.on_use, self.on_edit, self.on_delete)
+        window = self.canvas.create_window(CARD_PADX, 0, anchor="nw", window=card,
+                                           height=CARD_HEIGHT, state="hidden")
+        # Adding a card changes which card serves each row
+        for other in self.cards:
+            other.row = None
+        self.cards.append(card)
+        self._windows.append(window)
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self.render()
+
+    def _bind_wheel(self, event):
+        self.canvas.bind_all("<MouseWheel>", self._on_wheel)
+        self.canvas.bind_all("<Button-4>", self._on_wheel)
+        self.canvas.bind_all("<Button-5>", self._on_wheel)
+
+    def _unbind_wheel(self, event):
+        # Moving onto a card also leaves this frame; keep the wheel bound then
+        inside = self.winfo_containing(event.x_root, event.y_root)
+        if inside is not None and str(inside).startswith(str(self)):
+            return
+        self.canvas.unbind_all("<MouseWheel>")
+        self.canvas.unbind_all("<Button-4>")
+        self.canvas.unbind_all("<Button-5>")
+
+    def _on_wheel(self, event):
+        if event.num == 4:
+            steps = -1
+        elif event.num == 5:
+            steps = 1
+        else:
+            # Windows reports multiples of 120, macOS small deltas
+            steps = -int(event.delta / 120) if abs(event.delta) >= 120 else -event.delta
+        self.canvas.yview_scroll(steps, "units")
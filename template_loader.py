@@ -0,0 +1,174 @@
+"""
+KeyAura Template Loader
+Loads a template's sounds in the background so switching templates never
+freezes the window. A current sound bank is mapped in one go; otherwise
+files are decoded on a thread pool (pygame releases the GIL while it
+decodes) in priority order, and each sound is handed to the sound cache
+as soon as it is ready, so the most-used keys become playable first.
+"""
+
+import os
+import threading
+from concurrent.futures import as_completed
+
+import pygame
+
+from key_model import key_id
+from sound_bank import bank_is_current, bank_path_for, build_bank, load_bank_sounds, read_bank_index
+
+# Keys by how often they are typed in English text, most frequent first
+KEY_FREQUENCY_ORDER = [
+    "Space", "E", "T", "A", "O", "I", "N", "S", "H", "R", "D", "L", "C", "U", "M", "W",
+    "F", "G", "Y", "P", "B", "Enter", "LShift", "V", "K", "Backspace", "J", "X", "Q", "Z", "RShift",
+    "LCtrl",
+]
+
+
+def sound_priorities(key_sounds, press_counts=None):
+    """Return the distinct sound paths of key_sounds, most important first.
+
+    A sound's weight is the sum over the keys using it of how often each
+    key was pressed this session (press_counts is indexed by key ID), with
+    typical English key frequency as the tie breaker, so shared and
+    frequently typed sounds load first.
+    """
+    ranks = {key: len(KEY_FREQUENCY_ORDER) - i for i, key in enumerate(KEY_FREQUENCY_ORDER)}
+    weights = {}
+    for key, path in key_sounds.items():
+        if not path:
+            continue
+        presses, rank = weights.get(path, (0, 0))
+        index = key_id(key)
+        if press_counts is not None and index is not None:
+            presses += press_counts[index]
+        weights[path] = (presses, rank + ranks.get(key, 0))
+    return sorted(weights, key=lambda path: weights[path], reverse=True)
+
+
+class TemplateLoad(threading.Thread):
+    """Loads the sounds of one template into a sound cache in the background.
+
+    on_progress(loaded, total) is called from this thread as sounds become
+    playable. on_finished(load) runs on this thread once every sound is in,
+    before the template's bank is rebuilt, unless the load was cancelled.
+    template_data is the parsed template this load belongs to.
+    """
+
+    def __init__(self, template_path, paths, transcoder, sound_cache, executor,
+                 on_progress=None, on_finished=None, template_data=None):
+        super().__init__(name="KeyAuraTemplateLoad", daemon=True)
+        self.template_path = template_path
+        self.template_data = template_data
+        self.paths = list(paths)
+        self.transcoder = transcoder
+        self.sound_cache = sound_cache
+        self.executor = executor
+        self.on_progress = on_progress
+        self.on_finished = on_finished
+
+        # Paths not playable yet; the engine skips their keys meanwhile
+        self.pending = {path for path in self.paths if path not in sound_cache}
+        self.total = len(self.paths)
+        self.loaded = self.total - len(self.pending)
+        self.failed = 0
+        self.from_bank = False
+        self._cancelled = threading.Event()
+        self._finished = threading.Event()
+
+    def cancel(self):
+        """Stop loading; sounds already in the cache stay there."""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def wait(self, timeout=None):
+        """Wait for the load to finish or be cancelled. Returns False on timeout."""
+        return self._finished.wait(timeout)
+
+    def run(self):
+        try:
+            self._report()
+            bank_path = bank_path_for(self.template_path)
+            decoded = False
+            if self.pending:
+                if not self._load_bank(bank_path):
+                    self._decode_pending()
+                    decoded = True
+            if self.cancelled:
+                return
+            if self.on_finished is not None:
+                self.on_finished(self)
+            if decoded and not self.cancelled and os.path.exists(self.template_path):
+                # Next time this template maps its sounds in one go
+                build_bank(bank_path, self.template_path, self.paths, self.transcoder)
+        except (OSError, ValueError, pygame.error) as e:
+            print(f"Error loading template sounds from {self.template_path}: {e}")
+        finally:
+            self.pending.clear()
+            self._finished.set()
+
+    def _report(self):
+        if self.on_progress is not None:
+            self.on_progress(self.loaded, self.total)
+
+    def _ready(self, path):
+        self.pending.discard(path)
+        self.loaded += 1
+        self._report()
+
+    def _load_bank(self, bank_path):
+        if not os.path.exists(self.template_path):
+            return False
+        index, data_start = read_bank_index(bank_path)
+        if not bank_is_current(index, self.template_path, self.paths):
+            return False
+        sounds = load_bank_sounds(bank_path, index, data_start, self.transcoder.build_sound)
+        self.from_bank = True
+        for path in self.paths:
+            if path in sounds and path in self.pending:
+                sound, mtime = sounds[path]
+                self.sound_cache.put(path, sound, mtime)
+                self._ready(path)
+        # Sounds missing from the bank are decoded individually
+        return not self.pending
+
+    def _decode(self, path):
+        if self.cancelled:
+            return None
+        mtime = os.path.getmtime(path)
+        return self.transcoder.load_sound(path), mtime
+
+    def _decode_pending(self):
+        # Submitted in priority order; the pool starts them first in, first out
+        futures = {self.executor.submit(self._decode, path): path
+                   for path in self.paths if path in self.pending}
+        for future in as_completed(futures):
+            if self.cancelled:
+                for other in futures:
+                    other.cancel()
+                return
+            path = futures[future]
+            try:
+                result = future.result()
+            except (OSError, ValueError, pygame.error) as e:
+                # One bad file must not stop the others or leave its keys pending
+                print(f"Error loading sound {path}: {e}")
+                self.sound_cache.mark_failed(path, e)
+                self.failed += 1
+                self.pending.discard(path)
+                continue
+            if result is not None:
+                self.sound_cache.put(path, *result)
+                self._ready(path)
+
+    def stats(self):
+        """Return load progress as a dict."""
+        return {
+            "total": self.total,
+            "loaded": self.loaded,
+            "failed": self.failed,
+            "from_bank": self.from_bank,
+            "cancelled": self.cancelled,
+        }
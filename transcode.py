@@ -0,0 +1,216 @@
+"""
+KeyAura Transcoder
+Converts imported sound files once into raw PCM in the mixer's native format
+and keeps them in sounds/.cache, so later loads are plain memory copies.
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+import pygame
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CACHE_DIR = os.path.join("sounds", ".cache")
+INDEX_FILE = "index.json"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def mixer_format_tag():
+    """Return a short tag such as '44100-s16-2' for the current mixer format."""
+    frequency, size, channels = pygame.mixer.get_init()
+    sign = "s" if size < 0 else "u"
+    if size == 32:
+        sign = "f"
+    return f"{frequency}-{sign}{abs(size)}-{channels}"
+
+
+def native_sample_format():
+    """Return (numpy dtype, full scale, channels) of the current mixer format."""
+    _, size, channels = pygame.mixer.get_init()
+    if size == -16:
+        return np.int16, 32767.0, channels
+    if size == 32:
+        return np.float32, 1.0, channels
+    raise RuntimeError(f"Unsupported mixer sample size: {size}")
+
+
+def read_pcm_samples(pcm_path):
+    """Read a native PCM file as a float32 (frames, channels) array in [-1, 1]."""
+    dtype, full_scale, channels = native_sample_format()
+    samples = np.fromfile(pcm_path, dtype=dtype).reshape(-1, channels).astype(np.float32)
+    samples /= full_scale
+    return samples
+
+
+def file_digest(path):
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_atomic(path, data):
+    """Write bytes to path via a temporary file so readers never see a partial file."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class PcmTranscoder:
+    """Content-addressed cache of mixer-native PCM for imported sounds.
+
+    Cached files are named by the source file's SHA-256 and the mixer format,
+    so the same sample used from several paths is decoded once, and changing
+    the mixer format never serves PCM of the wrong rate or layout. The digest
+    of each source path is remembered by (mtime, size) in index.json so that
+    unchanged files are not re-hashed on every start.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._index_path = os.path.join(self.cache_dir, INDEX_FILE)
+        self._index = self._load_index()
+        self._trims = {}  # path -> leading milliseconds to skip
+        self._gains = {}  # path -> gain in dB applied when the Sound is built
+        self.transcoded = 0
+        self.reused = 0
+
+    def _load_index(self):
+        if not os.path.exists(self._index_path):
+            return {}
+        try:
+            with open(self._index_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading transcode index: {e}")
+            return {}
+
+    def _save_index(self):
+        write_atomic(self._index_path, json.dumps(self._index, indent=2).encode("utf-8"))
+
+    def content_hash(self, path):
+        """Return the content digest of path, hashing only if it changed."""
+        key = os.path.abspath(path)
+        stat = os.stat(path)
+        with self._lock:
+            entry = self._index.get(key)
+            if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                return entry[2]
+
+        digest = file_digest(path)
+        with self._lock:
+            self._index[key] = [stat.st_mtime_ns, stat.st_size, digest]
+            self._save_index()
+        return digest
+
+    def cache_path(self, digest):
+        """Return the PCM cache file for a content digest in the current mixer format."""
+        return os.path.join(self.cache_dir, f"{digest}-{mixer_format_tag()}.pcm")
+
+    def transcode(self, path):
+        """Make sure path has a native PCM cache file and return its location."""
+        pcm_path = self.cache_path(self.content_hash(path))
+        if os.path.exists(pcm_path):
+            self.reused += 1
+            return pcm_path
+
+        # pygame decodes and resamples to the mixer format on load
+        sound = pygame.mixer.Sound(path)
+        write_atomic(pcm_path, sound.get_raw())
+        self.transcoded += 1
+        return pcm_path
+
+    def set_trim(self, path, offset_ms):
+        """Skip the first offset_ms of path when building its Sound. Returns True if changed."""
+        offset_ms = offset_ms or 0.0
+        if self._trims.get(path, 0.0) == offset_ms:
+            return False
+        if offset_ms:
+            self._trims[path] = offset_ms
+        else:
+            self._trims.pop(path, None)
+        return True
+
+    def set_gain(self, path, gain_db):
+        """Apply gain_db to path when building its Sound. Returns True if changed."""
+        gain_db = gain_db or 0.0
+        if self._gains.get(path, 0.0) == gain_db:
+            return False
+        if gain_db:
+            self._gains[path] = gain_db
+        else:
+            self._gains.pop(path, None)
+        return True
+
+    def gain_factor(self, path):
+        """Return the linear gain applied to path when its Sound is built."""
+        gain_db = self._gains.get(path)
+        if not gain_db or np is None:
+            return 1.0
+        return 10.0 ** (gain_db / 20.0)
+
+    def trim_frames(self, path):
+        """Return the number of leading frames of path to skip at the mixer rate."""
+        offset_ms = self._trims.get(path)
+        if not offset_ms:
+            return 0
+        return int(offset_ms * pygame.mixer.get_init()[0] / 1000.0)
+
+    def build_sound(self, path, pcm):
+        """Build a Sound for path from its native PCM, applying trim and gain.
+
+        Trimming is a memoryview slice, so it costs no copy of its own; a gain
+        other than unity costs one vectorized multiply here instead of any
+        work per key press.
+        """
+        view = memoryview(pcm)
+        frames = self.trim_frames(path)
+        if frames:
+            _, size, channels = pygame.mixer.get_init()
+            offset = frames * (abs(size) // 8) * channels
+            if offset < len(view):
+                view = view[offset:]
+
+        gain = self.gain_factor(path)
+        if gain != 1.0:
+            dtype, full_scale, _ = native_sample_format()
+            samples = np.frombuffer(view, dtype=dtype).astype(np.float32)
+            samples *= gain
+            np.clip(samples, -full_scale, full_scale, out=samples)
+            return pygame.mixer.Sound(buffer=samples.astype(dtype).tobytes())
+        return pygame.mixer.Sound(buffer=view)
+
+    def load_sound(self, path):
+        """Return a Sound for path built straight from its native PCM."""
+        with open(self.transcode(path), 'rb') as f:
+            return self.build_sound(path, f.read())
+
+    def import_sounds(self, paths):
+        """Transcode every path. Returns a dict of path -> PCM cache file."""
+        imported = {}
+        for path in dict.fromkeys(p for p in paths if p):
+            try:
+                imported[path] = self.transcode(path)
+            except (OSError, pygame.error) as e:
+                print(f"Error importing sound {path}: {e}")
+        return imported
+
+    def stats(self):
+        """Return transcoder counters as a dict."""
+        return {
+            "cache_dir": self.cache_dir,
+            "indexed": len(self._index),
+            "transcoded": self.transcoded,
+            "reused": self.reused,
+        }
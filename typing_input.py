@@ -0,0 +1,180 @@
+"""
+KeyAura Typing Input
+Plays the keys typed on the physical keyboard while a KeyAura window has
+focus. Keysyms resolve to key IDs through a table built at import, held
+keys are told apart from auto-repeat, and the time from the Tk event to the
+sound reaching the mixer is measured.
+"""
+
+import time
+from array import array
+from collections import deque
+
+from input_backends import TK_KEYSYM_IDS
+from key_model import KEY_ID_COUNT, KEY_IDS, KEY_NAMES
+
+REPEAT_IGNORE = "ignore"
+REPEAT_THROTTLE = "throttle"
+REPEAT_PLAY = "play"
+REPEAT_MODES = (REPEAT_IGNORE, REPEAT_THROTTLE, REPEAT_PLAY)
+
+DEFAULT_REPEAT_INTERVAL_MS = 100
+DEFAULT_REPEAT_GAIN = 0.5
+LATENCY_SAMPLES = 1000
+
+# X11 sends auto-repeat as a release and a press with the same timestamp
+REPEAT_RELEASE_GAP_MS = 1
+
+# Longer than any OS auto-repeat delay; a press of a "held" key that comes
+# later than this after its last press is a new press whose release was missed
+REPEAT_MAX_GAP_MS = 1000
+
+
+class KeyRepeatFilter:
+    """Tells first presses from auto-repeats and applies the repeat mode.
+
+    Handles both ways platforms report a held key: repeated presses with no
+    release in between, and release/press pairs with the same event time.
+    Releases sent to another window are missed, so reset() forgets every
+    held key and a press long after the last one is never a repeat.
+    Repeats are dropped ("ignore"), played at most once per interval_ms
+    ("throttle") or all played ("play"), at gain.
+    """
+
+    def __init__(self, mode=REPEAT_IGNORE, interval_ms=DEFAULT_REPEAT_INTERVAL_MS, gain=DEFAULT_REPEAT_GAIN):
+        if mode not in REPEAT_MODES:
+            raise ValueError(f"Unknown key repeat mode: {mode}")
+        self.mode = mode
+        self.interval_ms = interval_ms
+        self.gain = gain
+        self._down = bytearray(KEY_ID_COUNT)
+        self._released_at = array('d', [float("-inf")]) * KEY_ID_COUNT
+        self._pressed_at = array('d', [0.0]) * KEY_ID_COUNT
+        self._played_at = array('d', [0.0]) * KEY_ID_COUNT
+
+        self.presses = 0
+        self.repeats = 0
+        self.repeats_played = 0
+
+    def press(self, key, event_time):
+        """Register a press of a key ID at event_time (ms). Returns the gain to play it at, or None."""
+        if self._down[key]:
+            repeat = 0 <= event_time - self._pressed_at[key] <= REPEAT_MAX_GAP_MS
+        else:
+            repeat = 0 <= event_time - self._released_at[key] <= REPEAT_RELEASE_GAP_MS
+        self._down[key] = 1
+        self._pressed_at[key] = event_time
+        if not repeat:
+            self.presses += 1
+            self._played_at[key] = event_time
+            return 1.0
+
+        self.repeats += 1
+        if self.mode == REPEAT_IGNORE:
+            return None
+        if self.mode == REPEAT_THROTTLE and event_time - self._played_at[key] < self.interval_ms:
+            return None
+        self._played_at[key] = event_time
+        self.repeats_played += 1
+        return self.gain
+
+    def release(self, key, event_time):
+        """Register a release of a key ID at event_time (ms)."""
+        self._down[key] = 0
+        self._released_at[key] = event_time
+
+    def reset(self):
+        """Forget every held key, e.g. when the window loses focus."""
+        self._down[:] = bytes(KEY_ID_COUNT)
+        self._released_at[:] = array('d', [float("-inf")]) * KEY_ID_COUNT
+
+
+class TypingInput:
+    """Plays the sounds of keys typed into a Tk window.
+
+    Binds <KeyPress>, <KeyRelease>, <FocusIn> and <FocusOut> on root in
+    addition to its existing bindings. The repeat mode comes from the engine's audio settings
+    ("key_repeat", "key_repeat_interval_ms", "key_repeat_gain").
+    on_key(name) is called for every press that queued a sound, e.g. to
+    flash the key on screen.
+    """
+
+    def __init__(self, root, engine, on_key=None):
+        self.root = root
+        self.engine = engine
+        self.on_key = on_key
+        settings = engine.audio_settings
+        self.repeats = KeyRepeatFilter(settings.get("key_repeat", REPEAT_IGNORE),
+                                       settings.get("key_repeat_interval_ms", DEFAULT_REPEAT_INTERVAL_MS),
+                                       settings.get("key_repeat_gain", DEFAULT_REPEAT_GAIN))
+
+        # perf_counter() time each key's last typed press arrived, 0 once played
+        self._typed_at = array('d', [0.0]) * KEY_ID_COUNT
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.typed = 0
+        self.unmapped = 0
+
+        root.bind("<KeyPress>", self._on_press, add="+")
+        root.bind("<KeyRelease>", self._on_release, add="+")
+        # Keys released while another window has focus never send a release here
+        root.bind("<FocusIn>", self._on_focus_change, add="+")
+        root.bind("<FocusOut>", self._on_focus_change, add="+")
+        engine.listeners.append(self._on_engine_event)
+
+    def _on_press(self, event):
+        received = time.perf_counter()
+        key = TK_KEYSYM_IDS.get(event.keysym)
+        if key is None:
+            self.unmapped += 1
+            return
+        gain = self.repeats.press(key, event.time)
+        if gain is None:
+            return
+        # Set before pressing: the audio thread may play the key before press() returns
+        self._typed_at[key] = received
+        if not self.engine.press(key, gain, received):
+            self._typed_at[key] = 0.0
+            return
+        self.typed += 1
+        if self.on_key is not None:
+            self.on_key(KEY_NAMES[key])
+
+    def _on_release(self, event):
+        key = TK_KEYSYM_IDS.get(event.keysym)
+        if key is not None:
+            self.repeats.release(key, event.time)
+
+    def _on_focus_change(self, event):
+        self.repeats.reset()
+
+    def _on_engine_event(self, event):
+        # Runs on the audio thread; latency_ms counts from the Tk event
+        if event["type"] != "played":
+            return
+        key = KEY_IDS.get(event["key"])
+        if key is not None and self._typed_at[key]:
+            self._typed_at[key] = 0.0
+            self.latencies.append(event["latency_ms"])
+
+    def stats(self):
+        """Return typing counters and event-to-mixer latency in ms as a dict."""
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+        return {
+            "typed": self.typed,
+            "unmapped": self.unmapped,
+            "presses": self.repeats.presses,
+            "repeats": self.repeats.repeats,
+            "repeats_played": self.repeats.repeats_played,
+            "repeat_mode": self.repeats.mode,
+            "latency_count": count,
+            "latency_mean_ms": sum(latencies) / count if count else 0.0,
+            "latency_p50_ms": latencies[count // 2] if count else 0.0,
+            "latency_p95_ms": latencies[min(count - 1, int(count * 0.95))] if count else 0.0,
+            "latency_max_ms": latencies[-1] if count else 0.0,
+        }
+
+    def close(self):
+        """Stop measuring latency. The key bindings go away with the window."""
+        if self._on_engine_event in self.engine.listeners:
+            self.engine.listeners.remove(self._on_engine_event)
@@ -0,0 +1,143 @@
+"""
+KeyAura Sound Variations
+Pre-renders pitch and gain variations of each sound so repeated presses of a
+key do not sound identical, without doing any DSP while typing.
+
+Enabled per template with a "variations" entry, e.g.:
+    "variations": {"count": 4, "pitch_cents": 40, "gain_db": 1.5, "mode": "round_robin", "seed": 0}
+"""
+
+import hashlib
+import json
+import os
+import random
+
+import pygame
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from transcode import mixer_format_tag, native_sample_format, read_pcm_samples, write_atomic
+
+MODE_ROUND_ROBIN = "round_robin"
+MODE_RANDOM = "random"
+
+DEFAULT_VARIATION_SETTINGS = {
+    "count": 4,
+    "pitch_cents": 40,
+    "gain_db": 1.5,
+    "mode": MODE_ROUND_ROBIN,
+    "seed": 0,
+}
+
+
+def resample(samples, ratio):
+    """Linearly resample a (frames, channels) array by ratio (>1 raises pitch)."""
+    frames = samples.shape[0]
+    out_frames = max(1, int(frames / ratio))
+    positions = np.arange(out_frames, dtype=np.float64) * ratio
+    left = np.minimum(positions.astype(np.int64), frames - 1)
+    right = np.minimum(left + 1, frames - 1)
+    fraction = (positions - left).astype(np.float32)[:, None]
+    return samples[left] * (1.0 - fraction) + samples[right] * fraction
+
+
+def render_variants(samples, count, pitch_cents, gain_db, rng):
+    """Return count float32 variants of samples with random pitch and gain offsets."""
+    variants = []
+    for _ in range(count):
+        ratio = 2.0 ** (rng.uniform(-pitch_cents, pitch_cents) / 1200.0)
+        gain = 10.0 ** (rng.uniform(-gain_db, gain_db) / 20.0)
+        variant = resample(samples, ratio)
+        variant *= gain
+        variants.append(variant)
+    return variants
+
+
+class VariantPicker:
+    """Chooses one of a sound's pre-rendered variants in O(1) per press."""
+
+    def __init__(self, sounds, mode=MODE_ROUND_ROBIN, seed=0):
+        self.sounds = sounds
+        self._next = 0
+        self._random = random.Random(seed) if mode == MODE_RANDOM else None
+
+    def next(self):
+        """Return the Sound to play for this press."""
+        if self._random is not None:
+            return self.sounds[self._random.randrange(len(self.sounds))]
+        sound = self.sounds[self._next]
+        self._next = (self._next + 1) % len(self.sounds)
+        return sound
+
+
+class SoundVariations:
+    """Renders and caches variations next to the transcoder's native PCM."""
+
+    def __init__(self, transcoder, settings):
+        if np is None:
+            raise RuntimeError("NumPy is required for sound variations")
+        self.transcoder = transcoder
+        self.settings = dict(DEFAULT_VARIATION_SETTINGS)
+        self.settings.update(settings)
+
+        self.dtype, self.full_scale, self.channels = native_sample_format()
+
+        params = {k: self.settings[k] for k in ("count", "pitch_cents", "gain_db", "seed")}
+        self.params_tag = hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+    def estimate_bytes(self, paths):
+        """Estimate the memory the variations of paths will take once loaded."""
+        longest = 2.0 ** (self.settings["pitch_cents"] / 1200.0)
+        total = 0
+        for path in dict.fromkeys(p for p in paths if p):
+            try:
+                total += os.path.getsize(self.transcoder.transcode(path))
+            except (OSError, pygame.error):
+                continue
+        return int(total * self.settings["count"] * longest)
+
+    def _variant_paths(self, digest, trim_frames, gain):
+        name = f"{digest}-{mixer_format_tag()}-var{self.params_tag}-t{trim_frames}-g{gain:.4f}"
+        base = os.path.join(self.transcoder.cache_dir, name)
+        return [f"{base}-{i}.pcm" for i in range(self.settings["count"])]
+
+    def render(self, path):
+        """Make sure the variation PCM files of path exist and return their paths."""
+        digest = self.transcoder.content_hash(path)
+        trim_frames = self.transcoder.trim_frames(path)
+        gain = self.transcoder.gain_factor(path)
+        variant_paths = self._variant_paths(digest, trim_frames, gain)
+        if all(os.path.exists(p) for p in variant_paths):
+            return variant_paths
+
+        samples = read_pcm_samples(self.transcoder.transcode(path))[trim_frames:]
+        samples *= gain
+        # Seeded per sound so regenerating gives the same variations
+        rng = random.Random(f"{self.settings['seed']}:{digest}")
+        variants = render_variants(samples, self.settings["count"], self.settings["pitch_cents"],
+                                   self.settings["gain_db"], rng)
+        for variant_path, variant in zip(variant_paths, variants):
+            np.clip(variant, -1.0, 1.0, out=variant)
+            write_atomic(variant_path, (variant * self.full_scale).astype(self.dtype).tobytes())
+        return variant_paths
+
+    def load(self, path):
+        """Return a VariantPicker over the loaded variations of path."""
+        sounds = []
+        for variant_path in self.render(path):
+            with open(variant_path, 'rb') as f:
+                sounds.append(pygame.mixer.Sound(buffer=f.read()))
+        return VariantPicker(sounds, self.settings["mode"], self.settings["seed"])
+
+    def load_all(self, paths):
+        """Load variations for every path. Returns {path: VariantPicker}."""
+        pickers = {}
+        for path in dict.fromkeys(p for p in paths if p):
+            try:
+                pickers[path] = self.load(path)
+            except (OSError, pygame.error) as e:
+                print(f"Error generating variations for {path}: {e}")
+        return pickers
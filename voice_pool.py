@@ -0,0 +1,174 @@
+"""
+KeyAura Voice Pool
+Allocates pygame mixer channels to key sounds so overlapping keystrokes mix
+instead of cutting each other off.
+"""
+
+import threading
+import time
+from array import array
+
+import pygame
+
+STEAL_OLDEST = "oldest"
+STEAL_QUIETEST = "quietest"
+STEAL_SAME_KEY = "same_key"
+STEAL_NONE = "none"
+STEAL_POLICIES = (STEAL_OLDEST, STEAL_QUIETEST, STEAL_SAME_KEY, STEAL_NONE)
+
+DEFAULT_POLYPHONY = 16
+DEFAULT_MAX_VOICES_PER_KEY = 3
+
+
+class VoicePool:
+    """Fixed pool of mixer channels with per-key caps and voice stealing.
+
+    Each voice remembers which key started it, when, and at what volume, so
+    that when the pool is full a victim can be picked by the steal policy:
+
+    - "oldest": the voice that started first
+    - "quietest": the voice with the lowest volume
+    - "same_key": an older voice of the same key, falling back to oldest
+    - "none": never steal; the new sound is dropped
+    """
+
+    def __init__(self, polyphony=DEFAULT_POLYPHONY,
+                 max_voices_per_key=DEFAULT_MAX_VOICES_PER_KEY,
+                 steal_policy=STEAL_OLDEST, first_channel=0):
+        if steal_policy not in STEAL_POLICIES:
+            raise ValueError(f"Unknown steal policy: {steal_policy}")
+        self.polyphony = polyphony
+        self.max_voices_per_key = max_voices_per_key
+        self.steal_policy = steal_policy
+        self.volume = 1.0
+        self._lock = threading.Lock()
+
+        if pygame.mixer.get_num_channels() < first_channel + polyphony:
+            pygame.mixer.set_num_channels(first_channel + polyphony)
+        self.channels = [pygame.mixer.Channel(first_channel + i) for i in range(polyphony)]
+        self.voice_keys = [None] * polyphony
+        # Arrays hold the floats unboxed, so playing a voice keeps no new objects
+        self.voice_started = array('d', [0.0]) * polyphony
+        self.voice_volumes = array('d', [0.0]) * polyphony
+        self.voice_gains = array('d', [1.0]) * polyphony
+
+        self.played = 0
+        self.steals = 0
+        self.dropped = 0
+        self.peak_voices = 0
+
+    def play(self, key, sound, volume=None, gain=1.0):
+        """Start sound for key on a free or stolen voice. Returns the Channel or None.
+
+        gain scales the volume of this voice only, e.g. a per-key gain, and
+        is kept when the pool volume changes while the voice plays.
+        """
+        if volume is None:
+            volume = self.volume
+        volume *= gain
+        with self._lock:
+            index = self._allocate(key)
+            if index is None:
+                self.dropped += 1
+                return None
+
+            channel = self.channels[index]
+            channel.set_volume(volume)
+            channel.play(sound)
+            self.voice_keys[index] = key
+            self.voice_started[index] = time.perf_counter()
+            self.voice_volumes[index] = volume
+            self.voice_gains[index] = gain
+            self.played += 1
+
+            active = self.active_voices()
+            if active > self.peak_voices:
+                self.peak_voices = active
+            return channel
+
+    def _allocate(self, key):
+        """Pick the voice index for a new sound of key, or None to drop it.
+
+        Runs for every press, so it scans the channels once without building
+        lists or closures.
+        """
+        channels = self.channels
+        started = self.voice_started
+        free = None
+        same_key_count = 0
+        oldest_same_key = None
+        for index in range(self.polyphony):
+            if not channels[index].get_busy():
+                if free is None:
+                    free = index
+            elif self.voice_keys[index] == key:
+                same_key_count += 1
+                if oldest_same_key is None or started[index] < started[oldest_same_key]:
+                    oldest_same_key = index
+
+        # Enforce the per-key cap before looking for free voices
+        if self.max_voices_per_key and same_key_count >= self.max_voices_per_key:
+            if self.steal_policy == STEAL_NONE:
+                return None
+            self.steals += 1
+            return oldest_same_key
+
+        if free is not None:
+            return free
+
+        if self.steal_policy == STEAL_NONE:
+            return None
+        self.steals += 1
+        if self.steal_policy == STEAL_SAME_KEY and oldest_same_key is not None:
+            return oldest_same_key
+        victim = 0
+        for index in range(1, self.polyphony):
+            if self.steal_policy == STEAL_QUIETEST:
+                volume, victim_volume = self.voice_volumes[index], self.voice_volumes[victim]
+                if volume < victim_volume or (volume == victim_volume and started[index] < started[victim]):
+                    victim = index
+            elif started[index] < started[victim]:
+                victim = index
+        return victim
+
+    def set_volume(self, volume):
+        """Set the volume used for new voices and for voices already playing.
+
+        Playing voices keep their own gain on top of the new volume.
+        """
+        with self._lock:
+            self.volume = volume
+            for index, channel in enumerate(self.channels):
+                voice_volume = volume * self.voice_gains[index]
+                channel.set_volume(voice_volume)
+                self.voice_volumes[index] = voice_volume
+
+    def active_voices(self):
+        """Return the number of voices currently playing."""
+        active = 0
+        for channel in self.channels:
+            if channel.get_busy():
+                active += 1
+        return active
+
+    def stop_all(self):
+        """Stop every voice in the pool."""
+        for channel in self.channels:
+            channel.stop()
+
+    def close(self):
+        """Stop every voice. The pool holds no other resources."""
+        self.stop_all()
+
+    def stats(self):
+        """Return voice allocation counters as a dict."""
+        return {
+            "polyphony": self.polyphony,
+            "max_voices_per_key": self.max_voices_per_key,
+            "steal_policy": self.steal_policy,
+            "active": self.active_voices(),
+            "peak": self.peak_voices,
+            "played": self.played,
+            "steals": self.steals,
+            "dropped": self.dropped,
+        }